@@ -0,0 +1,219 @@
+"""
+Walk-forward backtesting for the shelter demand model.
+
+For every cutoff date (weekly by default) a fresh model is trained on all rows
+before the cutoff and scored on the following `horizon` days. Errors are reported
+by sector and by calendar month so winters and holidays can be inspected
+separately instead of being averaged into five TimeSeriesSplit folds.
+
+Each forecast only uses what is known at the cutoff. Weather and calendar
+features of the forecast days are known ahead; every other feature (rolling
+occupancy, intake calls, monthly flow figures) is frozen at each sector's last
+value before the cutoff. Weather is the observed weather of the forecast days,
+i.e. a perfect forecast, so the errors understate live ones by the weather
+forecast error. HistGradientBoosting bins each cutoff's training rows itself,
+so the test period never shapes the bins.
+
+The data is loaded and feature-engineered once and shipped to each worker process
+once through the pool initializer. Cutoffs run in parallel processes.
+
+Usage:
+    python backtest.py --start 2022-01-01 --end 2025-11-01 --every 7 --horizon 7 --jobs 4
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from threadpoolctl import threadpool_limits
+
+import thread_config
+from mlmodel import WEATHER_FEATURE_COLUMNS, load_data, build_features
+
+# Features of a forecast day that are known at the cutoff; everything else is frozen
+CALENDAR_COLUMNS = ['day_of_week', 'day_of_month', 'month', 'year', 'week_of_year', 'day_of_year', 'is_payday']
+KNOWN_AHEAD_COLUMNS = WEATHER_FEATURE_COLUMNS + CALENDAR_COLUMNS + ['extreme_cold_alert']
+
+
+def frozen_columns(columns):
+    """Feature columns not known ahead of a forecast day (sector indicators excluded)"""
+    return [col for col in columns if not col.startswith('SECTOR_') and col not in KNOWN_AHEAD_COLUMNS]
+
+
+def freeze_columns(X, rows, frozen, sector_codes, last_train_row, fallback):
+    """
+    Returns X[rows] with the `frozen` columns set to each sector's value on its
+    last training row (`fallback`, the training mean, for sectors without one).
+    """
+    X_rows = X[rows].copy()
+    sectors = sector_codes[rows]
+    for code in np.unique(sectors):
+        source = last_train_row[code]
+        X_rows[np.ix_(sectors == code, frozen)] = X[source, frozen] if source >= 0 else fallback
+    return X_rows
+
+
+# Worker-process state, set once per worker by the pool initializer
+_shared = {}
+
+
+def _init_worker(X, y, day_index, sector_codes, frozen, n_threads):
+    _shared.update(X=X, y=y, day_index=day_index, sector_codes=sector_codes, frozen=frozen, n_threads=n_threads)
+
+
+def _run_cutoff(cutoff_day, horizon):
+    """Trains on rows before `cutoff_day` and predicts the next `horizon` days."""
+    X, y, day_index = _shared['X'], _shared['y'], _shared['day_index']
+    sector_codes, frozen = _shared['sector_codes'], _shared['frozen']
+    train_rows = day_index < cutoff_day
+    test_rows = (day_index >= cutoff_day) & (day_index < cutoff_day + horizon)
+
+    X_train = X[train_rows]
+    # Rows are sorted by date, so the last training row of a sector is its highest index
+    last_train_row = np.full(sector_codes.max() + 1, -1)
+    np.maximum.at(last_train_row, sector_codes[train_rows], np.flatnonzero(train_rows))
+    X_test = freeze_columns(X, test_rows, frozen, sector_codes, last_train_row,
+                            np.nanmean(X_train[:, frozen], axis=0))
+
+    with threadpool_limits(limits=_shared['n_threads']):
+        model = HistGradientBoostingRegressor(random_state=42)
+        model.fit(X_train, y[train_rows])
+        y_pred = model.predict(X_test)
+    return cutoff_day, np.flatnonzero(test_rows), y_pred
+
+
+def run_backtest(merged_df, cutoffs, horizon=7, n_jobs=None):
+    """
+    Runs the walk-forward backtest.
+
+    Args:
+        merged_df (pd.DataFrame): Output of mlmodel.build_features.
+        cutoffs (pd.DatetimeIndex): Forecast origins; each trains on rows strictly before it.
+            Cutoffs without training rows before them or test rows after them are skipped.
+        horizon (int): Days forecast after each cutoff.
+        n_jobs (int): Worker processes (defaults to the CPU count).
+
+    Returns:
+        pd.DataFrame: One row per forecast with DATE, SECTOR, cutoff, horizon_day, actual, predicted.
+    """
+    sector_columns = [col for col in merged_df.columns if col.startswith('SECTOR_')]
+    X = merged_df.drop(columns=['True Demand', 'DATE'])
+    frozen = [X.columns.get_loc(col) for col in frozen_columns(X.columns)]
+    sectors = merged_df[sector_columns].to_numpy().argmax(axis=1)
+    y = merged_df['True Demand'].to_numpy(dtype=np.float64)
+    dates = merged_df['DATE']
+    origin = dates.min()
+    day_index = (dates - origin).dt.days.to_numpy()
+
+    cutoff_days = [(cutoff - origin).days for cutoff in cutoffs]
+    usable = [day for day in cutoff_days
+              if (day_index < day).any() and ((day_index >= day) & (day_index < day + horizon)).any()]
+    if not usable:
+        raise ValueError(f"No cutoff has training data before it and test data in the {horizon} days after it "
+                         f"(data covers {origin.date()} to {dates.max().date()})")
+    if len(usable) < len(cutoff_days):
+        print(f"Skipping {len(cutoff_days) - len(usable)} cutoff(s) without training rows before them "
+              f"or test rows after them.")
+
+    n_jobs = n_jobs or thread_config.available_cpus()
+    n_threads = thread_config.threads_for('training', workers=n_jobs)
+    frames = []
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(X.to_numpy(dtype=np.float64), y, day_index, sectors, frozen,
+                                       n_threads)) as executor:
+        futures = [executor.submit(_run_cutoff, day, horizon) for day in usable]
+        for future in futures:
+            cutoff_day, rows, y_pred = future.result()
+            frames.append(pd.DataFrame({
+                'DATE': dates.iloc[rows].to_numpy(),
+                'SECTOR': np.array(sector_columns)[sectors[rows]],
+                'cutoff': origin + pd.Timedelta(days=cutoff_day),
+                'horizon_day': day_index[rows] - cutoff_day + 1,
+                'actual': y[rows],
+                'predicted': y_pred,
+            }))
+
+    results = pd.concat(frames, ignore_index=True)
+    results['SECTOR'] = results['SECTOR'].str.replace('SECTOR_', '')
+    return results
+
+
+def summarize_backtest(results):
+    """
+    Aggregates forecast errors.
+
+    Returns:
+        dict: 'overall' (MAE/MAPE/bias), 'by_sector', 'by_month' and 'by_sector_month' MAE tables.
+    """
+    results = results.assign(
+        abs_error=(results['predicted'] - results['actual']).abs(),
+        error=results['predicted'] - results['actual'],
+        month=results['DATE'].dt.month,
+    )
+    ape = results['abs_error'] / results['actual'].where(results['actual'] != 0)
+    return {
+        'overall': {
+            'forecasts': len(results),
+            'cutoffs': results['cutoff'].nunique(),
+            'mae': results['abs_error'].mean(),
+            'mape': ape.mean() * 100,
+            'bias': results['error'].mean(),
+        },
+        'by_sector': results.groupby('SECTOR')['abs_error'].agg(['mean', 'max', 'count']).rename(columns={'mean': 'mae'}),
+        'by_month': results.groupby('month')['abs_error'].mean().rename('mae'),
+        'by_sector_month': results.pivot_table(index='month', columns='SECTOR', values='abs_error', aggfunc='mean'),
+        'by_horizon_day': results.groupby('horizon_day')['abs_error'].mean().rename('mae'),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the shelter demand model.")
+    parser.add_argument('--start', default='2022-01-01', help="First cutoff date (default: 2022-01-01)")
+    parser.add_argument('--end', default=None, help="Last cutoff date (default: last date minus the horizon)")
+    parser.add_argument('--every', type=int, default=7, help="Days between cutoffs (default: 7)")
+    parser.add_argument('--horizon', type=int, default=7, help="Days forecast after each cutoff (default: 7)")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', default=None, help="Optional CSV path for the per-forecast results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    merged_df = build_features(*load_data())
+    prepare_seconds = time.perf_counter() - start
+
+    last_date = merged_df['DATE'].max()
+    end = pd.Timestamp(args.end) if args.end else last_date - pd.Timedelta(days=args.horizon - 1)
+    cutoffs = pd.date_range(pd.Timestamp(args.start), end, freq=f'{args.every}D')
+    print(f"\nBacktesting {len(cutoffs)} cutoffs from {cutoffs[0].date()} to {cutoffs[-1].date()} "
+          f"(horizon {args.horizon} days)")
+
+    start = time.perf_counter()
+    results = run_backtest(merged_df, cutoffs, horizon=args.horizon, n_jobs=args.jobs)
+    backtest_seconds = time.perf_counter() - start
+    summary = summarize_backtest(results)
+
+    overall = summary['overall']
+    print("\n--- Backtest Summary ---")
+    print(f"Forecasts: {overall['forecasts']} over {overall['cutoffs']} cutoffs")
+    print(f"MAE: {overall['mae']:.2f}   MAPE: {overall['mape']:.2f}%   Bias: {overall['bias']:+.2f}")
+    print(f"Data prep: {prepare_seconds:.1f}s   Backtest: {backtest_seconds:.1f}s")
+    print("\nMAE by sector:")
+    print(summary['by_sector'].round(2).to_string())
+    print("\nMAE by month and sector:")
+    print(summary['by_sector_month'].round(1).to_string())
+    print("\nMAE by horizon day:")
+    print(summary['by_horizon_day'].round(2).to_string())
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nPer-forecast results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+"""
+Benchmark: /api/predict latency under load with the audit log off and on.
+
+Starts the API in a fresh uvicorn process per configuration, drives it with
+concurrent clients and reports throughput and latency percentiles, plus the audit
+counters from /api/metrics. Run from the project root after training:
+
+    python benchmarks/bench_audit_log.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+N_CLIENTS = 8
+N_REQUESTS = 400
+SECTORS = ["Families", "Men", "Women", "Youth", "Mixed Adult"]
+CONFIGS = [
+    ("audit off", {"SHELTER_AUDIT": "0"}),
+    ("audit on (drop)", {"SHELTER_AUDIT": "1", "SHELTER_AUDIT_POLICY": "drop"}),
+    ("audit on (block)", {"SHELTER_AUDIT": "1", "SHELTER_AUDIT_POLICY": "block"}),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env_overrides, audit_dir):
+    port = free_port()
+    env = dict(os.environ, SHELTER_AUDIT_DIR=audit_dir, **env_overrides)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "web_app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    while True:
+        try:
+            if requests.get(f"{base_url}/api/ready", timeout=1).status_code == 200:
+                return server, base_url
+        except requests.ConnectionError:
+            if server.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+        time.sleep(0.05)
+
+
+def run_load(base_url):
+    session_pool = [requests.Session() for _ in range(N_CLIENTS)]
+
+    def one_request(i):
+        payload = {"date": "2025-12-25", "sector": SECTORS[i % len(SECTORS)], "min_temp_celsius": -(i % 30)}
+        start = time.perf_counter()
+        response = session_pool[i % N_CLIENTS].post(f"{base_url}/api/predict", json=payload, timeout=30)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=N_CLIENTS) as executor:
+        results = list(executor.map(one_request, range(N_REQUESTS)))
+    wall_seconds = time.perf_counter() - start
+    latencies = np.array([ms for ms, status in results if status == 200])
+    return latencies, wall_seconds, sum(status != 200 for _, status in results)
+
+
+print("=" * 80)
+print("AUDIT LOG LATENCY BENCHMARK")
+print("=" * 80)
+print(f"\n{N_REQUESTS} requests from {N_CLIENTS} concurrent clients per configuration")
+
+for label, env_overrides in CONFIGS:
+    with tempfile.TemporaryDirectory() as audit_dir:
+        server, base_url = start_server(env_overrides, audit_dir)
+        try:
+            latencies, wall_seconds, failed = run_load(base_url)
+            audit = requests.get(f"{base_url}/api/metrics", timeout=5).json()["audit"]
+        finally:
+            server.terminate()
+            server.wait()
+        written_files = list(Path(audit_dir).glob("audit-*.jsonl.gz"))
+
+    print(f"\n{label}")
+    print(f"  throughput:   {len(latencies) / wall_seconds:8.1f} req/s  ({failed} non-200)")
+    print(f"  latency p50:  {np.percentile(latencies, 50):8.2f} ms")
+    print(f"  latency p95:  {np.percentile(latencies, 95):8.2f} ms")
+    print(f"  latency p99:  {np.percentile(latencies, 99):8.2f} ms")
+    if audit["enabled"]:
+        print(f"  audit: {audit['logged']} logged, {audit['dropped']} dropped, "
+              f"{audit['written']} written before shutdown, {len(written_files)} file(s)")
@@ -0,0 +1,92 @@
+"""
+Benchmark: joblib pickle vs compact .npz + JSON model artifact.
+
+Compares file size, load time, prediction parity and batch prediction latency of
+the two formats written by mlmodel.py. Run from the project root after training:
+
+    python benchmarks/bench_model_artifact.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from web_app.main import load_compact_artifact, MODEL_PATH, COMPACT_MODEL_PATH, COMPACT_MANIFEST_PATH
+
+N_LOADS = 20
+N_ROWS = 1000
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+MIN_SECONDS_PER_SIZE = 0.5
+
+
+def time_loads(load_fn, n=N_LOADS):
+    load_fn()  # warm the OS file cache
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        load_fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000, np.min(timings) * 1000
+
+
+def time_predictions(predict_fn, X):
+    """Median milliseconds per call, repeating for at least MIN_SECONDS_PER_SIZE"""
+    predict_fn(X)
+    timings = []
+    deadline = time.perf_counter() + MIN_SECONDS_PER_SIZE
+    while time.perf_counter() < deadline or len(timings) < 3:
+        start = time.perf_counter()
+        predict_fn(X)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+print("=" * 80)
+print("MODEL ARTIFACT BENCHMARK")
+print("=" * 80)
+
+joblib_size = MODEL_PATH.stat().st_size
+compact_size = COMPACT_MODEL_PATH.stat().st_size + COMPACT_MANIFEST_PATH.stat().st_size
+print("\nArtifact size")
+print(f"  joblib:  {joblib_size / 1024:8.1f} KB")
+print(f"  compact: {compact_size / 1024:8.1f} KB  ({compact_size / joblib_size:.0%} of joblib)")
+
+joblib_median, joblib_min = time_loads(lambda: joblib.load(str(MODEL_PATH)))
+compact_median, compact_min = time_loads(lambda: load_compact_artifact(COMPACT_MODEL_PATH, COMPACT_MANIFEST_PATH))
+print(f"\nLoad time over {N_LOADS} loads (median / min)")
+print(f"  joblib:  {joblib_median:8.2f} ms / {joblib_min:.2f} ms")
+print(f"  compact: {compact_median:8.2f} ms / {compact_min:.2f} ms")
+
+# Prediction parity on rows scattered around the training means
+pipeline = joblib.load(str(MODEL_PATH))
+compact = load_compact_artifact(COMPACT_MODEL_PATH, COMPACT_MANIFEST_PATH)
+columns = pipeline['feature_columns']
+means = np.array([pipeline['X_numeric_mean'].get(col, 0.5) for col in columns], dtype=np.float64)
+rng = np.random.default_rng(0)
+X = means * rng.uniform(0.5, 1.5, size=(N_ROWS, len(columns)))
+X[rng.uniform(size=X.shape) < 0.02] = np.nan  # exercise the missing-value branches
+
+sklearn_pred = pipeline['model'].predict(pd.DataFrame(X, columns=columns))
+compact_pred = compact['model'].predict(X)
+max_diff = np.max(np.abs(sklearn_pred - compact_pred))
+print(f"\nPrediction parity over {N_ROWS} rows")
+print(f"  max |sklearn - compact|: {max_diff:.2e}")
+print("  ✓ Predictions match" if max_diff < 1e-6 else "  ✗ Predictions differ")
+
+# Batch prediction latency (the web app serves the compact model)
+sklearn_model = pipeline['model']
+compact_model = compact['model']
+print(f"\nPrediction latency, median ms per call (≥ {MIN_SECONDS_PER_SIZE}s per size)")
+print(f"  {'rows':>6}  {'sklearn':>10}  {'compact':>10}  {'ratio':>6}")
+for size in BATCH_SIZES:
+    X_batch = means * rng.uniform(0.5, 1.5, size=(size, len(columns)))
+    frame = pd.DataFrame(X_batch, columns=columns)
+    sklearn_ms = time_predictions(lambda _: sklearn_model.predict(frame), X_batch)
+    compact_ms = time_predictions(compact_model.predict, X_batch)
+    print(f"  {size:>6}  {sklearn_ms:>10.3f}  {compact_ms:>10.3f}  {compact_ms / sklearn_ms:>5.2f}x")
@@ -0,0 +1,367 @@
+"""
+Performance regression suite: latency and memory budgets for the serving and training paths.
+
+Every case is timed the same way: a few warm-up calls, then `--repeats` samples of
+enough back-to-back calls to last at least 10 ms each, reported as the median and p95
+per call. Peak memory is measured on one extra call with tracemalloc (numpy buffers
+included), apart from the app import, which reports the importing process's peak RSS.
+
+    app_import            import web_app.main in a fresh interpreter (model load included)
+    load_compact          load_compact_artifact on the .npz + JSON model
+    load_joblib           joblib.load of the pickled pipeline
+    predict_single        get_live_prediction for one date and sector
+    predict_batch_N       predict_frame on a prebuilt frame of N rows
+    *_fast                the same on the distilled fast tier (mlmodel.py --fast-tier)
+    feature_engineering   mlmodel.build_features on synthetic raw data (5 sectors x 3 years)
+
+The prediction cases call the app's own functions instead of re-implementing them.
+A case fails when its median or peak memory exceeds the budget in
+benchmarks/perf_budgets.json, or when it is slower (or larger) than the stored
+baseline by more than the tolerance. The script exits with status 1 on any failure,
+so it can gate a deploy. Baselines depend on the machine: record one with
+--update-baseline on the machine that runs the checks. Run from the project root
+after training:
+
+    python benchmarks/bench_regression.py                      # check budgets and baseline
+    python benchmarks/bench_regression.py --update-baseline    # store this run as the baseline
+    python benchmarks/bench_regression.py --cases predict      # only cases starting with 'predict'
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+BUDGETS_PATH = Path(__file__).resolve().parent / 'perf_budgets.json'
+BASELINE_PATH = Path(__file__).resolve().parent / 'perf_baseline.json'
+
+BATCH_SIZES = (10, 100, 1000, 10000)
+FAST_TIER_BATCH_SIZE = 1000
+MIN_SAMPLE_SECONDS = 0.01
+MIN_MEMORY_REGRESSION_MB = 0.5  # smaller growth vs the baseline is allocator noise
+SYNTHETIC_DAYS = 3 * 365
+SYNTHETIC_SECTORS = ["Families", "Men", "Women", "Youth", "Mixed Adult"]
+
+IMPORT_SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+import web_app.main
+seconds = time.perf_counter() - start
+try:
+    import resource
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_kb /= 1024
+except ImportError:
+    peak_kb = None
+print(json.dumps({"seconds": seconds, "peak_kb": peak_kb}))
+"""
+
+
+# --- Measurement ---
+
+def time_calls(fn, warmup, repeats):
+    """
+    Per-call timings in milliseconds.
+
+    Each of the `repeats` samples runs `fn` enough times (1, 10, 100, ...) to last at
+    least MIN_SAMPLE_SECONDS, so sub-millisecond calls are not dominated by timer noise.
+    """
+    for _ in range(warmup):
+        fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS or number >= 10000:
+            break
+        number *= 10
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1000)
+    return samples
+
+
+def peak_traced_mb(fn):
+    """Peak memory allocated while running `fn` once, in MB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(samples, peak_mb, **extra):
+    return {
+        'median_ms': float(np.median(samples)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'min_ms': float(np.min(samples)),
+        'peak_mb': round(peak_mb, 3) if peak_mb is not None else None,
+        'samples': len(samples),
+        **extra,
+    }
+
+
+# --- Synthetic Data ---
+
+def synthetic_raw_data(n_days=SYNTHETIC_DAYS, sectors=SYNTHETIC_SECTORS, seed=0):
+    """
+    Raw frames shaped like mlmodel.load_data's output (two programs per sector and day).
+
+    Returns:
+        tuple: (df_weather, df_occupancy, df_flow, df_intake)
+    """
+    from mlmodel import WEATHER_FEATURE_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2022-01-01', periods=n_days, freq='D')
+    date_strings = dates.strftime('%Y-%m-%d')
+
+    season = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 15) / 365)
+    min_temp = -5 - 12 * season + rng.normal(0, 4, n_days)
+    df_weather = pd.DataFrame({'Date/Time': date_strings})
+    for col in WEATHER_FEATURE_COLUMNS:
+        df_weather[col] = rng.normal(0, 5, n_days)
+    df_weather['Min Temp (°C)'] = min_temp.round(1)
+    df_weather['Max Temp (°C)'] = (min_temp + 8).round(1)
+    df_weather['Mean Temp (°C)'] = (min_temp + 4).round(1)
+    df_weather['Snow on Grnd (cm)'] = np.where(min_temp < -5, rng.integers(0, 20, n_days), np.nan)
+
+    n_programs = 2 * len(sectors)
+    df_occupancy = pd.DataFrame({
+        'OCCUPANCY_DATE': np.repeat(date_strings, n_programs),
+        'SECTOR': np.tile(np.repeat(sectors, 2), n_days),
+        'SERVICE_USER_COUNT': rng.integers(200, 1500, n_days * n_programs),
+    })
+
+    df_intake = pd.DataFrame({
+        'Date': date_strings,
+        'Total calls handled': rng.integers(200, 600, n_days),
+        'Code 3A - Shelter Space Unavailable - Family': rng.integers(0, 30, n_days),
+        'Code 3B - Shelter Space Unavailable - Individuals/Couples': rng.integers(0, 200, n_days),
+    })
+
+    months = pd.date_range(dates[0], dates[-1], freq='MS')
+    groups = ['All Population', 'Chronic', 'Refugees']
+    df_flow = pd.DataFrame({
+        'date(mmm-yy)': np.repeat(months.strftime('%b-%y'), len(groups)),
+        'population_group': np.tile(groups, len(months)),
+        'actively_homeless': rng.integers(5000, 10000, len(months) * len(groups)),
+        'newly_identified': rng.integers(500, 1500, len(months) * len(groups)),
+        'moved_to_housing': rng.integers(300, 800, len(months) * len(groups)),
+        'population_group_percentage': [f"{p:.1f}%" for p in rng.uniform(10, 100, len(months) * len(groups))],
+    })
+    return df_weather, df_occupancy, df_flow, df_intake
+
+
+# --- Cases ---
+
+def bench_app_import(warmup, repeats):
+    """Times `import web_app.main` in fresh interpreters; peak memory is the child's max RSS."""
+    runs = []
+    for _ in range(warmup + repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT_DIR, env=dict(os.environ, SHELTER_WARMUP='0'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        runs.append(json.loads(output))
+    runs = runs[warmup:]
+    peaks = [run['peak_kb'] for run in runs if run['peak_kb'] is not None]
+    return summarize([run['seconds'] * 1000 for run in runs], max(peaks) / 1024 if peaks else None)
+
+
+def run_cases(selected, warmup, repeats):
+    """
+    Runs every selected case.
+
+    Returns:
+        dict: Case name -> summary, or {'skipped': reason} when a case cannot run here.
+    """
+    def wanted(name):
+        return not selected or any(name.startswith(prefix) for prefix in selected)
+
+    results = {}
+
+    def record(name, fn, n_repeats=repeats, **extra):
+        if not wanted(name):
+            return
+        print(f"  {name} ...", flush=True)
+        samples = time_calls(fn, warmup, n_repeats)
+        results[name] = summarize(samples, peak_traced_mb(fn), **extra)
+
+    if wanted('app_import'):
+        print("  app_import ...", flush=True)
+        results['app_import'] = bench_app_import(warmup=1, repeats=min(repeats, 5))
+
+    import joblib
+    from web_app import main as app
+
+    if wanted('load_compact'):
+        if app.COMPACT_MODEL_PATH.exists() and app.COMPACT_MANIFEST_PATH.exists():
+            record('load_compact', lambda: app.load_compact_artifact(app.COMPACT_MODEL_PATH, app.COMPACT_MANIFEST_PATH))
+        else:
+            results['load_compact'] = {'skipped': 'compact artifact not found'}
+    if wanted('load_joblib'):
+        try:
+            joblib.load(str(app.MODEL_PATH))
+        except Exception as e:
+            results['load_joblib'] = {'skipped': f'joblib model not loadable: {e}'}
+        else:
+            record('load_joblib', lambda: joblib.load(str(app.MODEL_PATH)), n_repeats=min(repeats, 10))
+
+    record('predict_single', lambda: app.get_live_prediction('2025-12-25', 'Men', -10.0))
+
+    sectors = app.active_bundle.sectors
+    rng = np.random.default_rng(0)
+    for size in BATCH_SIZES:
+        name = f'predict_batch_{size}'
+        if not wanted(name):
+            continue
+        row_sectors = np.array(sectors)[rng.integers(len(sectors), size=size)]
+        input_df, _, _ = app.build_feature_frame('2025-12-25', row_sectors, rng.uniform(-25, 10, size))
+        record(name, lambda: app.predict_frame(input_df, row_sectors), rows=size)
+
+    fast_cases = ['predict_single_fast', f'predict_batch_{FAST_TIER_BATCH_SIZE}_fast']
+    if app.active_bundle.fast_pipeline is None:
+        results.update({name: {'skipped': 'no fast tier'} for name in fast_cases if wanted(name)})
+    else:
+        record(fast_cases[0], lambda: app.get_live_prediction('2025-12-25', 'Men', -10.0, tier='fast'))
+        row_sectors = np.array(sectors)[rng.integers(len(sectors), size=FAST_TIER_BATCH_SIZE)]
+        input_df, _, _ = app.build_feature_frame('2025-12-25', row_sectors,
+                                                 rng.uniform(-25, 10, FAST_TIER_BATCH_SIZE))
+        record(fast_cases[1], lambda: app.predict_frame(input_df, row_sectors, 'fast'),
+               rows=FAST_TIER_BATCH_SIZE)
+
+    if wanted('feature_engineering'):
+        from mlmodel import build_features
+        raw = synthetic_raw_data()
+        n_rows = len(raw[1]) // 2
+        # build_features converts date columns in place, so every call gets fresh copies
+        record('feature_engineering', lambda: build_features(*(df.copy() for df in raw)),
+               n_repeats=min(repeats, 10), rows=n_rows)
+
+    return results
+
+
+# --- Budgets and Baseline ---
+
+def load_json(path):
+    if not Path(path).exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_case(name, result, budget, baseline, tolerance):
+    """
+    Compares one result with its absolute budget and the stored baseline.
+
+    Returns:
+        list: Failure messages (empty when the case passes).
+    """
+    failures = []
+    budget = budget or {}
+    for key, unit in (('median_ms', 'ms'), ('peak_mb', 'MB')):
+        value = result.get(key)
+        if value is None:
+            continue
+        limit = budget.get(key)
+        if limit is not None and value > limit:
+            failures.append(f"{key} {value:.3f} {unit} exceeds budget {limit} {unit}")
+        reference = (baseline or {}).get(key)
+        if key == 'peak_mb' and reference is not None and value - reference < MIN_MEMORY_REGRESSION_MB:
+            continue
+        if reference and value > reference * (1 + tolerance):
+            failures.append(f"{key} {value:.3f} {unit} is {value / reference - 1:.0%} above baseline "
+                            f"{reference:.3f} {unit} (tolerance {tolerance:.0%})")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latency and memory regression checks for the demand model.")
+    parser.add_argument('--cases', nargs='+', default=None, help="Only run cases whose name starts with these prefixes")
+    parser.add_argument('--repeats', type=int, default=20, help="Timed samples per case (default: 20)")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before sampling (default: 3)")
+    parser.add_argument('--budgets', default=str(BUDGETS_PATH), help="Budget file (default: benchmarks/perf_budgets.json)")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="Baseline file (default: benchmarks/perf_baseline.json)")
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help="Allowed slowdown vs the baseline, e.g. 0.25 for 25%% "
+                             "(default: SHELTER_PERF_TOLERANCE or the budget file's value)")
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run as the new baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    budgets = load_json(args.budgets) or {}
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = float(os.environ.get('SHELTER_PERF_TOLERANCE', budgets.get('tolerance', 0.25)))
+    baseline = None if args.update_baseline else load_json(args.baseline)
+
+    print("=" * 80)
+    print("PERFORMANCE REGRESSION SUITE")
+    print("=" * 80)
+    results = run_cases(args.cases, args.warmup, args.repeats)
+
+    print(f"\n{'case':<22}{'median ms':>12}{'p95 ms':>12}{'peak MB':>10}  status")
+    failed = []
+    for name, result in results.items():
+        if 'skipped' in result:
+            print(f"{name:<22}{'':>34}  - skipped ({result['skipped']})")
+            continue
+        failures = check_case(name, result, budgets.get('cases', {}).get(name),
+                              (baseline or {}).get('results', {}).get(name), tolerance)
+        peak = f"{result['peak_mb']:.2f}" if result['peak_mb'] is not None else "-"
+        print(f"{name:<22}{result['median_ms']:>12.3f}{result['p95_ms']:>12.3f}{peak:>10}  "
+              f"{'✗ FAIL' if failures else '✓'}")
+        for message in failures:
+            print(f"    {message}")
+        if failures:
+            failed.append(name)
+
+    if baseline is None and not args.update_baseline:
+        print(f"\n⚠ No baseline at {args.baseline}; only absolute budgets were checked "
+              f"(record one with --update-baseline)")
+
+    if args.update_baseline:
+        measured = {name: result for name, result in results.items() if 'skipped' not in result}
+        stored = load_json(args.baseline) or {}
+        if args.cases:
+            measured = {**stored.get('results', {}), **measured}
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'results': measured,
+            }, f, indent=4)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+
+    if failed:
+        print(f"\n✗ {len(failed)} case(s) over budget: {', '.join(failed)}")
+        return 1
+    print("\n✓ All cases within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+"""
+Autotune: best native thread count for a given prediction batch size.
+
+Scores `--batch-size` rows with the model the web app loads (the compact artifact
+when present) at every candidate thread count, optionally from `--concurrency`
+threads at once to mimic several requests in flight, and reports median and p95
+latency. The winner is printed as the SHELTER_THREADS_* setting to use. The compact
+model is plain numpy and does not use native threads, so the setting only matters
+for sklearn models: the joblib artifact (`--joblib`) and the sharded models. Run from
+the project root after training:
+
+    python benchmarks/bench_thread_tuning.py --batch-size 1 --concurrency 4
+    python benchmarks/bench_thread_tuning.py --batch-size 280 --joblib
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import ThreadpoolController
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import thread_config
+from web_app.main import active_bundle, CompactTreeEnsemble, MODEL_PATH
+
+
+def candidate_thread_counts(max_threads):
+    counts = {1, max_threads}
+    n = 2
+    while n < max_threads:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+def time_predictions(controller, model, X, n_threads, concurrency, repeats):
+    """Latencies (ms) of `repeats` predict calls per concurrent caller, each limited to `n_threads`."""
+    def caller(_):
+        timings = []
+        with controller.limit(limits=n_threads):
+            model.predict(X)  # warm up this thread
+            for _ in range(repeats):
+                start = time.perf_counter()
+                model.predict(X)
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return np.concatenate(list(executor.map(caller, range(concurrency))))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find the best native thread count for a batch size.")
+    parser.add_argument('--batch-size', type=int, default=1, help="Rows per predict call (default: 1)")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="Predict calls in flight at once, e.g. the API's SHELTER_MAX_CONCURRENCY (default: 1)")
+    parser.add_argument('--repeats', type=int, default=50, help="Timed calls per caller and setting (default: 50)")
+    parser.add_argument('--max-threads', type=int, default=None,
+                        help="Largest thread count tried (default: available CPUs)")
+    parser.add_argument('--joblib', action='store_true',
+                        help="Time the sklearn joblib model instead of the model the web app loads")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.joblib:
+        pipeline, model_format = joblib.load(str(MODEL_PATH)), "joblib"
+    else:
+        pipeline, model_format = active_bundle.pipeline, active_bundle.format
+    columns = pipeline['feature_columns']
+    means = np.array([pipeline['X_numeric_mean'].get(col, 0.5) for col in columns], dtype=np.float64)
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(means * rng.uniform(0.5, 1.5, size=(args.batch_size, len(columns))), columns=columns)
+
+    max_threads = args.max_threads or thread_config.available_cpus()
+    print("=" * 80)
+    print("NATIVE THREAD AUTOTUNE")
+    print("=" * 80)
+    print(f"\n{model_format} model, batch size {args.batch_size}, concurrency {args.concurrency}, "
+          f"{thread_config.available_cpus()} CPU(s) available")
+    if isinstance(pipeline['model'], CompactTreeEnsemble):
+        print("The compact model runs in numpy on the calling thread, so the thread count should "
+              "not change its latency\n(the served predict path applies no limit). Use --joblib "
+              "to tune for the sklearn models.")
+    print(f"\n  {'threads':>7}  {'median ms':>10}  {'p95 ms':>10}")
+
+    controller = ThreadpoolController()
+    results = {}
+    for n_threads in candidate_thread_counts(max_threads):
+        timings = time_predictions(controller, pipeline['model'], X, n_threads, args.concurrency, args.repeats)
+        results[n_threads] = (np.median(timings), np.percentile(timings, 95))
+        print(f"  {n_threads:>7}  {results[n_threads][0]:>10.3f}  {results[n_threads][1]:>10.3f}")
+
+    # Tail latency is what oversubscription hurts, so rank by p95
+    best = min(results, key=lambda n: results[n][1])
+    mode = 'single' if args.batch_size == 1 else 'batch'
+    print(f"\n✓ Best: {best} thread(s) (p95 {results[best][1]:.3f} ms)")
+    if isinstance(pipeline['model'], CompactTreeEnsemble):
+        print(f"  No SHELTER_THREADS_{mode.upper()} setting needed for the compact model")
+    else:
+        print(f"  Suggested setting: SHELTER_THREADS_{mode.upper()}={best}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""
+Benchmark: first-request latency after a cold start, with and without warm-up.
+
+Starts the API in a fresh uvicorn process for each run (SHELTER_WARMUP=1 / 0), waits
+until it accepts connections, then times the first and a few following
+/api/predict calls. Run from the project root after training:
+
+    python benchmarks/bench_warmup.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+N_RUNS = 5
+N_FOLLOWUP = 20
+SECTORS = ["Families", "Men", "Women", "Youth", "Mixed Adult"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(warmup):
+    """Returns (startup seconds, first request ms, median follow-up ms) for one fresh server"""
+    port = free_port()
+    env = dict(os.environ, SHELTER_WARMUP="1" if warmup else "0")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "web_app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        while True:
+            try:
+                requests.get(f"{base_url}/api/health", timeout=1)
+                break
+            except requests.ConnectionError:
+                if server.poll() is not None:
+                    raise RuntimeError("Server exited during startup")
+                time.sleep(0.02)
+        startup_seconds = time.perf_counter() - start
+
+        timings = []
+        for i in range(1 + N_FOLLOWUP):
+            payload = {"date": "2025-12-25", "sector": SECTORS[i % len(SECTORS)], "min_temp_celsius": -10.0}
+            request_start = time.perf_counter()
+            response = requests.post(f"{base_url}/api/predict", json=payload, timeout=30)
+            timings.append((time.perf_counter() - request_start) * 1000)
+            response.raise_for_status()
+        return startup_seconds, timings[0], float(np.median(timings[1:]))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+print("=" * 80)
+print("COLD-START WARM-UP BENCHMARK")
+print("=" * 80)
+
+results = {}
+for warmup in (False, True):
+    runs = np.array([cold_start(warmup) for _ in range(N_RUNS)])
+    results[warmup] = runs
+    label = "with warm-up" if warmup else "no warm-up"
+    print(f"\n{label} (median over {N_RUNS} cold starts)")
+    print(f"  time until accepting connections: {np.median(runs[:, 0]):8.2f} s")
+    print(f"  first /api/predict:               {np.median(runs[:, 1]):8.2f} ms")
+    print(f"  later /api/predict (median):      {np.median(runs[:, 2]):8.2f} ms")
+
+speedup = np.median(results[False][:, 1]) / np.median(results[True][:, 1])
+print(f"\nFirst request is {speedup:.1f}x faster with warm-up")
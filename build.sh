@@ -5,6 +5,13 @@ echo "Installing dependencies..."
 pip install -r requirements.txt
 
 echo "Training ML model..."
-python mlmodel.py
+python mlmodel.py --fast-tier
+
+# Optional performance gate (SHELTER_PERF_GATE=1): fails the build when latency or memory
+# exceeds benchmarks/perf_budgets.json
+if [ "$SHELTER_PERF_GATE" = "1" ]; then
+    echo "Checking performance budgets..."
+    python benchmarks/bench_regression.py --repeats 10 || exit 1
+fi
 
 echo "Build complete!"
@@ -0,0 +1,212 @@
+"""
+Monte Carlo capacity planning over weather uncertainty.
+
+Each draw replays the season with the weather of a historical analog season: the same
+calendar window in one of the years covered by the observed weather table (built from
+the daily weather CSVs mlmodel.py loads), shifted by up to `jitter_days` days. Whole
+paths are taken from one analog season so cold snaps keep their real length. Model
+error is added per draw, day and sector as Gaussian noise with the model's residual
+standard deviation.
+
+A draw's demand only depends on its analog start, so every distinct start is scored
+once (all days and sectors in large vectorized chunks) and the
+draws x days x sectors demand tensor is gathered from those scores. 10,000 draws of
+a 120-day season for five sectors take seconds instead of scoring six million rows.
+The tensor is held in float32 and capped at MAX_CELLS values (80 MB).
+
+Usage:
+    python capacity_sim.py --start 2025-12-01 --days 120 --draws 10000 \
+        --capacity Men=2600 --capacity Families=3200 --total-capacity 9500
+"""
+import sys
+import json
+import time
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+# draws x days x sectors; with the daily totals and percentile copies, peak memory stays
+# within a few hundred MB
+MAX_CELLS = 20_000_000
+NOISE_CHUNK_DRAWS = 1000
+
+
+def analog_starts(season_start, n_days, table_start_ordinal, table_length, jitter_days=7):
+    """
+    Ordinals of every analog season start fully covered by the weather table.
+
+    Args:
+        season_start (date): First day of the simulated season.
+        n_days (int): Season length in days.
+        table_start_ordinal (int): Ordinal of the weather table's first row.
+        table_length (int): Rows in the weather table.
+        jitter_days (int): Analog starts are shifted by -jitter_days..+jitter_days.
+
+    Returns:
+        np.ndarray: Valid analog start ordinals.
+    """
+    first_year = date.fromordinal(table_start_ordinal).year - 1
+    last_year = date.fromordinal(table_start_ordinal + table_length - 1).year
+    table_end_ordinal = table_start_ordinal + table_length - 1
+    starts = []
+    for year in range(first_year, last_year + 1):
+        try:
+            anchor = season_start.replace(year=year)
+        except ValueError:  # Feb 29 in a non-leap year
+            anchor = season_start.replace(year=year, day=28)
+        for offset in range(-jitter_days, jitter_days + 1):
+            start = anchor.toordinal() + offset
+            if start >= table_start_ordinal and start + n_days - 1 <= table_end_ordinal:
+                starts.append(start)
+    return np.array(starts, dtype=np.int64)
+
+
+def simulate_capacity(score_starts, starts, season_start, n_days, sectors, draws=10000,
+                      capacity=None, total_capacity=None, residual_sd=0.0,
+                      percentiles=DEFAULT_PERCENTILES, seed=None):
+    """
+    Runs the simulation and summarizes the demand distribution.
+
+    Args:
+        score_starts (callable): score_starts(starts) -> array (len(starts), n_days, len(sectors))
+            of predicted demand when the season replays the weather starting at each ordinal.
+        starts (np.ndarray): Analog start ordinals to sample from (see analog_starts).
+        season_start (date): First day of the simulated season.
+        n_days (int): Season length in days.
+        sectors (list): Sectors, in the order score_starts returns them.
+        draws (int): Monte Carlo draws.
+        capacity (dict): Optional beds per sector.
+        total_capacity (float): Optional beds across all simulated sectors.
+        residual_sd (float): Standard deviation of the per-day model error added to each draw.
+        percentiles (tuple): Percentiles reported.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Daily percentiles/mean and exceedance probabilities per sector and in total, plus
+              season peak percentiles, probability of any day over capacity and expected days over.
+              'analog_seasons' counts the jittered analog starts sampled from (up to
+              2 * jitter_days + 1 per year), 'analog_years' the distinct years they come from.
+
+    Raises:
+        ValueError: No analog season fits the weather table, or draws x days x sectors
+            exceeds MAX_CELLS.
+    """
+    if len(starts) == 0:
+        raise ValueError("No historical weather covers this season window")
+    cells = draws * n_days * len(sectors)
+    if cells > MAX_CELLS:
+        raise ValueError(f"draws x days x sectors is {cells:,}, the limit is {MAX_CELLS:,}; "
+                         f"use fewer draws, days or sectors")
+    rng = np.random.default_rng(seed)
+    capacity = capacity or {}
+
+    path_demand = np.asarray(score_starts(starts), dtype=np.float32)
+    chosen = rng.integers(len(starts), size=draws)
+    demand = path_demand[chosen]
+    if residual_sd > 0:
+        # float32 noise, a chunk of draws at a time, so no float64 copy of the tensor is made
+        for first in range(0, draws, NOISE_CHUNK_DRAWS):
+            block = demand[first:first + NOISE_CHUNK_DRAWS]
+            block += np.float32(residual_sd) * rng.standard_normal(block.shape, dtype=np.float32)
+    np.maximum(demand, 0, out=demand)
+
+    scopes = {sector: (demand[:, :, i], capacity.get(sector)) for i, sector in enumerate(sectors)}
+    scopes['total'] = (demand.sum(axis=2), total_capacity)
+
+    daily = {'dates': [(season_start + timedelta(days=d)).isoformat() for d in range(n_days)]}
+    season = {}
+    for scope, (values, beds) in scopes.items():
+        daily_pct = np.percentile(values, percentiles, axis=0)
+        daily[scope] = {'mean': values.mean(axis=0).round(1).tolist()}
+        daily[scope].update({f'p{p:g}': daily_pct[i].round(1).tolist() for i, p in enumerate(percentiles)})
+
+        peak = values.max(axis=1)
+        season[scope] = {f'peak_p{p:g}': float(v) for p, v in zip(percentiles, np.percentile(peak, percentiles).round(1))}
+        if beds is not None:
+            over = values > beds
+            daily[scope]['p_exceed'] = over.mean(axis=0).round(4).tolist()
+            season[scope].update({
+                'capacity': beds,
+                'p_any_day_over': float(over.any(axis=1).mean()),
+                'expected_days_over': float(over.sum(axis=1).mean()),
+            })
+
+    return {
+        'start_date': season_start.isoformat(),
+        'end_date': (season_start + timedelta(days=n_days - 1)).isoformat(),
+        'days': n_days,
+        'draws': draws,
+        'sectors': list(sectors),
+        'analog_seasons': int(len(starts)),
+        # The jittered starts of one year are consecutive days
+        'analog_years': int(1 + np.count_nonzero(np.diff(np.sort(starts)) > 1)),
+        'residual_sd': residual_sd,
+        'percentiles': list(percentiles),
+        'season': season,
+        'daily': daily,
+    }
+
+
+def parse_capacity(values):
+    capacity = {}
+    for item in values or []:
+        sector, _, beds = item.partition('=')
+        if not beds:
+            raise argparse.ArgumentTypeError(f"Capacity must be Sector=beds, got '{item}'")
+        capacity[sector] = float(beds)
+    return capacity
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo shelter capacity simulation over historical weather.")
+    parser.add_argument('--start', required=True, help="First day of the season (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=120, help="Season length in days (default: 120)")
+    parser.add_argument('--draws', type=int, default=10000, help="Monte Carlo draws (default: 10000)")
+    parser.add_argument('--sectors', nargs='+', default=None, help="Sectors to simulate (default: all)")
+    parser.add_argument('--capacity', action='append', metavar='SECTOR=BEDS',
+                        help="Beds available to a sector (repeatable)")
+    parser.add_argument('--total-capacity', type=float, default=None, help="Beds across all simulated sectors")
+    parser.add_argument('--jitter', type=int, default=7, help="Analog season shift in days (default: 7)")
+    parser.add_argument('--residual-sd', type=float, default=None,
+                        help="Daily model error standard deviation (default: from the model's CV MAE)")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--output', default=None, help="Optional JSON path for the full result")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    capacity = parse_capacity(args.capacity)
+
+    # The web app module holds the loaded model, weather tables and feature construction
+    from web_app.main import run_capacity_simulation
+
+    start = time.perf_counter()
+    result = run_capacity_simulation(
+        date.fromisoformat(args.start), args.days, args.draws, sectors=args.sectors,
+        capacity=capacity, total_capacity=args.total_capacity, jitter_days=args.jitter,
+        residual_sd=args.residual_sd, seed=args.seed,
+    )
+    seconds = time.perf_counter() - start
+
+    print(f"\n--- Capacity Simulation {result['start_date']} to {result['end_date']} ---")
+    print(f"{result['draws']} draws over {result['analog_seasons']} analog season starts "
+          f"from {result['analog_years']} years of weather, residual sd {result['residual_sd']:.1f}, {seconds:.1f}s")
+    for scope, stats in result['season'].items():
+        line = f"  {scope:<12} peak p5/p50/p95: " + " / ".join(
+            f"{stats[f'peak_p{p:g}']:.0f}" for p in result['percentiles'])
+        if 'capacity' in stats:
+            line += (f"   capacity {stats['capacity']:.0f}: P(any day over) {stats['p_any_day_over']:.1%}, "
+                     f"expected days over {stats['expected_days_over']:.1f}")
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=4)
+        print(f"\nFull results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,3 @@
+# test_mlmodel.py is a standalone script (python test_mlmodel.py) that exits on failure,
+# so pytest only collects the pytest suites
+collect_ignore = ["test_mlmodel.py"]
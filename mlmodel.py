@@ -1,12 +1,23 @@
 import pandas as pd
 import os
+import sys
+import copy
+import time
+import argparse
+import cProfile
+import contextlib
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import joblib
 import json
+import hashlib
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
+from threadpoolctl import threadpool_limits
+
+import thread_config
 
 # Optional visualization imports
 try:
@@ -27,236 +38,821 @@ occupancy_path = base_data_path / 'Daily Shelter & Overnight Service Occupancy &
 flow_path = base_data_path / 'Toronto Shelter System Flow'
 intake_path = base_data_path / 'Central Intake calls'
 
-# Debug: Print where we're looking for files
-print(f"Looking for files in: {weather_path.resolve()}")
+# Model artifact paths
+MODEL_PATH = BASE_DIR / 'shelter_demand_model.joblib'
+COMPACT_MODEL_PATH = BASE_DIR / 'shelter_demand_model.npz'
+COMPACT_MANIFEST_PATH = BASE_DIR / 'shelter_demand_model.json'
+SHARDED_MODEL_PATH = BASE_DIR / 'shelter_demand_model_sharded.joblib'
+FAST_MODEL_PATH = BASE_DIR / 'shelter_demand_model_fast.npz'
+FAST_MANIFEST_PATH = BASE_DIR / 'shelter_demand_model_fast.json'
+WEATHER_TABLE_PATH = BASE_DIR / 'weather_table.npz'
+WEATHER_FORECAST_PATH = BASE_DIR / 'weather_forecast.npz'
+PROFILE_DIR = BASE_DIR / 'profiles'
+DRIFT_REFERENCE_PATH = BASE_DIR / 'drift_reference.json'
+
+# Weather columns used as model features (shared by training and the serving lookup table)
+WEATHER_FEATURE_COLUMNS = [
+    'Max Temp (°C)', 'Min Temp (°C)', 'Mean Temp (°C)', 'Heat Deg Days (°C)',
+    'Cool Deg Days (°C)', 'Total Precip (mm)', 'Snow on Grnd (cm)'
+]
+
 
-# Check if weather path exists
-if not weather_path.exists():
-    print(f"⚠ Warning: Weather data path not found: {weather_path}")
-    print(f"Contents of {base_data_path}:")
-    if base_data_path.exists():
-        for item in sorted(base_data_path.iterdir()):
-            print(f"  - {item.name}")
-    else:
-        print(f"  ✗ Data folder doesn't exist: {base_data_path}")
+def load_weather_data():
+    """Loads and concatenates every daily weather CSV in the weather data folder."""
+    # Debug: Print where we're looking for files
+    print(f"Looking for files in: {weather_path.resolve()}")
 
-# Load all available weather files dynamically
-weather_files = sorted(weather_path.glob('*.csv')) if weather_path.exists() else []
-print(f"Found {len(weather_files)} weather CSV file(s)")
+    # Check if weather path exists
+    if not weather_path.exists():
+        print(f"⚠ Warning: Weather data path not found: {weather_path}")
+        print(f"Contents of {base_data_path}:")
+        if base_data_path.exists():
+            for item in sorted(base_data_path.iterdir()):
+                print(f"  - {item.name}")
+        else:
+            print(f"  ✗ Data folder doesn't exist: {base_data_path}")
+
+    # Load all available weather files dynamically
+    weather_files = sorted(weather_path.glob('*.csv')) if weather_path.exists() else []
+    print(f"Found {len(weather_files)} weather CSV file(s)")
+
+    weather_dfs = []
+    for file in weather_files:
+        try:
+            print(f"  Loading: {file.name}")
+            weather_dfs.append(pd.read_csv(str(file)))
+        except Exception as e:
+            print(f"  Warning: Could not load {file.name}: {e}")
 
-weather_dfs = []
-for file in weather_files:
-    try:
-        print(f"  Loading: {file.name}")
-        weather_dfs.append(pd.read_csv(str(file)))
-    except Exception as e:
-        print(f"  Warning: Could not load {file.name}: {e}")
+    # Check if we found any weather data
+    if not weather_dfs:
+        raise ValueError(f"No CSV files found in {weather_path.resolve()}. "
+                         f"Please ensure weather data files are in the correct location.")
 
-# Check if we found any weather data
-if not weather_dfs:
-    raise ValueError(f"No CSV files found in {weather_path.resolve()}. "
-                     f"Please ensure weather data files are in the correct location.")
+    df_weather = pd.concat(weather_dfs, ignore_index=True)
+    print(f"[OK] Loaded weather data: {len(df_weather)} rows")
+    return df_weather
 
-df_weather = pd.concat(weather_dfs, ignore_index=True)
-print(f"[OK] Loaded weather data: {len(df_weather)} rows")
 
-# Load other dataframes
-occupancy_file = occupancy_path / 'Daily shelter overnight occupancy.csv'
-flow_file = flow_path / 'toronto-shelter-system-flow.csv'
-intake_file = intake_path / 'Central Intake Call Wrap-Up Codes Data.csv'
+def load_data():
+    """
+    Loads the raw weather, occupancy, flow and intake data.
 
-print(f"Loading occupancy data from: {occupancy_file.name}")
-df_occupancy = pd.read_csv(str(occupancy_file))
-print(f"[OK] Loaded occupancy data: {len(df_occupancy)} rows")
+    Returns:
+        tuple: (df_weather, df_occupancy, df_flow, df_intake) as read from disk.
+    """
+    df_weather = load_weather_data()
 
-print(f"Loading flow data from: {flow_file.name}")
-df_flow = pd.read_csv(str(flow_file))
-print(f"[OK] Loaded flow data: {len(df_flow)} rows")
+    # Load other dataframes
+    occupancy_file = occupancy_path / 'Daily shelter overnight occupancy.csv'
+    flow_file = flow_path / 'toronto-shelter-system-flow.csv'
+    intake_file = intake_path / 'Central Intake Call Wrap-Up Codes Data.csv'
 
-print(f"Loading intake data from: {intake_file.name}")
-df_intake = pd.read_csv(str(intake_file))
-print(f"[OK] Loaded intake data: {len(df_intake)} rows")
+    print(f"Loading occupancy data from: {occupancy_file.name}")
+    df_occupancy = pd.read_csv(str(occupancy_file))
+    print(f"[OK] Loaded occupancy data: {len(df_occupancy)} rows")
 
-# --- Data Merging and Preprocessing ---
-# 1. Convert and rename date columns to 'DATE'
-df_occupancy['OCCUPANCY_DATE'] = pd.to_datetime(df_occupancy['OCCUPANCY_DATE'])
-df_occupancy = df_occupancy.rename(columns={'OCCUPANCY_DATE': 'DATE'})
+    print(f"Loading flow data from: {flow_file.name}")
+    df_flow = pd.read_csv(str(flow_file))
+    print(f"[OK] Loaded flow data: {len(df_flow)} rows")
 
-df_intake['Date'] = pd.to_datetime(df_intake['Date'])
-df_intake = df_intake.rename(columns={'Date': 'DATE'})
+    print(f"Loading intake data from: {intake_file.name}")
+    df_intake = pd.read_csv(str(intake_file))
+    print(f"[OK] Loaded intake data: {len(df_intake)} rows")
 
-df_weather['Date/Time'] = pd.to_datetime(df_weather['Date/Time'])
-df_weather = df_weather.rename(columns={'Date/Time': 'DATE'})
+    return df_weather, df_occupancy, df_flow, df_intake
 
-# 2. Convert and rename df_flow date column to 'DATE' (first day of month)
-df_flow['DATE'] = pd.to_datetime(df_flow['date(mmm-yy)'], format='%b-%y').dt.to_period('M').dt.start_time
-df_flow = df_flow.drop(columns=['date(mmm-yy)'])
 
-# 3. Group df_occupancy by 'DATE' and 'SECTOR' and sum 'SERVICE_USER_COUNT'
-df_occupancy_daily_sector = df_occupancy.groupby(['DATE', 'SECTOR'])['SERVICE_USER_COUNT'].sum().reset_index()
+def build_features(df_weather, df_occupancy, df_flow, df_intake):
+    """
+    Merges the raw data into one row per (DATE, SECTOR) and engineers the model features.
 
-# 4. Group df_intake by 'DATE' and sum relevant columns
-df_intake_daily = df_intake.groupby('DATE')[['Total calls handled', 'Code 3A - Shelter Space Unavailable - Family', 'Code 3B - Shelter Space Unavailable - Individuals/Couples']].sum().reset_index()
+    Returns:
+        pd.DataFrame: Feature frame with 'DATE', one-hot 'SECTOR_*' columns and the 'True Demand' target.
+    """
+    # --- Data Merging and Preprocessing ---
+    # 1. Convert and rename date columns to 'DATE'
+    df_occupancy['OCCUPANCY_DATE'] = pd.to_datetime(df_occupancy['OCCUPANCY_DATE'])
+    df_occupancy = df_occupancy.rename(columns={'OCCUPANCY_DATE': 'DATE'})
+
+    df_intake['Date'] = pd.to_datetime(df_intake['Date'])
+    df_intake = df_intake.rename(columns={'Date': 'DATE'})
+
+    df_weather['Date/Time'] = pd.to_datetime(df_weather['Date/Time'])
+    df_weather = df_weather.rename(columns={'Date/Time': 'DATE'})
+
+    # 2. Convert and rename df_flow date column to 'DATE' (first day of month)
+    df_flow['DATE'] = pd.to_datetime(df_flow['date(mmm-yy)'], format='%b-%y').dt.to_period('M').dt.start_time
+    df_flow = df_flow.drop(columns=['date(mmm-yy)'])
+
+    # 3. Group df_occupancy by 'DATE' and 'SECTOR' and sum 'SERVICE_USER_COUNT'
+    df_occupancy_daily_sector = df_occupancy.groupby(['DATE', 'SECTOR'])['SERVICE_USER_COUNT'].sum().reset_index()
+
+    # 4. Group df_intake by 'DATE' and sum relevant columns
+    df_intake_daily = df_intake.groupby('DATE')[['Total calls handled', 'Code 3A - Shelter Space Unavailable - Family', 'Code 3B - Shelter Space Unavailable - Individuals/Couples']].sum().reset_index()
+
+    # Refine df_flow to be monthly totals, assuming 'All Population' is most relevant
+    df_flow_all_pop = df_flow[df_flow['population_group'] == 'All Population'].copy()
+    df_flow_all_pop.drop(columns=['population_group'], inplace=True)
+
+    # 5. Left merge df_occupancy_daily_sector with df_intake_daily on 'DATE'
+    merged_df = pd.merge(df_occupancy_daily_sector, df_intake_daily, on='DATE', how='left')
+
+    # 6. Left merge merged_df with df_weather on 'DATE'
+    merged_df = pd.merge(merged_df, df_weather, on='DATE', how='left')
+
+    # 7. Left merge current merged_df with df_flow_all_pop on 'DATE'
+    merged_df = pd.merge(merged_df, df_flow_all_pop, on='DATE', how='left')
+
+    # 8. Sort merged_df by the 'DATE' column in ascending order
+    merged_df = merged_df.sort_values(by='DATE').reset_index(drop=True)
+
+    # 9. Convert 'population_group_percentage' column to numeric BEFORE ffill
+    merged_df['population_group_percentage'] = merged_df['population_group_percentage'].str.replace('%', '', regex=False)
+    merged_df['population_group_percentage'] = pd.to_numeric(merged_df['population_group_percentage'], errors='coerce') / 100
+
+    # Identify numerical columns for ffill
+    flow_cols_for_ffill_from_all_pop_inclusive = [col for col in df_flow_all_pop.columns if col != 'DATE']
+    intake_cols_for_ffill = ['Total calls handled', 'Code 3A - Shelter Space Unavailable - Family', 'Code 3B - Shelter Space Unavailable - Individuals/Couples']
+    weather_numeric_cols_for_ffill = WEATHER_FEATURE_COLUMNS
+
+    # Apply ffill to the identified columns, grouped by 'SECTOR'
+    for col in flow_cols_for_ffill_from_all_pop_inclusive:
+        if col in merged_df.columns:
+            merged_df[col] = merged_df.groupby('SECTOR')[col].ffill()
+
+    for col in intake_cols_for_ffill:
+        if col in merged_df.columns:
+            merged_df[col] = merged_df.groupby('SECTOR')[col].ffill()
+
+    for col in weather_numeric_cols_for_ffill:
+        if col in merged_df.columns:
+            merged_df[col] = merged_df.groupby('SECTOR')[col].ffill()
+
+    # Fill any remaining NaNs in numerical columns with 0
+    for col in intake_cols_for_ffill:
+        if col in merged_df.columns:
+            merged_df[col] = merged_df[col].fillna(0)
+
+    if 'Snow on Grnd (cm)' in merged_df.columns:
+        merged_df['Snow on Grnd (cm)'] = merged_df['Snow on Grnd (cm)'].fillna(0)
+
+    # Drop highly sparse columns, irrelevant flag columns, and constant/redundant identifier columns
+    columns_to_drop = [
+        'Data Quality', 'Max Temp Flag', 'Min Temp Flag', 'Mean Temp Flag',
+        'Heat Deg Days Flag', 'Cool Deg Days Flag', 'Total Rain (mm)',
+        'Total Rain Flag', 'Total Snow (cm)', 'Total Snow Flag', 'Total Precip Flag',
+        'Snow on Grnd Flag', 'Dir of Max Gust (10s deg)', 'Spd of Max Gust (km/h)',
+        'Dir of Max Gust Flag', 'Spd of Max Gust Flag',
+        '_id', 'Longitude (x)', 'Latitude (y)', 'Station Name', 'Climate ID',
+        'Year', 'Month', 'Day'
+    ]
+    existing_columns_to_drop = [col for col in columns_to_drop if col in merged_df.columns]
+    merged_df.drop(columns=existing_columns_to_drop, inplace=True)
+
+    # --- Truth-Centered Feature Engineering ---
+    merged_df = merged_df.sort_values(by=['DATE', 'SECTOR']).reset_index(drop=True)
+
+    # Time-series lags for occupancy
+    merged_df['occupancy_7day_rolling_avg'] = merged_df.groupby('SECTOR')['SERVICE_USER_COUNT'].transform(lambda x: x.rolling(window=7, min_periods=1).mean())
+    merged_df['occupancy_30day_rolling_avg'] = merged_df.groupby('SECTOR')['SERVICE_USER_COUNT'].transform(lambda x: x.rolling(window=30, min_periods=1).mean())
+
+    # Date-based features
+    merged_df['day_of_week'] = merged_df['DATE'].dt.dayofweek
+    merged_df['day_of_month'] = merged_df['DATE'].dt.day
+    merged_df['month'] = merged_df['DATE'].dt.month
+    merged_df['year'] = merged_df['DATE'].dt.year
+    merged_df['week_of_year'] = merged_df['DATE'].dt.isocalendar().week.astype(int)
+    merged_df['day_of_year'] = merged_df['DATE'].dt.dayofyear
+
+    # Economic features (payday cycles)
+    merged_df['is_payday'] = ((merged_df['DATE'].dt.day == 1) | (merged_df['DATE'].dt.day == 15)).astype(int)
+
+    # Environmental features (Extreme Cold Alerts)
+    if 'Min Temp (°C)' in merged_df.columns:
+        merged_df['extreme_cold_alert'] = (merged_df['Min Temp (°C)'] < -15).astype(int)
+    else:
+        merged_df['extreme_cold_alert'] = 0
 
-# Refine df_flow to be monthly totals, assuming 'All Population' is most relevant
-df_flow_all_pop = df_flow[df_flow['population_group'] == 'All Population'].copy()
-df_flow_all_pop.drop(columns=['population_group'], inplace=True)
+    # Encode 'SECTOR' category
+    one_hot_encoded_sector = pd.get_dummies(merged_df['SECTOR'], prefix='SECTOR')
+    merged_df = pd.concat([merged_df, one_hot_encoded_sector], axis=1)
+    merged_df = merged_df.drop('SECTOR', axis=1)
 
-# 5. Left merge df_occupancy_daily_sector with df_intake_daily on 'DATE'
-merged_df = pd.merge(df_occupancy_daily_sector, df_intake_daily, on='DATE', how='left')
+    # --- Define Target and Model Setup ---
+    merged_df['True Demand'] = merged_df['SERVICE_USER_COUNT'] + \
+                              merged_df['Code 3A - Shelter Space Unavailable - Family'] + \
+                              merged_df['Code 3B - Shelter Space Unavailable - Individuals/Couples']
 
-# 6. Left merge merged_df with df_weather on 'DATE'
-merged_df = pd.merge(merged_df, df_weather, on='DATE', how='left')
+    merged_df.drop(columns=[
+        'SERVICE_USER_COUNT',
+        'Code 3A - Shelter Space Unavailable - Family',
+        'Code 3B - Shelter Space Unavailable - Individuals/Couples'
+    ], inplace=True)
 
-# 7. Left merge current merged_df with df_flow_all_pop on 'DATE'
-merged_df = pd.merge(merged_df, df_flow_all_pop, on='DATE', how='left')
+    return merged_df
 
-# 8. Sort merged_df by the 'DATE' column in ascending order
-merged_df = merged_df.sort_values(by='DATE').reset_index(drop=True)
 
-# 9. Convert 'population_group_percentage' column to numeric BEFORE ffill
-merged_df['population_group_percentage'] = merged_df['population_group_percentage'].str.replace('%', '', regex=False)
-merged_df['population_group_percentage'] = pd.to_numeric(merged_df['population_group_percentage'], errors='coerce') / 100
+def train_model(X, y, dates=None, n_splits=5, splits=None):
+    """
+    Runs TimeSeriesSplit cross-validation and keeps the last fold's model for export.
 
-# Identify numerical columns for ffill
-flow_cols_for_ffill_from_all_pop_inclusive = [col for col in df_flow_all_pop.columns if col != 'DATE']
-intake_cols_for_ffill = ['Total calls handled', 'Code 3A - Shelter Space Unavailable - Family', 'Code 3B - Shelter Space Unavailable - Individuals/Couples']
-weather_numeric_cols_for_ffill = [
-    'Max Temp (°C)', 'Min Temp (°C)', 'Mean Temp (°C)', 'Heat Deg Days (°C)',
-    'Cool Deg Days (°C)', 'Total Precip (mm)', 'Snow on Grnd (cm)'
-]
+    Args:
+        X (pd.DataFrame): Feature matrix sorted by date.
+        y (pd.Series): 'True Demand' target aligned with X.
+        dates (pd.Series): Dates aligned with X, used to label the last validation fold.
+        n_splits (int): Number of TimeSeriesSplit folds.
+        splits (list): Precomputed (train_index, val_index) pairs used instead of the
+            TimeSeriesSplit folds; folds with no training or validation rows are skipped
+            (their fold_predictions entry is empty).
 
-# Apply ffill to the identified columns, grouped by 'SECTOR'
-for col in flow_cols_for_ffill_from_all_pop_inclusive:
-    if col in merged_df.columns:
-        merged_df[col] = merged_df.groupby('SECTOR')[col].ffill()
-
-for col in intake_cols_for_ffill:
-    if col in merged_df.columns:
-        merged_df[col] = merged_df.groupby('SECTOR')[col].ffill()
-
-for col in weather_numeric_cols_for_ffill:
-    if col in merged_df.columns:
-        merged_df[col] = merged_df.groupby('SECTOR')[col].ffill()
-
-# Fill any remaining NaNs in numerical columns with 0
-for col in intake_cols_for_ffill:
-    if col in merged_df.columns:
-        merged_df[col] = merged_df[col].fillna(0)
-
-if 'Snow on Grnd (cm)' in merged_df.columns:
-    merged_df['Snow on Grnd (cm)'] = merged_df['Snow on Grnd (cm)'].fillna(0)
-
-# Drop highly sparse columns, irrelevant flag columns, and constant/redundant identifier columns
-columns_to_drop = [
-    'Data Quality', 'Max Temp Flag', 'Min Temp Flag', 'Mean Temp Flag',
-    'Heat Deg Days Flag', 'Cool Deg Days Flag', 'Total Rain (mm)',
-    'Total Rain Flag', 'Total Snow (cm)', 'Total Snow Flag', 'Total Precip Flag',
-    'Snow on Grnd Flag', 'Dir of Max Gust (10s deg)', 'Spd of Max Gust (km/h)',
-    'Dir of Max Gust Flag', 'Spd of Max Gust Flag',
-    '_id', 'Longitude (x)', 'Latitude (y)', 'Station Name', 'Climate ID',
-    'Year', 'Month', 'Day'
-]
-existing_columns_to_drop = [col for col in columns_to_drop if col in merged_df.columns]
-merged_df.drop(columns=existing_columns_to_drop, inplace=True)
-
-# --- Truth-Centered Feature Engineering ---
-merged_df = merged_df.sort_values(by=['DATE', 'SECTOR']).reset_index(drop=True)
-
-# Time-series lags for occupancy
-merged_df['occupancy_7day_rolling_avg'] = merged_df.groupby('SECTOR')['SERVICE_USER_COUNT'].transform(lambda x: x.rolling(window=7, min_periods=1).mean())
-merged_df['occupancy_30day_rolling_avg'] = merged_df.groupby('SECTOR')['SERVICE_USER_COUNT'].transform(lambda x: x.rolling(window=30, min_periods=1).mean())
-
-# Date-based features
-merged_df['day_of_week'] = merged_df['DATE'].dt.dayofweek
-merged_df['day_of_month'] = merged_df['DATE'].dt.day
-merged_df['month'] = merged_df['DATE'].dt.month
-merged_df['year'] = merged_df['DATE'].dt.year
-merged_df['week_of_year'] = merged_df['DATE'].dt.isocalendar().week.astype(int)
-merged_df['day_of_year'] = merged_df['DATE'].dt.dayofyear
-
-# Economic features (payday cycles)
-merged_df['is_payday'] = ((merged_df['DATE'].dt.day == 1) | (merged_df['DATE'].dt.day == 15)).astype(int)
-
-# Environmental features (Extreme Cold Alerts)
-if 'Min Temp (°C)' in merged_df.columns:
-    merged_df['extreme_cold_alert'] = (merged_df['Min Temp (°C)'] < -15).astype(int)
-else:
-    merged_df['extreme_cold_alert'] = 0
-
-# Encode 'SECTOR' category
-one_hot_encoded_sector = pd.get_dummies(merged_df['SECTOR'], prefix='SECTOR')
-merged_df = pd.concat([merged_df, one_hot_encoded_sector], axis=1)
-merged_df = merged_df.drop('SECTOR', axis=1)
-
-# --- Define Target and Model Setup ---
-merged_df['True Demand'] = merged_df['SERVICE_USER_COUNT'] + \
-                          merged_df['Code 3A - Shelter Space Unavailable - Family'] + \
-                          merged_df['Code 3B - Shelter Space Unavailable - Individuals/Couples']
-
-merged_df.drop(columns=[
-    'SERVICE_USER_COUNT',
-    'Code 3A - Shelter Space Unavailable - Family',
-    'Code 3B - Shelter Space Unavailable - Individuals/Couples'
-], inplace=True)
-
-y = merged_df['True Demand']
-X = merged_df.drop(columns=['True Demand', 'DATE'])
-
-# Store dates for plotting
-dates_for_plotting = merged_df['DATE'].copy()
-
-# --- Model Training and Validation ---
-tscv = TimeSeriesSplit(n_splits=5)
-mae_scores = []
-r2_scores = [] # Added for R^2 scores
-
-# To ensure 'model' is defined for the export step, we'll train it here and assign the last fold's model
-model = None # Initialize model to None
-
-# Store results for plotting
-last_fold_y_val = None
-last_fold_y_pred = None
-last_fold_dates = None
-
-for fold, (train_index, val_index) in enumerate(tscv.split(X)):
-    X_train, X_val = X.iloc[train_index], X.iloc[val_index]
-    y_train, y_val = y.iloc[train_index], y.iloc[val_index]
-
-    current_fold_model = HistGradientBoostingRegressor(random_state=42)
-    current_fold_model.fit(X_train, y_train)
-    y_pred = current_fold_model.predict(X_val)
-
-    mae = mean_absolute_error(y_val, y_pred)
-    mae_scores.append(mae)
-
-    r2 = r2_score(y_val, y_pred) # Calculate R^2 score
-    r2_scores.append(r2)
-
-    # Assign the model from the last fold for export and store validation results
-    if fold == tscv.n_splits - 1:
+    Returns:
+        dict: 'model', 'mae_scores', 'r2_scores', 'fold_predictions' ((val_index, y_pred)
+        per fold) and the last fold's 'y_val', 'y_pred', 'dates'.
+    """
+    # --- Model Training and Validation ---
+    if splits is None:
+        splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    mae_scores = []
+    r2_scores = [] # Added for R^2 scores
+
+    # To ensure 'model' is defined for the export step, we'll train it here and assign the last fold's model
+    model = None # Initialize model to None
+
+    # Store results for plotting
+    last_fold_y_val = None
+    last_fold_y_pred = None
+    last_fold_dates = None
+    fold_predictions = []
+
+    for train_index, val_index in splits:
+        if not len(train_index) or not len(val_index):
+            # Keeps fold_predictions aligned with `splits`
+            fold_predictions.append((val_index[:0], np.empty(0)))
+            continue
+        X_train, X_val = X.iloc[train_index], X.iloc[val_index]
+        y_train, y_val = y.iloc[train_index], y.iloc[val_index]
+
+        current_fold_model = HistGradientBoostingRegressor(random_state=42)
+        current_fold_model.fit(X_train, y_train)
+        y_pred = current_fold_model.predict(X_val)
+
+        mae = mean_absolute_error(y_val, y_pred)
+        mae_scores.append(mae)
+
+        r2 = r2_score(y_val, y_pred) # Calculate R^2 score
+        r2_scores.append(r2)
+        fold_predictions.append((val_index, y_pred))
+
+        # Keep the model from the last fold for export and store validation results
         model = current_fold_model
         last_fold_y_val = y_val
         last_fold_y_pred = y_pred
         # Get the corresponding dates for the last validation fold
-        last_fold_dates = dates_for_plotting.iloc[val_index].reset_index(drop=True)
+        if dates is not None:
+            last_fold_dates = dates.iloc[val_index].reset_index(drop=True)
+
+    return {
+        'model': model,
+        'mae_scores': mae_scores,
+        'r2_scores': r2_scores,
+        'fold_predictions': fold_predictions,
+        'y_val': last_fold_y_val,
+        'y_pred': last_fold_y_pred,
+        'dates': last_fold_dates,
+    }
 
-print(f"Average Mean Absolute Error across all folds: {np.mean(mae_scores):.2f}")
-print(f"Average R^2 Score across all folds: {np.mean(r2_scores):.2f}") # Print average R^2
 
-# --- Model Export ---
-model_pipeline = {
-    'model': model,
-    'feature_columns': X.columns.tolist(),
-    'X_numeric_mean': X.select_dtypes(include=[np.number]).mean() # Save X_numeric_mean
-}
-joblib.dump(model_pipeline, str(BASE_DIR / 'shelter_demand_model.joblib'))
-print("Model and feature columns saved successfully as 'shelter_demand_model.joblib'.")
+# --- Per-Sector Sharding ---
+def _train_sector_shard(sector, X_sector, y_sector, splits, n_threads):
+    """Process-pool worker: cross-validates (on `splits`) and fits the model for one sector."""
+    start = time.perf_counter()
+    # Split the cores between workers instead of letting every process start a full OpenMP pool
+    with threadpool_limits(limits=n_threads):
+        result = train_model(X_sector, y_sector, splits=splits)
+    result['train_seconds'] = time.perf_counter() - start
+    result['n_rows'] = len(X_sector)
+    # Only the fold predictions are needed by the parent, for pooled metrics
+    for key in ('dates', 'y_val', 'y_pred'):
+        result.pop(key)
+    return sector, result
 
-# --- Prediction Function Development ---
-# Load the saved model and feature columns (these are already in scope for this combined cell)
-loaded_model_pipeline = joblib.load(str(BASE_DIR / 'shelter_demand_model.joblib'))
 
+def train_sharded_models(X, y, n_jobs=None, n_splits=5):
+    """
+    Trains one model per sector in parallel processes.
+
+    Each shard sees only its sector's rows and drops the 'SECTOR_*' one-hot columns,
+    so its trees never spend splits separating sectors. The shards are cross-validated
+    on the global model's TimeSeriesSplit folds (each restricted to the sector's rows),
+    so their pooled fold predictions cover the rows the global model is scored on.
+
+    Args:
+        X (pd.DataFrame): Global feature matrix (with 'SECTOR_*' columns).
+        y (pd.Series): Target aligned with X.
+        n_jobs (int): Worker processes (defaults to one per sector, capped at the CPU count).
+        n_splits (int): Number of TimeSeriesSplit folds (as in train_model).
+
+    Returns:
+        tuple: (shard_results dict keyed by sector, shard feature columns, wall-clock seconds).
+        Each result's 'fold_predictions' use row positions in X.
+    """
+    sector_columns = [col for col in X.columns if col.startswith('SECTOR_')]
+    shard_columns = [col for col in X.columns if not col.startswith('SECTOR_')]
+    n_jobs = n_jobs or min(len(sector_columns), thread_config.available_cpus())
+    n_threads = thread_config.threads_for('training', workers=n_jobs)
+    global_splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+
+    start = time.perf_counter()
+    sector_rows = {}
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = []
+        for sector_col in sector_columns:
+            mask = X[sector_col].to_numpy().astype(bool)
+            rows = np.flatnonzero(mask)
+            sector = sector_col.replace('SECTOR_', '')
+            sector_rows[sector] = rows
+            # Global row positions -> positions within the sector's rows (-1 elsewhere)
+            position = np.full(len(X), -1)
+            position[rows] = np.arange(len(rows))
+            splits = [(position[train_index][mask[train_index]], position[val_index][mask[val_index]])
+                      for train_index, val_index in global_splits]
+            futures.append(executor.submit(
+                _train_sector_shard,
+                sector,
+                X.loc[mask, shard_columns].reset_index(drop=True),
+                y[mask].reset_index(drop=True),
+                splits,
+                n_threads,
+            ))
+        shard_results = dict(future.result() for future in futures)
+    wall_seconds = time.perf_counter() - start
+
+    for sector, result in shard_results.items():
+        result['fold_predictions'] = [(sector_rows[sector][val_index], y_pred)
+                                      for val_index, y_pred in result['fold_predictions']]
+
+    return shard_results, shard_columns, wall_seconds
+
+
+def _median_predict_ms(model, X_row, repeats=200):
+    """Median wall-clock latency of one predict call on `X_row` (a single row by default) in milliseconds."""
+    model.predict(X_row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X_row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def pooled_fold_scores(y, global_result, shard_results):
+    """
+    Mean fold MAE and R^2 of both modes over the same validation rows.
+
+    Each fold's shard predictions are concatenated and scored together, so the sharded
+    R^2 is measured against the same (across-sector) variance as the global model's.
+    Rows no shard could predict (a sector without training rows in that fold) are left
+    out for both modes.
+
+    Returns:
+        dict: 'global' and 'sharded' -> {'mae', 'r2'}, plus 'rows' (validation rows scored).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    scores = {'global': {'mae': [], 'r2': []}, 'sharded': {'mae': [], 'r2': []}}
+    n_rows = 0
+    for fold, (val_index, global_pred) in enumerate(global_result['fold_predictions']):
+        predicted = np.full(len(y), np.nan)
+        for result in shard_results.values():
+            shard_index, shard_pred = result['fold_predictions'][fold]
+            predicted[shard_index] = shard_pred
+        covered = ~np.isnan(predicted[val_index])
+        if not covered.any():
+            continue
+        rows = val_index[covered]
+        n_rows += len(rows)
+        for mode, y_pred in (('global', global_pred[covered]), ('sharded', predicted[rows])):
+            scores[mode]['mae'].append(mean_absolute_error(y[rows], y_pred))
+            scores[mode]['r2'].append(r2_score(y[rows], y_pred))
+    pooled = {mode: {metric: float(np.mean(values)) for metric, values in metrics.items()}
+              for mode, metrics in scores.items()}
+    pooled['rows'] = n_rows
+    return pooled
+
+
+def compare_sharded_with_global(X, y, global_result, global_seconds, shard_results, shard_columns, shard_seconds):
+    """Prints pooled accuracy, training time and single-row inference latency for both modes."""
+    pooled = pooled_fold_scores(y, global_result, shard_results)
+
+    sample = X.iloc[[len(X) - 1]]
+    global_latency = _median_predict_ms(global_result['model'], sample)
+    shard_latency = np.mean([
+        _median_predict_ms(r['model'], sample[shard_columns]) for r in shard_results.values()
+    ])
+
+    print("\n--- Sharded vs Global Model ---")
+    print(f"{'':28}{'global':>12}{'sharded':>12}")
+    print(f"{'CV MAE (pooled)':28}{pooled['global']['mae']:>12.2f}{pooled['sharded']['mae']:>12.2f}")
+    print(f"{'CV R^2 (pooled)':28}{pooled['global']['r2']:>12.3f}{pooled['sharded']['r2']:>12.3f}")
+    print(f"{'Training wall time (s)':28}{global_seconds:>12.2f}{shard_seconds:>12.2f}")
+    print(f"{'Single-row predict (ms)':28}{global_latency:>12.3f}{shard_latency:>12.3f}")
+    print("Per sector (R^2 against the sector's own variance):")
+    for sector, r in shard_results.items():
+        print(f"  {sector:<16} rows={r['n_rows']:<6} MAE={np.mean(r['mae_scores']):.2f} "
+              f"R^2={np.mean(r['r2_scores']):.3f} fit={r['train_seconds']:.2f}s")
+
+
+# --- Weather Lookup Table ---
+def export_weather_table(df_weather, path):
+    """
+    Writes a date-indexed weather table for the web app's O(1) lookup.
+
+    Row i holds the weather of day `start_ordinal + i` (proleptic Gregorian ordinal), so
+    a lookup is one subtraction and one row read. Gaps are forward-filled and missing snow
+    depth set to 0, the same way the training data is prepared. The table ends at the last
+    day with a recorded minimum temperature, so placeholder rows for future days in the
+    current year's CSV are not filled with stale values.
+
+    Args:
+        df_weather (pd.DataFrame): Daily weather in the Environment Canada CSV layout.
+        path (Path): Destination .npz file.
+
+    Returns:
+        tuple: (first date, last date) covered by the table.
+    """
+    dates = pd.to_datetime(df_weather['Date/Time'])
+    daily = df_weather.assign(DATE=dates).drop_duplicates('DATE', keep='last').set_index('DATE').sort_index()
+    recorded = pd.to_numeric(daily['Min Temp (°C)'], errors='coerce').dropna().index
+    daily = daily.loc[recorded.min():recorded.max()]
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq='D'))
+
+    columns = [col for col in WEATHER_FEATURE_COLUMNS if col in daily.columns]
+    values = daily[columns].apply(pd.to_numeric, errors='coerce').ffill()
+    if 'Snow on Grnd (cm)' in values.columns:
+        values['Snow on Grnd (cm)'] = values['Snow on Grnd (cm)'].fillna(0)
+
+    np.savez_compressed(
+        str(path),
+        start_ordinal=np.int64(daily.index[0].toordinal()),
+        columns=np.array(columns),
+        values=values.to_numpy(dtype=np.float64),
+    )
+    return daily.index[0], daily.index[-1]
+
+
+# --- Compact Artifact Export ---
+COMPACT_FORMAT_VERSION = 1
+
+def export_compact_artifact(model, feature_columns, X_numeric_mean, npz_path, manifest_path, manifest_extra=None):
+    """
+    Exports a fitted HistGradientBoostingRegressor as plain numpy arrays plus a JSON manifest.
+
+    The .npz holds every tree's nodes concatenated into flat arrays (child indices are
+    global; node training counts enable feature attributions), the baseline prediction
+    and the feature means used to fill unknown inputs.
+    Nothing is pickled, so the artifact loads without pandas or a matching sklearn version.
+
+    Args:
+        model (HistGradientBoostingRegressor): The fitted model.
+        feature_columns (list): Feature names in the order the model expects.
+        X_numeric_mean (pd.Series): Training means of the numeric features.
+        npz_path (Path): Destination of the tree arrays.
+        manifest_path (Path): Destination of the JSON manifest.
+        manifest_extra (dict): Additional manifest fields (training data range, metrics, ...).
+
+    Returns:
+        dict: The manifest that was written.
+    """
+    if model.is_categorical_ is not None and np.any(model.is_categorical_):
+        raise ValueError("Compact export does not support categorical splits")
+
+    trees = [predictors[0] for predictors in model._predictors]
+    tree_sizes = np.array([len(tree.nodes) for tree in trees])
+    tree_roots = np.concatenate([[0], np.cumsum(tree_sizes)[:-1]])
+    nodes = np.concatenate([tree.nodes for tree in trees])
+    offsets = np.repeat(tree_roots, tree_sizes)
+
+    feature_means = np.array([
+        X_numeric_mean[col] if col in X_numeric_mean.index else np.nan
+        for col in feature_columns
+    ], dtype=np.float64)
+
+    np.savez_compressed(
+        str(npz_path),
+        node_value=nodes['value'].astype(np.float64),
+        node_feature=nodes['feature_idx'].astype(np.int32),
+        node_threshold=nodes['num_threshold'].astype(np.float64),
+        node_missing_left=nodes['missing_go_to_left'].astype(bool),
+        node_left=(nodes['left'] + offsets).astype(np.int32),
+        node_right=(nodes['right'] + offsets).astype(np.int32),
+        node_is_leaf=nodes['is_leaf'].astype(bool),
+        node_count=nodes['count'].astype(np.int64),
+        tree_roots=tree_roots.astype(np.int32),
+        baseline=np.float64(np.ravel(model._baseline_prediction)[0]),
+        feature_means=feature_means,
+    )
+
+    manifest = {
+        'format_version': COMPACT_FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'feature_columns': list(feature_columns),
+        'sectors': [col.replace('SECTOR_', '') for col in feature_columns if col.startswith('SECTOR_')],
+        'n_trees': len(trees),
+        'n_nodes': int(len(nodes)),
+        'content_sha256': hashlib.sha256(Path(npz_path).read_bytes()).hexdigest(),
+    }
+    manifest.update(manifest_extra or {})
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+# --- Drift Reference ---
+# Request-driven features the web app's drift monitor compares against training. Calendar
+# features are left out: live dates lie after the training range by construction, so
+# 'year' (and 'month' early in a season) would always read as drifted.
+DRIFT_FEATURES = [
+    'Min Temp (°C)', 'Total Precip (mm)', 'Snow on Grnd (cm)',
+    'occupancy_7day_rolling_avg', 'occupancy_30day_rolling_avg'
+]
+DRIFT_BINS = 10
+DRIFT_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+DRIFT_FORMAT_VERSION = 2
+
+def _reference_distribution(values, edges):
+    values = values[~np.isnan(values)]
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return {
+        'count': int(len(values)),
+        'proportions': (counts / max(len(values), 1)).tolist(),
+        'quantiles': np.quantile(values, DRIFT_QUANTILES).tolist() if len(values) else None,
+        'min': float(values.min()) if len(values) else None,
+        'max': float(values.max()) if len(values) else None,
+    }
+
+
+def export_drift_reference(X, path):
+    """
+    Saves training-time reference distributions for the web app's drift monitor.
+
+    Every feature in DRIFT_FEATURES gets fixed histogram edges (training deciles, shared
+    by all sectors) plus, for all rows and for each sector, the bin proportions,
+    quantiles and min/max. The sector mix is stored as row proportions.
+
+    Returns:
+        dict: The reference written to `path`.
+    """
+    sector_columns = [col for col in X.columns if col.startswith('SECTOR_')]
+    sectors = X[sector_columns].idxmax(axis=1).str.replace('SECTOR_', '').to_numpy()
+    features = [col for col in DRIFT_FEATURES if col in X.columns]
+
+    edges = {}
+    for col in features:
+        values = X[col].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        inner = np.linspace(0, 1, DRIFT_BINS + 1)[1:-1]
+        edges[col] = np.unique(np.round(np.quantile(values, inner), 6)).tolist()
+
+    scopes = {'all': np.ones(len(X), dtype=bool)}
+    scopes.update({sector: sectors == sector for sector in sorted(set(sectors))})
+    reference = {
+        scope: {
+            col: _reference_distribution(X.loc[rows, col].to_numpy(dtype=np.float64), edges[col])
+            for col in features
+        }
+        for scope, rows in scopes.items()
+    }
+
+    drift_reference = {
+        'format_version': DRIFT_FORMAT_VERSION,
+        'features': features,
+        'quantiles': DRIFT_QUANTILES,
+        'edges': edges,
+        'sector_mix': {sector: float(rows.mean()) for sector, rows in scopes.items() if sector != 'all'},
+        'reference': reference,
+    }
+    with open(path, 'w') as f:
+        json.dump(drift_reference, f, indent=4)
+    return drift_reference
+
+
+def save_model(model, X, dates, metrics):
+    """
+    Writes the joblib pipeline and the compact artifact for a fitted global model.
+
+    Args:
+        model (HistGradientBoostingRegressor): The fitted model.
+        X (pd.DataFrame): Feature matrix the model was trained/evaluated on.
+        dates (pd.Series): Dates aligned with X (recorded as the training data range).
+        metrics (dict): Evaluation metrics stored in the manifest.
+
+    Returns:
+        dict: The joblib model pipeline.
+    """
+    # --- Model Export ---
+    model_pipeline = {
+        'model': model,
+        'feature_columns': X.columns.tolist(),
+        'X_numeric_mean': X.select_dtypes(include=[np.number]).mean() # Save X_numeric_mean
+    }
+    joblib.dump(model_pipeline, str(MODEL_PATH))
+    print("Model and feature columns saved successfully as 'shelter_demand_model.joblib'.")
+
+    compact_manifest = export_compact_artifact(
+        model,
+        X.columns.tolist(),
+        model_pipeline['X_numeric_mean'],
+        COMPACT_MODEL_PATH,
+        COMPACT_MANIFEST_PATH,
+        manifest_extra={
+            'training_data': {
+                'start_date': dates.min().strftime('%Y-%m-%d'),
+                'end_date': dates.max().strftime('%Y-%m-%d'),
+                'n_rows': int(len(X)),
+            },
+            'metrics': metrics,
+        },
+    )
+    print(f"Compact artifact saved as 'shelter_demand_model.npz' + 'shelter_demand_model.json' "
+          f"(sha256 {compact_manifest['content_sha256'][:12]}).")
+
+    export_drift_reference(X, DRIFT_REFERENCE_PATH)
+    print(f"Drift reference distributions saved as '{DRIFT_REFERENCE_PATH.name}'.")
+    return model_pipeline
+
+
+# --- Fast Tier Distillation ---
+# A few shallow trees fitted to the full model's predictions (not the raw target), so
+# the student copies the teacher's smoothed function instead of relearning the noise
+FAST_TIER_PARAMS = {'max_iter': 40, 'max_depth': 4, 'max_leaf_nodes': 15, 'learning_rate': 0.25}
+FAST_TIER_BATCH_ROWS = 1000
+
+def distill_fast_model(teacher, X, X_holdout=None, y_holdout=None, params=None):
+    """
+    Fits the low-latency fast tier to the teacher's predictions over the same feature_columns.
+
+    Args:
+        teacher (HistGradientBoostingRegressor): The fitted full model.
+        X (pd.DataFrame): Feature matrix the teacher is queried on.
+        X_holdout (pd.DataFrame): Rows the teacher was not trained on; when given (with
+            y_holdout), both tiers' errors against the true demand are reported.
+        y_holdout (pd.Series): True demand for X_holdout.
+        params (dict): HistGradientBoostingRegressor parameters (default: FAST_TIER_PARAMS).
+
+    Returns:
+        tuple: (fitted student model, metrics dict with 'full' and 'fast' tiers and the
+                student's 'fidelity_mae' against the teacher)
+    """
+    teacher_pred = teacher.predict(X)
+    student = HistGradientBoostingRegressor(random_state=42, **(params or FAST_TIER_PARAMS))
+    student.fit(X, teacher_pred)
+
+    sample_row = X.iloc[[len(X) - 1]]
+    batch = X.iloc[-FAST_TIER_BATCH_ROWS:]
+    metrics = {'fidelity_mae': float(mean_absolute_error(teacher_pred, student.predict(X)))}
+    for tier, tier_model in (('full', teacher), ('fast', student)):
+        metrics[tier] = {
+            'n_trees': int(tier_model.n_iter_),
+            'single_row_ms': _median_predict_ms(tier_model, sample_row),
+            'batch_ms_per_1000_rows': _median_predict_ms(tier_model, batch, repeats=20) * 1000 / len(batch),
+        }
+        if X_holdout is not None:
+            holdout_pred = tier_model.predict(X_holdout)
+            metrics[tier]['holdout_mae'] = float(mean_absolute_error(y_holdout, holdout_pred))
+            metrics[tier]['holdout_r2'] = float(r2_score(y_holdout, holdout_pred))
+    if X_holdout is not None:
+        metrics['holdout_rows'] = int(len(X_holdout))
+    return student, metrics
+
+
+def save_fast_model(student, X_numeric_mean, feature_columns, metrics):
+    """
+    Exports the fast tier as a compact artifact next to the main model.
+
+    The manifest records the main artifact's content hash so the web app only serves a
+    fast tier distilled from the model it has loaded.
+    """
+    manifest = export_compact_artifact(
+        student, feature_columns, X_numeric_mean, FAST_MODEL_PATH, FAST_MANIFEST_PATH,
+        manifest_extra={
+            'tier': 'fast',
+            'teacher_sha256': hashlib.sha256(COMPACT_MODEL_PATH.read_bytes()).hexdigest(),
+            'distillation': FAST_TIER_PARAMS,
+            'metrics': metrics,
+        },
+    )
+    print(f"Fast tier saved as '{FAST_MODEL_PATH.name}' + '{FAST_MANIFEST_PATH.name}' "
+          f"({manifest['n_trees']} trees, {manifest['n_nodes']} nodes).")
+
+
+def report_fast_tier(metrics):
+    """Prints accuracy and latency of both tiers."""
+    print("\n--- Fast vs Full Model Tier ---")
+    print(f"{'':32}{'full':>12}{'fast':>12}")
+    rows = [('Trees', 'n_trees', '{:>12d}')]
+    if 'holdout_rows' in metrics:
+        rows += [('Holdout MAE', 'holdout_mae', '{:>12.2f}'), ('Holdout R^2', 'holdout_r2', '{:>12.3f}')]
+    rows += [('Single-row predict (ms)', 'single_row_ms', '{:>12.3f}'),
+             ('Batch predict per 1000 rows (ms)', 'batch_ms_per_1000_rows', '{:>12.2f}')]
+    for label, key, fmt in rows:
+        print(f"{label:32}" + fmt.format(metrics['full'][key]) + fmt.format(metrics['fast'][key]))
+    print(f"Mean |fast - full| over the training rows: {metrics['fidelity_mae']:.2f}")
+
+
+# --- Warm-Start Incremental Update ---
+def _continue_boosting(model, X, y, extra_iters):
+    """Returns a copy of a fitted model with `extra_iters` more trees boosted on (X, y)."""
+    updated = copy.deepcopy(model)
+    updated.set_params(warm_start=True, max_iter=updated.n_iter_ + extra_iters)
+    updated.fit(X, y)
+    return updated
+
+
+def saved_training_end():
+    """Last date of the saved model's training data (from its compact manifest), or None."""
+    if not COMPACT_MANIFEST_PATH.exists():
+        return None
+    with open(COMPACT_MANIFEST_PATH) as f:
+        end_date = json.load(f).get('training_data', {}).get('end_date')
+    return pd.Timestamp(end_date) if end_date else None
+
+
+def update_model(X, y, dates, extra_iters=20, min_holdout_days=7, max_mae_increase=0.05, max_trees=500):
+    """
+    Continues boosting the saved model on the extended data instead of training from scratch.
+
+    Guard: the holdout is every date after the saved model's training range (the manifest's
+    training_data.end_date), so none of the compared models has seen it. The warm-started model
+    and a from-scratch fit are both trained on the rows up to that date and scored on the new
+    days. If the updated model's holdout MAE is more than `max_mae_increase` (relative) worse,
+    or the ensemble would grow past `max_trees`, the from-scratch retrain is used instead. The
+    chosen procedure is then repeated on all rows, which moves the recorded end date forward,
+    so the next update is again judged only on days the model has not been trained on.
+
+    Warm starting keeps the earlier trees unchanged. sklearn fits a new bin mapper on the
+    extended data, but it never re-checks the earlier trees against it. Their split bins came
+    from the original mapper. While the new trees are being fitted, the earlier trees'
+    contribution is computed from the new bins, so the residuals the new trees learn can be
+    slightly off. The guard is what catches that.
+
+    Returns:
+        tuple: (final model, report dict) or (None, reason) when no compatible saved model
+               exists or fewer than `min_holdout_days` new days were added.
+    """
+    if not MODEL_PATH.exists():
+        return None, f"No saved model at {MODEL_PATH.name}"
+    existing = joblib.load(str(MODEL_PATH))
+    if existing['feature_columns'] != X.columns.tolist():
+        return None, "Feature columns changed since the saved model was trained"
+    trained_until = saved_training_end()
+    if trained_until is None:
+        return None, f"No training date range recorded in {COMPACT_MANIFEST_PATH.name}"
+    base_model = existing['model']
+
+    holdout_mask = (dates > trained_until).to_numpy()
+    new_days = int(dates[holdout_mask].nunique())
+    if new_days < min_holdout_days:
+        return None, (f"only {new_days} new day(s) after {trained_until.strftime('%Y-%m-%d')}, "
+                      f"at least {min_holdout_days} are needed to validate an update")
+    X_train, y_train = X[~holdout_mask], y[~holdout_mask]
+    X_holdout, y_holdout = X[holdout_mask], y[holdout_mask]
+
+    start = time.perf_counter()
+    updated = _continue_boosting(base_model, X_train, y_train, extra_iters)
+    update_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    retrained = HistGradientBoostingRegressor(random_state=42).fit(X_train, y_train)
+    retrain_seconds = time.perf_counter() - start
+
+    updated_pred = updated.predict(X_holdout)
+    retrained_pred = retrained.predict(X_holdout)
+    report = {
+        'trained_until': trained_until.strftime('%Y-%m-%d'),
+        'holdout_start': dates[holdout_mask].min().strftime('%Y-%m-%d'),
+        'holdout_days': new_days,
+        'holdout_rows': int(len(X_holdout)),
+        'updated_mae': float(mean_absolute_error(y_holdout, updated_pred)),
+        'updated_r2': float(r2_score(y_holdout, updated_pred)),
+        'retrain_mae': float(mean_absolute_error(y_holdout, retrained_pred)),
+        'retrain_r2': float(r2_score(y_holdout, retrained_pred)),
+        'update_seconds': update_seconds,
+        'retrain_seconds': retrain_seconds,
+        'n_trees': int(updated.n_iter_),
+    }
+    report['accepted'] = bool(
+        report['updated_mae'] <= report['retrain_mae'] * (1 + max_mae_increase)
+        and updated.n_iter_ <= max_trees
+    )
+
+    if report['accepted']:
+        final = _continue_boosting(base_model, X, y, extra_iters)
+    else:
+        final = HistGradientBoostingRegressor(random_state=42).fit(X, y)
+    return final, report
+
+
+# --- Prediction Function Development ---
 def get_live_prediction(date_str, sector, temp, loaded_model_pipeline):
     """
     Provides a real-time shelter demand prediction based on input date, sector, and minimum temperature.
@@ -324,11 +920,260 @@ def get_live_prediction(date_str, sector, temp, loaded_model_pipeline):
     }
     return json.dumps(result, indent=4)
 
-print("Prediction function `get_live_prediction` defined and ready.")
 
-# --- Demonstrate Prediction ---
-print("\n--- Demonstrating `get_live_prediction` ---")
-prediction_output = get_live_prediction(date_str='2025-12-25', sector='Families', temp=-10.0, loaded_model_pipeline=loaded_model_pipeline)
-print(prediction_output)
+# --- Profiling ---
+class StageProfiler:
+    """
+    Writes one cProfile `.prof` file per training stage when enabled, and optionally
+    reports stage progress.
+
+    The files use the standard pstats format (open with `python -m pstats`, snakeviz,
+    or convert with gprof2dot). When `output_dir` is None every stage is a plain
+    passthrough, so profiling costs nothing when it is off. With `progress_path`, a JSON
+    file with the current stage and the completed stages' durations is rewritten
+    (atomically) whenever a stage starts or ends; the web app's retraining jobs poll it.
+    """
 
-print("\nAll steps completed: data processed, model trained and evaluated, and prediction function demonstrated.")
\ No newline at end of file
+    def __init__(self, output_dir=None, progress_path=None):
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.progress_path = Path(progress_path) if progress_path else None
+        self.run_id = time.strftime('%Y%m%d-%H%M%S')
+        self.written = []
+        self.completed = []
+
+    def _report(self, current):
+        if self.progress_path is None:
+            return
+        tmp_path = self.progress_path.with_suffix(self.progress_path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'stage': current, 'completed': self.completed}, f)
+        os.replace(tmp_path, self.progress_path)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self._report(name)
+        start = time.perf_counter()
+        try:
+            if self.output_dir is None:
+                yield
+                return
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                path = self.output_dir / f"train-{self.run_id}-{len(self.written) + 1:02d}-{name}.prof"
+                profiler.dump_stats(str(path))
+                self.written.append(path)
+        finally:
+            self.completed.append({'stage': name, 'seconds': round(time.perf_counter() - start, 3)})
+            self._report(None)
+
+
+def set_data_dir(data_dir):
+    """Reads the raw data from `data_dir` (same folder layout as 'Data/'), e.g. another city's exports."""
+    global base_data_path, weather_path, occupancy_path, flow_path, intake_path
+    base_data_path = Path(data_dir)
+    weather_path = base_data_path / weather_path.name
+    occupancy_path = base_data_path / occupancy_path.name
+    flow_path = base_data_path / flow_path.name
+    intake_path = base_data_path / intake_path.name
+
+
+def set_output_dir(output_dir):
+    """Writes every model artifact (same file names) to `output_dir` instead of the project folder."""
+    global MODEL_PATH, COMPACT_MODEL_PATH, COMPACT_MANIFEST_PATH, SHARDED_MODEL_PATH
+    global FAST_MODEL_PATH, FAST_MANIFEST_PATH, WEATHER_TABLE_PATH, DRIFT_REFERENCE_PATH
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    MODEL_PATH = output_dir / MODEL_PATH.name
+    COMPACT_MODEL_PATH = output_dir / COMPACT_MODEL_PATH.name
+    COMPACT_MANIFEST_PATH = output_dir / COMPACT_MANIFEST_PATH.name
+    SHARDED_MODEL_PATH = output_dir / SHARDED_MODEL_PATH.name
+    FAST_MODEL_PATH = output_dir / FAST_MODEL_PATH.name
+    FAST_MANIFEST_PATH = output_dir / FAST_MANIFEST_PATH.name
+    WEATHER_TABLE_PATH = output_dir / WEATHER_TABLE_PATH.name
+    DRIFT_REFERENCE_PATH = output_dir / DRIFT_REFERENCE_PATH.name
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the shelter demand model.")
+    parser.add_argument('--sharded', action='store_true',
+                        help="Also train one model per sector in parallel and save them to "
+                             f"'{SHARDED_MODEL_PATH.name}'")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Worker processes for sharded training (default: one per sector)")
+    parser.add_argument('--update', action='store_true',
+                        help="Continue boosting the saved model on the extended data instead of "
+                             "training from scratch (falls back to a retrain if accuracy drifts)")
+    parser.add_argument('--update-iters', type=int, default=20,
+                        help="Boosting iterations added by --update (default: 20)")
+    parser.add_argument('--holdout-days', type=int, default=7,
+                        help="Minimum number of days after the saved model's training data needed to "
+                             "validate --update; they form the holdout (default: 7)")
+    parser.add_argument('--max-mae-increase', type=float, default=0.05,
+                        help="Relative holdout MAE increase over a retrain tolerated by --update (default: 0.05)")
+    parser.add_argument('--weather-table-only', action='store_true',
+                        help=f"Only rebuild '{WEATHER_TABLE_PATH.name}' from the weather CSVs and exit")
+    parser.add_argument('--forecast-csv', default=None,
+                        help="Convert a forecast weather CSV (same columns as the daily weather CSVs) "
+                             f"into '{WEATHER_FORECAST_PATH.name}' and exit")
+    parser.add_argument('--fast-tier', action='store_true',
+                        help="Also distill a small low-latency model from the trained model and save it as "
+                             f"'{FAST_MODEL_PATH.name}' + '{FAST_MANIFEST_PATH.name}'")
+    parser.add_argument('--profile', nargs='?', const=str(PROFILE_DIR), default=None, metavar='DIR',
+                        help="Write a cProfile .prof file per training stage to DIR "
+                             f"(default: '{PROFILE_DIR.name}/'). Worker processes of --sharded are not profiled.")
+    parser.add_argument('--data-dir', default=None, metavar='DIR',
+                        help=f"Read the raw data from DIR instead of '{base_data_path.name}/' (same folder layout)")
+    parser.add_argument('--output-dir', default=None, metavar='DIR',
+                        help="Write the model artifacts to DIR instead of the project folder (used by the "
+                             "web app's retraining jobs to stage a candidate model)")
+    parser.add_argument('--progress-file', default=None, metavar='PATH',
+                        help="Keep a JSON file with the current and completed training stages up to date")
+    return parser.parse_args(argv)
+
+
+def export_fast_tier(args, profiler, model, X, model_pipeline, X_holdout=None, y_holdout=None):
+    """Distills and saves the fast tier when --fast-tier is given, otherwise flags a stale one."""
+    if not args.fast_tier:
+        if FAST_MANIFEST_PATH.exists():
+            with open(FAST_MANIFEST_PATH) as f:
+                teacher_sha256 = json.load(f).get('teacher_sha256')
+            if teacher_sha256 != hashlib.sha256(COMPACT_MODEL_PATH.read_bytes()).hexdigest():
+                print(f"⚠ '{FAST_MODEL_PATH.name}' was distilled from a previous model and will be ignored "
+                      f"by the web app; rerun with --fast-tier to refresh it.")
+        return
+    with profiler.stage('distill_fast_tier'):
+        student, metrics = distill_fast_model(model, X, X_holdout, y_holdout)
+        save_fast_model(student, model_pipeline['X_numeric_mean'], X.columns.tolist(), metrics)
+    report_fast_tier(metrics)
+
+
+def report_profiles(profiler):
+    if profiler.written:
+        print(f"\nStage profiles written to '{profiler.output_dir}':")
+        for path in profiler.written:
+            print(f"  {path.name}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.data_dir:
+        set_data_dir(args.data_dir)
+    if args.output_dir:
+        set_output_dir(args.output_dir)
+    n_threads = thread_config.configure_process('training')
+    print(f"Native math libraries limited to {n_threads} thread(s) for training.")
+
+    if args.forecast_csv:
+        first, last = export_weather_table(pd.read_csv(args.forecast_csv), WEATHER_FORECAST_PATH)
+        print(f"Forecast weather table saved as '{WEATHER_FORECAST_PATH.name}' ({first.date()} to {last.date()}).")
+        return
+
+    if args.weather_table_only:
+        first, last = export_weather_table(load_weather_data(), WEATHER_TABLE_PATH)
+        print(f"Weather table saved as '{WEATHER_TABLE_PATH.name}' ({first.date()} to {last.date()}).")
+        return
+
+    profiler = StageProfiler(args.profile, args.progress_file)
+
+    with profiler.stage('load_data'):
+        df_weather, df_occupancy, df_flow, df_intake = load_data()
+    with profiler.stage('weather_table'):
+        first, last = export_weather_table(df_weather, WEATHER_TABLE_PATH)
+    print(f"Weather table saved as '{WEATHER_TABLE_PATH.name}' ({first.date()} to {last.date()}).")
+
+    with profiler.stage('build_features'):
+        merged_df = build_features(df_weather, df_occupancy, df_flow, df_intake)
+
+    y = merged_df['True Demand']
+    X = merged_df.drop(columns=['True Demand', 'DATE'])
+
+    # Store dates for plotting
+    dates_for_plotting = merged_df['DATE'].copy()
+
+    if args.update:
+        with profiler.stage('update_model'):
+            model, report = update_model(X, y, dates_for_plotting, extra_iters=args.update_iters,
+                                         min_holdout_days=args.holdout_days, max_mae_increase=args.max_mae_increase)
+        if model is not None:
+            print(f"Holdout since {report['holdout_start']} ({report['holdout_rows']} rows): "
+                  f"updated MAE {report['updated_mae']:.2f} in {report['update_seconds']:.2f}s, "
+                  f"retrain MAE {report['retrain_mae']:.2f} in {report['retrain_seconds']:.2f}s")
+            mode = 'warm-start update' if report['accepted'] else 'full retrain (update drifted)'
+            print(f"Using {mode}.")
+            with profiler.stage('save_model'):
+                model_pipeline = save_model(model, X, dates_for_plotting, {
+                    'holdout_mae': report['updated_mae'] if report['accepted'] else report['retrain_mae'],
+                    'holdout_r2': report['updated_r2'] if report['accepted'] else report['retrain_r2'],
+                    # No cross-validation is run by an update: recorded as missing rather than
+                    # carried over from a model that no longer exists
+                    'cv_mae': None,
+                    'cv_r2': None,
+                    'update': report,
+                })
+            # The updated model has seen every row, so only its fidelity and latency are reported
+            export_fast_tier(args, profiler, model, X, model_pipeline)
+            report_profiles(profiler)
+            return
+        print(f"Update not possible ({report}); running full training.")
+
+    global_start = time.perf_counter()
+    with profiler.stage('train_model'):
+        result = train_model(X, y, dates_for_plotting)
+    global_seconds = time.perf_counter() - global_start
+    model = result['model']
+    mae_scores = result['mae_scores']
+    r2_scores = result['r2_scores']
+
+    print(f"Average Mean Absolute Error across all folds: {np.mean(mae_scores):.2f}")
+    print(f"Average R^2 Score across all folds: {np.mean(r2_scores):.2f}") # Print average R^2
+
+    with profiler.stage('save_model'):
+        model_pipeline = save_model(model, X, dates_for_plotting, {
+            'cv_mae': float(np.mean(mae_scores)),
+            'cv_r2': float(np.mean(r2_scores)),
+            'fold_mae': [float(s) for s in mae_scores],
+            'fold_r2': [float(s) for s in r2_scores],
+        })
+
+    # The exported model is the last fold's, so its validation fold is a true holdout for both tiers
+    holdout_rows = len(result['y_val'])
+    export_fast_tier(args, profiler, model, X, model_pipeline, X.iloc[-holdout_rows:], result['y_val'])
+
+    if args.sharded:
+        with profiler.stage('train_sharded'):
+            shard_results, shard_columns, shard_seconds = train_sharded_models(X, y, n_jobs=args.jobs)
+        sharded_pipeline = {
+            'sharded': True,
+            'models': {sector: r['model'] for sector, r in shard_results.items()},
+            'feature_columns': shard_columns,
+            'X_numeric_mean': model_pipeline['X_numeric_mean'][shard_columns],
+            'metrics': {
+                sector: {'cv_mae': float(np.mean(r['mae_scores'])), 'cv_r2': float(np.mean(r['r2_scores']))}
+                for sector, r in shard_results.items()
+            },
+        }
+        joblib.dump(sharded_pipeline, str(SHARDED_MODEL_PATH))
+        print(f"Sharded models saved successfully as '{SHARDED_MODEL_PATH.name}'.")
+        compare_sharded_with_global(X, y, result, global_seconds, shard_results, shard_columns, shard_seconds)
+
+    report_profiles(profiler)
+
+    # Load the saved model and feature columns
+    loaded_model_pipeline = joblib.load(str(MODEL_PATH))
+    print("Prediction function `get_live_prediction` defined and ready.")
+
+    # --- Demonstrate Prediction ---
+    print("\n--- Demonstrating `get_live_prediction` ---")
+    prediction_output = get_live_prediction(date_str='2025-12-25', sector='Families', temp=-10.0, loaded_model_pipeline=loaded_model_pipeline)
+    print(prediction_output)
+
+    print("\nAll steps completed: data processed, model trained and evaluated, and prediction function demonstrated.")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
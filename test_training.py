@@ -0,0 +1,204 @@
+"""
+Training pipeline tests on synthetic data (no Data/ folder needed):
+
+    python -m pytest test_training.py -v
+
+Models and artifacts are written to pytest's temporary folders.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR / 'benchmarks'))
+
+import mlmodel
+from bench_regression import synthetic_raw_data
+
+
+@pytest.fixture(scope="module")
+def features():
+    """(X, y, dates) for two years of synthetic data"""
+    merged = mlmodel.build_features(*synthetic_raw_data(n_days=2 * 365))
+    return merged.drop(columns=['True Demand', 'DATE']), merged['True Demand'], merged['DATE']
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """Points mlmodel's artifact paths at a temporary folder"""
+    for name in ('MODEL_PATH', 'COMPACT_MODEL_PATH', 'COMPACT_MANIFEST_PATH', 'DRIFT_REFERENCE_PATH'):
+        monkeypatch.setattr(mlmodel, name, tmp_path / getattr(mlmodel, name).name)
+    return tmp_path
+
+
+# --- Per-sector sharded models (user-027) ---
+
+def test_sharded_and_global_scores_are_pooled_over_the_same_rows():
+    merged = mlmodel.build_features(*synthetic_raw_data(n_days=365))
+    X, y = merged.drop(columns=['True Demand', 'DATE']), merged['True Demand']
+    global_result = mlmodel.train_model(X, y)
+    shard_results, shard_columns, _ = mlmodel.train_sharded_models(X, y, n_jobs=1)
+    assert not any(col.startswith('SECTOR_') for col in shard_columns)
+
+    # Every shard is validated on its sector's rows of the global folds
+    for fold, (val_index, _) in enumerate(global_result['fold_predictions']):
+        shard_rows = np.concatenate([r['fold_predictions'][fold][0] for r in shard_results.values()])
+        np.testing.assert_array_equal(np.sort(shard_rows), val_index)
+
+    pooled = mlmodel.pooled_fold_scores(y, global_result, shard_results)
+    assert pooled['rows'] == sum(len(val_index) for val_index, _ in global_result['fold_predictions'])
+    assert pooled['global']['mae'] == pytest.approx(np.mean(global_result['mae_scores']))
+    assert pooled['global']['r2'] == pytest.approx(np.mean(global_result['r2_scores']))
+    # Scored against the same variance, the two modes land in the same range
+    assert abs(pooled['sharded']['r2'] - pooled['global']['r2']) < 0.2
+
+
+# --- Incremental update guard (user-028) ---
+
+def save_model_until(X, y, dates, end_date):
+    """Trains and saves a model on the rows up to end_date, as a previous run would have"""
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    seen = (dates <= end_date).to_numpy()
+    model = HistGradientBoostingRegressor(max_iter=30, random_state=42).fit(X[seen], y[seen])
+    mlmodel.save_model(model, X[seen], dates[seen], {'cv_mae': 1.0, 'cv_r2': 0.5})
+    return model
+
+
+def test_update_holds_out_only_unseen_days(features, model_dir):
+    X, y, dates = features
+    end_date = dates.drop_duplicates().sort_values().iloc[-15]
+    base = save_model_until(X, y, dates, end_date)
+
+    model, report = mlmodel.update_model(X, y, dates, extra_iters=5)
+    assert model is not None, report
+    assert report['trained_until'] == end_date.strftime('%Y-%m-%d')
+    assert pd.Timestamp(report['holdout_start']) > end_date
+    assert report['holdout_days'] == 14
+    assert report['holdout_rows'] == int((dates > end_date).sum())
+    if report['accepted']:
+        assert model.n_iter_ == base.n_iter_ + 5
+
+
+def test_update_needs_enough_new_days(features, model_dir):
+    X, y, dates = features
+    save_model_until(X, y, dates, dates.drop_duplicates().sort_values().iloc[-3])
+
+    model, reason = mlmodel.update_model(X, y, dates, min_holdout_days=7)
+    assert model is None
+    assert "only 2 new day(s)" in reason
+
+
+def test_update_needs_a_recorded_training_range(features, model_dir):
+    X, y, dates = features
+    save_model_until(X, y, dates, dates.max())
+    mlmodel.COMPACT_MANIFEST_PATH.unlink()
+
+    model, reason = mlmodel.update_model(X, y, dates)
+    assert model is None
+    assert "training date range" in reason
+
+
+# --- Walk-forward backtest (user-029) ---
+
+def backtest_frame():
+    merged = mlmodel.build_features(*synthetic_raw_data(n_days=400))
+    cutoff = merged['DATE'].min() + pd.Timedelta(days=300)
+    return merged, cutoff
+
+
+def test_backtest_uses_only_data_before_the_cutoff():
+    import backtest
+
+    merged, cutoff = backtest_frame()
+    before = backtest.run_backtest(merged, pd.DatetimeIndex([cutoff]), horizon=7, n_jobs=1)
+
+    # Occupancy, intake and flow figures after the cutoff, the target, and any feature
+    # after the forecast window must not change the forecasts
+    frozen = backtest.frozen_columns(merged.columns.drop(['DATE', 'True Demand']))
+    assert {'occupancy_7day_rolling_avg', 'Total calls handled', 'actively_homeless'} <= set(frozen)
+    changed = merged.copy()
+    after_cutoff = changed['DATE'] >= cutoff
+    changed.loc[after_cutoff, frozen] *= 5
+    changed.loc[after_cutoff, 'True Demand'] *= 3
+    changed.loc[changed['DATE'] >= cutoff + pd.Timedelta(days=7), 'Min Temp (°C)'] = -60.0
+    after = backtest.run_backtest(changed, pd.DatetimeIndex([cutoff]), horizon=7, n_jobs=1)
+
+    assert len(before) == 7 * merged.filter(like='SECTOR_').shape[1]
+    assert (before['horizon_day'].between(1, 7)).all()
+    np.testing.assert_array_equal(before['predicted'], after['predicted'])
+
+
+def test_backtest_skips_cutoffs_without_data():
+    import backtest
+
+    merged, cutoff = backtest_frame()
+    first, last = merged['DATE'].min(), merged['DATE'].max()
+    results = backtest.run_backtest(merged, pd.DatetimeIndex([first, cutoff, last + pd.Timedelta(days=1)]),
+                                    horizon=7, n_jobs=1)
+    assert results['cutoff'].unique().tolist() == [cutoff]
+
+    with pytest.raises(ValueError, match="No cutoff"):
+        backtest.run_backtest(merged, pd.DatetimeIndex([first]), horizon=7, n_jobs=1)
+
+
+# --- Training profiler (user-036) ---
+
+def test_stage_profiler_writes_one_profile_per_stage(tmp_path):
+    import json
+    import pstats
+
+    progress_path = tmp_path / 'progress.json'
+    profiler = mlmodel.StageProfiler(tmp_path / 'profiles', progress_path)
+    with profiler.stage('load'):
+        with open(progress_path) as f:
+            assert json.load(f)['stage'] == 'load'
+        sorted(range(1000))
+    with profiler.stage('fit'):
+        pass
+
+    assert [path.name.split('-')[-1] for path in profiler.written] == ['load.prof', 'fit.prof']
+    assert all(pstats.Stats(str(path)).total_calls > 0 for path in profiler.written)
+    with open(progress_path) as f:
+        progress = json.load(f)
+    assert progress['stage'] is None
+    assert [stage['stage'] for stage in progress['completed']] == ['load', 'fit']
+
+
+def test_stage_profiler_is_a_passthrough_when_off(tmp_path):
+    profiler = mlmodel.StageProfiler()
+    with profiler.stage('load'):
+        pass
+    assert profiler.written == []
+    assert list(tmp_path.iterdir()) == []
+
+
+# --- Performance regression checks (user-042) ---
+
+@pytest.mark.parametrize("result, budget, baseline, expected", [
+    ({'median_ms': 9.0, 'peak_mb': 4.0}, {'median_ms': 10, 'peak_mb': 5}, None, []),
+    ({'median_ms': 11.0, 'peak_mb': 4.0}, {'median_ms': 10, 'peak_mb': 5}, None, ["median_ms 11.000 ms exceeds budget"]),
+    ({'median_ms': 9.0, 'peak_mb': 6.0}, {'median_ms': 10, 'peak_mb': 5}, None, ["peak_mb 6.000 MB exceeds budget"]),
+    # Slower than the baseline by more than the tolerance, though within the budget
+    ({'median_ms': 9.0, 'peak_mb': 1.0}, {'median_ms': 10}, {'median_ms': 6.0}, ["median_ms 9.000 ms is 50% above baseline"]),
+    ({'median_ms': 7.0, 'peak_mb': 1.0}, {'median_ms': 10}, {'median_ms': 6.0}, []),
+    # Small absolute memory growth is ignored however large in relative terms
+    ({'median_ms': 6.0, 'peak_mb': 0.3}, {}, {'median_ms': 6.0, 'peak_mb': 0.1}, []),
+    ({'median_ms': 6.0, 'peak_mb': 2.0}, {}, {'median_ms': 6.0, 'peak_mb': 1.0}, ["peak_mb 2.000 MB is 100% above baseline"]),
+    # Cases without a memory measurement (app_import where the resource module is missing)
+    ({'median_ms': 6.0, 'peak_mb': None}, {'peak_mb': 1}, None, []),
+])
+def test_check_case_budgets_and_baseline(result, budget, baseline, expected):
+    from bench_regression import check_case
+
+    failures = check_case('case', result, budget, baseline, tolerance=0.25)
+    assert len(failures) == len(expected)
+    for failure, prefix in zip(failures, expected):
+        assert failure.startswith(prefix)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,94 @@
+"""
+Thread-pool configuration for the native math libraries (OpenMP, OpenBLAS/MKL).
+
+HistGradientBoostingRegressor fits and predicts with OpenMP threads. Left alone,
+every uvicorn worker, executor thread and process-pool worker starts one thread per
+core, and the resulting oversubscription raises tail latency. This module is the one
+place that decides how many native threads each kind of work gets:
+
+    single    one prediction per request (web API). Concurrency comes from the
+              request executor, so each call uses 1 thread.
+    batch     vectorized predictions over many rows (sweeps, warm-up, benchmarks):
+              the cores available to this process.
+    training  model fitting: the cores available to this process.
+
+Cores are divided by the number of processes sharing the machine (`workers`, e.g.
+uvicorn's WEB_CONCURRENCY or a process pool size). Every default can be overridden
+with SHELTER_THREADS_SINGLE, SHELTER_THREADS_BATCH or SHELTER_THREADS_TRAINING;
+`python benchmarks/bench_thread_tuning.py` finds good values for the current machine.
+"""
+import os
+
+MODES = ('single', 'batch', 'training')
+
+# Environment variables read by the native libraries when they initialize
+NATIVE_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+_controller = None
+
+
+def available_cpus():
+    """CPUs this process may run on (respects container/affinity limits where exposed)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def threads_for(mode, workers=1):
+    """
+    Native thread count for one unit of work in the given mode.
+
+    Args:
+        mode (str): 'single', 'batch' or 'training'.
+        workers (int): Processes (or concurrent tasks) sharing the cores.
+
+    Returns:
+        int: Thread count, at least 1.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown thread mode '{mode}'. Must be one of: {', '.join(MODES)}")
+    override = os.environ.get(f'SHELTER_THREADS_{mode.upper()}')
+    if override:
+        return max(1, int(override))
+    if mode == 'single':
+        return 1
+    return max(1, available_cpus() // max(1, workers))
+
+
+def _get_controller():
+    # Creating a ThreadpoolController scans the loaded libraries (milliseconds), so it is
+    # built once; limiting through it afterwards costs microseconds.
+    global _controller
+    if _controller is None:
+        from threadpoolctl import ThreadpoolController
+        _controller = ThreadpoolController()
+    return _controller
+
+
+def configure_process(mode, workers=1):
+    """
+    Sets the process-wide default thread count for `mode`.
+
+    Call it as early as possible: the environment variables only reach libraries
+    (and child processes) initialized afterwards, and they are what threads created
+    later by the request executor inherit. Variables already set by the deployment
+    are left untouched. Libraries that are already loaded are limited directly.
+
+    Returns:
+        int: The configured thread count.
+    """
+    n_threads = threads_for(mode, workers)
+    for name in NATIVE_THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(n_threads))
+    _get_controller().limit(limits=n_threads)
+    return n_threads
+
+
+def limit_threads(mode, workers=1):
+    """
+    Context manager limiting native threads to the `mode` default for one call.
+
+    Limits apply to the calling thread's OpenMP setting, so use it inside the worker
+    thread or process that runs the native code.
+    """
+    return _get_controller().limit(limits=threads_for(mode, workers))
@@ -1,12 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
+import os
+import sys
+import math
+import time
+import asyncio
 import joblib
 import json
+import hashlib
+import gzip
+import bisect
+import re
+import uuid
+import cProfile
+import threading
+from collections import OrderedDict
+import secrets
+import shutil
+import signal
+import subprocess
 from pathlib import Path
+
+# Configure native thread pools before numpy/sklearn load their OpenMP and BLAS runtimes
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import thread_config
+import capacity_sim
+
+# Uvicorn worker processes sharing this machine's cores
+SERVING_WORKERS = int(os.environ.get('WEB_CONCURRENCY', '1'))
+thread_config.configure_process('single', workers=SERVING_WORKERS)
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -31,23 +60,786 @@ templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 # Get paths to model
 ROOT_DIR = Path(__file__).resolve().parent.parent
 MODEL_PATH = ROOT_DIR / 'shelter_demand_model.joblib'
+COMPACT_MODEL_PATH = ROOT_DIR / 'shelter_demand_model.npz'
+COMPACT_MANIFEST_PATH = ROOT_DIR / 'shelter_demand_model.json'
+SHARDED_MODEL_PATH = ROOT_DIR / 'shelter_demand_model_sharded.joblib'
+FAST_MODEL_PATH = ROOT_DIR / 'shelter_demand_model_fast.npz'
+FAST_MANIFEST_PATH = ROOT_DIR / 'shelter_demand_model_fast.json'
+COMPACT_FORMAT_VERSION = 1
+
+# "global" serves every sector from one model; "sharded" routes each request to its
+# sector's model trained by `python mlmodel.py --sharded`
+MODEL_MODE = os.environ.get('SHELTER_MODEL_MODE', 'global')
+
+class CompactTreeEnsemble:
+    """
+    Numpy-only predictor for a HistGradientBoostingRegressor exported by mlmodel.py.
+
+    All trees are walked together, one level per step, over the (row, tree) pairs
+    that have not reached a leaf yet; pairs drop out as their leaf is found, so a step
+    costs the number of paths still that deep rather than rows x trees. Rows are
+    processed in chunks to keep the working set in cache.
+    """
+
+    CHUNK_ROWS = 1024
+
+    def __init__(self, arrays: dict):
+        self.value = arrays['node_value']
+        self.feature = arrays['node_feature']
+        self.threshold = arrays['node_threshold']
+        self.missing_left = arrays['node_missing_left']
+        self.is_leaf = arrays['node_is_leaf']
+        self.tree_roots = arrays['tree_roots']
+        self.baseline = float(arrays['baseline'])
+
+        # Training sample counts per node (artifacts from before attributions lack them)
+        self.count = arrays.get('node_count')
+        self.bias = None
+        self.node_contributions = None
+
+        self.child_left = arrays['node_left']
+        self.child_right = arrays['node_right']
+        # Next node of a split, indexed by 2 * node + go_left
+        self.next_node = np.stack([self.child_right, self.child_left], axis=1).ravel().astype(np.int32)
+        self.root_is_split = ~self.is_leaf[self.tree_roots]
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompactTreeEnsemble":
+        """Builds the same flat arrays mlmodel.export_compact_artifact writes, in memory"""
+        trees = [predictors[0] for predictors in model._predictors]
+        tree_sizes = np.array([len(tree.nodes) for tree in trees])
+        tree_roots = np.concatenate([[0], np.cumsum(tree_sizes)[:-1]])
+        nodes = np.concatenate([tree.nodes for tree in trees])
+        offsets = np.repeat(tree_roots, tree_sizes)
+        return cls({
+            'node_value': nodes['value'].astype(np.float64),
+            'node_feature': nodes['feature_idx'].astype(np.int32),
+            'node_threshold': nodes['num_threshold'].astype(np.float64),
+            'node_missing_left': nodes['missing_go_to_left'].astype(bool),
+            'node_left': (nodes['left'] + offsets).astype(np.int32),
+            'node_right': (nodes['right'] + offsets).astype(np.int32),
+            'node_is_leaf': nodes['is_leaf'].astype(bool),
+            'node_count': nodes['count'].astype(np.int64),
+            'tree_roots': tree_roots.astype(np.int32),
+            'baseline': np.float64(np.ravel(model._baseline_prediction)[0]),
+        })
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.tree_roots)
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (rows, trees)"""
+        X = np.asarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        leaves = np.empty((n_rows, self.n_trees), dtype=np.int32)
+        has_missing = bool(np.isnan(X).any())
+        for start in range(0, n_rows, self.CHUNK_ROWS):
+            flat = X[start:start + self.CHUNK_ROWS].ravel()
+            n_chunk = len(flat) // n_features
+            nodes = np.tile(self.tree_roots, n_chunk)
+            row_offsets = np.repeat(np.arange(n_chunk) * n_features, self.n_trees)
+            active = np.flatnonzero(np.tile(self.root_is_split, n_chunk))
+            while len(active):
+                current = nodes[active]
+                x = flat[row_offsets[active] + self.feature[current]]
+                go_left = x <= self.threshold[current]
+                if has_missing:
+                    go_left |= np.isnan(x) & self.missing_left[current]
+                current = self.next_node[2 * current + go_left]
+                nodes[active] = current
+                active = active[~self.is_leaf[current]]
+            leaves[start:start + n_chunk] = nodes.reshape(n_chunk, self.n_trees)
+        return leaves
+
+    def predict(self, X) -> np.ndarray:
+        return self.value[self.apply(X)].sum(axis=1) + self.baseline
+
+    def prepare_explanations(self, n_features: int):
+        """
+        Precomputes the tree-path decomposition (Saabas) of every node.
+
+        A node's expected value is the count-weighted mean of its leaves. Walking from a
+        root to a leaf, each split moves the expectation by (child - parent), credited to
+        the split feature; the per-node running sums are stored so explaining a row only
+        gathers one vector per tree. Nodes are stored parents-first within each tree.
+        """
+        if self.count is None:
+            raise ValueError("Model artifact has no node counts; retrain to enable explanations")
+        internal = np.flatnonzero(~self.is_leaf)
+        weights = self.count.astype(np.float64)
+
+        expected = self.value.copy()
+        for node in internal[::-1]:
+            left, right = self.child_left[node], self.child_right[node]
+            total = weights[left] + weights[right]
+            expected[node] = (expected[left] * weights[left] + expected[right] * weights[right]) / total
+
+        contributions = np.zeros((len(self.value), n_features))
+        for node in internal:
+            for child in (self.child_left[node], self.child_right[node]):
+                contributions[child] = contributions[node]
+                contributions[child, self.feature[node]] += expected[child] - expected[node]
+
+        self.bias = self.baseline + expected[self.tree_roots].sum()
+        self.node_contributions = contributions
+
+    def explain(self, X) -> np.ndarray:
+        """Per-feature contributions, shape (rows, features); each row sums to prediction - bias"""
+        leaves = self.apply(X)
+        # Gather (rows, trees, features) in row chunks to bound the temporary array
+        chunk = max(1, 2 ** 20 // (self.n_trees * self.node_contributions.shape[1]))
+        return np.concatenate([
+            self.node_contributions[leaves[start:start + chunk]].sum(axis=1)
+            for start in range(0, len(leaves), chunk)
+        ]) if len(leaves) else np.zeros((0, self.node_contributions.shape[1]))
+
+def load_compact_artifact(npz_path: Path, manifest_path: Path) -> dict:
+    """
+    Loads the .npz + JSON manifest model format written by mlmodel.py.
+
+    Returns:
+        dict: Same keys as the joblib pipeline ('model', 'feature_columns', 'X_numeric_mean')
+              plus the parsed 'manifest'.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != COMPACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format version: {manifest.get('format_version')}")
+
+    raw = Path(npz_path).read_bytes()
+    if hashlib.sha256(raw).hexdigest() != manifest['content_sha256']:
+        raise ValueError(f"Content hash mismatch for {npz_path}")
+
+    with np.load(npz_path, allow_pickle=False) as npz:
+        arrays = {key: npz[key] for key in npz.files}
+
+    feature_columns = manifest['feature_columns']
+    feature_means = arrays['feature_means']
+    numeric = ~np.isnan(feature_means)
+    return {
+        'model': CompactTreeEnsemble(arrays),
+        'feature_columns': feature_columns,
+        'X_numeric_mean': pd.Series(feature_means[numeric], index=np.array(feature_columns)[numeric]),
+        'manifest': manifest,
+    }
+
+# Tree-path explainers, prepared at load so an explained request only gathers precomputed vectors
+def build_explainer(fitted_model, n_features: int) -> CompactTreeEnsemble:
+    explainer = fitted_model if isinstance(fitted_model, CompactTreeEnsemble) else CompactTreeEnsemble.from_sklearn(fitted_model)
+    explainer.prepare_explanations(n_features)
+    return explainer
+
+# Optional fast tier: a small model distilled from the full one (mlmodel.py --fast-tier)
+# for callers that trade a little accuracy for latency. It ignores SHELTER_MODEL_MODE.
+MODEL_TIERS = ("full", "fast")
+
+# Key of the model loaded from the project folder (other keys come from the model registry)
+DEFAULT_MODEL_KEY = "default"
+
+class ModelBundle:
+    """
+    Everything served from one set of model artifacts: the full model (compact artifact
+    if present, joblib pickle otherwise), the optional sharded and fast tiers, their
+    explainers and the drift monitor for the training distribution.
+
+    Request handlers read `active_bundle` once and pass that object down, so replacing
+    `active_bundle` (one reference assignment) swaps models atomically: requests in
+    flight finish on the bundle they started with.
+
+    Registry models (`isolated`, another region's model) read weather tables from their
+    own folder and have no occupancy history; the default model uses the service's
+    (a retrained default model gets its weather tables attached before the swap).
+    """
+
+    def __init__(self, directory: Path, mode: str = MODEL_MODE, key: str = DEFAULT_MODEL_KEY,
+                 isolated: bool = False):
+        self.directory = Path(directory)
+        self.mode = mode
+        self.key = key
+        compact_path = self.directory / COMPACT_MODEL_PATH.name
+        manifest_path = self.directory / COMPACT_MANIFEST_PATH.name
+        if compact_path.exists() and manifest_path.exists():
+            self.pipeline = load_compact_artifact(compact_path, manifest_path)
+            self.format = "compact"
+            self.hash = self.pipeline['manifest']['content_sha256']
+        else:
+            joblib_path = self.directory / MODEL_PATH.name
+            self.pipeline = joblib.load(str(joblib_path))
+            self.format = "joblib"
+            self.hash = hashlib.sha256(joblib_path.read_bytes()).hexdigest()
+        self.model = self.pipeline['model']
+        self.feature_columns = self.pipeline['feature_columns']
+        self.X_numeric_mean = self.pipeline['X_numeric_mean']
+        self.metrics = self.pipeline.get('manifest', {}).get('metrics', {})
+        self.sectors = [col.replace('SECTOR_', '') for col in self.feature_columns if col.startswith('SECTOR_')]
+        print(f"✓ Model loaded successfully ({self.format})")
+
+        self.sharded_pipeline = None
+        self.sharded_hash = None
+        if mode == 'sharded':
+            sharded_path = self.directory / SHARDED_MODEL_PATH.name
+            self.sharded_pipeline = joblib.load(str(sharded_path))
+            self.sharded_hash = hashlib.sha256(sharded_path.read_bytes()).hexdigest()
+            print(f"✓ Sharded models loaded for: {', '.join(self.sharded_pipeline['models'])}")
+
+        self.fast_pipeline = self.load_fast_tier()
+        self.explainers = self.build_explainers()
+        self.drift_monitor = None
+        drift_path = self.directory / DRIFT_REFERENCE_PATH.name
+        if drift_path.exists():
+            try:
+                self.drift_monitor = load_drift_monitor(drift_path)
+                print(f"✓ Drift reference loaded ({drift_path.name})")
+            except Exception as e:
+                print(f"⚠ Warning: Could not load drift reference: {e}")
+        self.own_weather = load_weather_tables(self.directory) if isolated else None
+        self.history = {} if isolated else sector_history
+        self.loaded_at = datetime.now().isoformat()
+
+    @property
+    def weather(self) -> list:
+        """(source, WeatherTable) pairs used for this model's weather lookups"""
+        return weather_tables if self.own_weather is None else self.own_weather
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated resident size: the numpy arrays of the compact models, explainers and own
+        weather tables, plus the file size of pickled (joblib) models.
+        """
+        arrays = {}
+        objects = [self.model, *self.explainers.values(), *(table for _, table in self.own_weather or [])]
+        if self.fast_pipeline is not None:
+            objects.append(self.fast_pipeline['model'])
+        for obj in objects:
+            for value in vars(obj).values():
+                if isinstance(value, np.ndarray):
+                    arrays[id(value)] = value.nbytes
+        total = sum(arrays.values())
+        if self.format == "joblib":
+            total += (self.directory / MODEL_PATH.name).stat().st_size
+        if self.sharded_pipeline is not None:
+            total += (self.directory / SHARDED_MODEL_PATH.name).stat().st_size
+        return total
+
+    def load_fast_tier(self) -> Optional[dict]:
+        npz_path = self.directory / FAST_MODEL_PATH.name
+        manifest_path = self.directory / FAST_MANIFEST_PATH.name
+        if not (npz_path.exists() and manifest_path.exists()):
+            return None
+        try:
+            candidate = load_compact_artifact(npz_path, manifest_path)
+            if candidate['feature_columns'] != self.feature_columns:
+                raise ValueError("feature columns differ from the full model")
+            if self.format == "compact" and candidate['manifest'].get('teacher_sha256') != self.hash:
+                raise ValueError("distilled from a different model (retrain with --fast-tier)")
+            print(f"✓ Fast model tier loaded ({candidate['model'].n_trees} trees)")
+            return candidate
+        except Exception as e:
+            print(f"⚠ Warning: Fast model tier not loaded: {e}")
+            return None
+
+    def build_explainers(self) -> dict:
+        """Explainers keyed None (global model), by sector (sharded mode) and 'fast'"""
+        explainers = {}
+        try:
+            if self.sharded_pipeline is None:
+                explainers[None] = build_explainer(self.model, len(self.feature_columns))
+            else:
+                for sector, sector_model in self.sharded_pipeline['models'].items():
+                    explainers[sector] = build_explainer(sector_model, len(self.sharded_pipeline['feature_columns']))
+            if self.fast_pipeline is not None:
+                explainers["fast"] = build_explainer(self.fast_pipeline['model'], len(self.feature_columns))
+            print("✓ Feature attributions ready")
+        except Exception as e:
+            explainers = {}
+            print(f"⚠ Warning: Feature attributions unavailable: {e}")
+        return explainers
+
+    def available_tiers(self) -> list:
+        return ["full", "fast"] if self.fast_pipeline is not None else ["full"]
+
+    def tier_info(self) -> dict:
+        """Trees plus the accuracy and latency recorded at training time for every loaded tier"""
+        n_trees = self.model.n_trees if isinstance(self.model, CompactTreeEnsemble) else int(self.model.n_iter_)
+        tiers = {"full": {"n_trees": n_trees, "metrics": self.metrics}}
+        if self.fast_pipeline is not None:
+            tiers["fast"] = {"n_trees": self.fast_pipeline['model'].n_trees,
+                             "metrics": self.fast_pipeline['manifest'].get('metrics', {})}
+        return tiers
+
+# Recent occupancy history (feeds the rolling-average features at serving time)
+HISTORY_PATH = Path(os.environ.get('SHELTER_HISTORY_PATH', ROOT_DIR / 'recent_history.json'))
+ROLLING_WINDOWS = (7, 30)
+ROLLING_FEATURES = tuple(f'occupancy_{window}day_rolling_avg' for window in ROLLING_WINDOWS)
+
+class SectorHistory:
+    """
+    Fixed-size ring buffer of one sector's most recent daily counts.
+
+    Keeps a running sum per rolling window, so appending a day and reading a
+    rolling average are both O(1). Like the training features, windows count the
+    last N recorded days (rows), not calendar days.
+    """
+
+    def __init__(self, windows=ROLLING_WINDOWS):
+        self.windows = tuple(windows)
+        self.capacity = max(self.windows)
+        self.values = [0] * self.capacity
+        self.dates = [None] * self.capacity
+        self.head = 0  # next write position
+        self.size = 0
+        self.sums = {window: 0 for window in self.windows}
+
+    @property
+    def last_date(self):
+        return self.dates[(self.head - 1) % self.capacity] if self.size else None
+
+    def append(self, date: str, count: int):
+        """Adds a day's count; re-sending the latest date replaces it, older dates are rejected."""
+        if self.size and date < self.last_date:
+            raise ValueError(f"Date {date} is older than the latest recorded date {self.last_date}")
+
+        if self.size and date == self.last_date:
+            latest = (self.head - 1) % self.capacity
+            for window in self.windows:
+                self.sums[window] += count - self.values[latest]
+            self.values[latest] = count
+            return
+
+        for window in self.windows:
+            if self.size >= window:
+                self.sums[window] -= self.values[(self.head - window) % self.capacity]
+            self.sums[window] += count
+        self.values[self.head] = count
+        self.dates[self.head] = date
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def rolling_mean(self, window: int) -> Optional[float]:
+        n = min(self.size, window)
+        return self.sums[window] / n if n else None
+
+    def to_list(self) -> list:
+        """Recorded days, oldest first."""
+        start = (self.head - self.size) % self.capacity
+        positions = [(start + i) % self.capacity for i in range(self.size)]
+        return [{"date": self.dates[i], "count": self.values[i]} for i in positions]
+
+# One buffer per served sector; kept across model swaps
+sector_history = {}
+
+def track_sectors(sectors: list):
+    for sector in sectors:
+        sector_history.setdefault(sector, SectorHistory())
+
+def load_history(path: Path):
+    """Replays a persisted history file into the ring buffers."""
+    with open(path) as f:
+        persisted = json.load(f)
+    for sector, days in persisted.items():
+        if sector in sector_history:
+            for day in days:
+                # Normalized: files from older versions may hold unpadded dates ("2025-1-5")
+                date = datetime.strptime(day['date'], "%Y-%m-%d").date().isoformat()
+                sector_history[sector].append(date, day['count'])
+
+def save_history(path: Path):
+    """Writes the ring buffers atomically (temp file + rename)."""
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({sector: history.to_list() for sector, history in sector_history.items()}, f)
+    os.replace(tmp_path, path)
+
+# Weather lookup tables (written by mlmodel.py): observed days, then an optional forecast
+WEATHER_TABLE_PATH = ROOT_DIR / 'weather_table.npz'
+WEATHER_FORECAST_PATH = ROOT_DIR / 'weather_forecast.npz'
+
+class WeatherTable:
+    """Date-indexed daily weather; row i is the day with ordinal `start_ordinal + i`."""
+
+    def __init__(self, path: Path):
+        self.content_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+        with np.load(path, allow_pickle=False) as npz:
+            self.start_ordinal = int(npz['start_ordinal'])
+            self.columns = [str(col) for col in npz['columns']]
+            self.values = npz['values']
+
+    def lookup(self, date_obj) -> Optional[dict]:
+        """Weather for a date in O(1), or None if the date is outside the table or has no temperatures."""
+        i = date_obj.toordinal() - self.start_ordinal
+        if i < 0 or i >= len(self.values):
+            return None
+        row = dict(zip(self.columns, self.values[i]))
+        if np.isnan(row.get('Min Temp (°C)', np.nan)):
+            return None
+        return row
+
+def load_weather_tables(directory: Path = ROOT_DIR) -> list:
+    """(source, WeatherTable) pairs for the tables present in `directory`, observed first"""
+    tables = []
+    for source, name in (("observed", WEATHER_TABLE_PATH.name), ("forecast", WEATHER_FORECAST_PATH.name)):
+        path = Path(directory) / name
+        if path.exists():
+            try:
+                tables.append((source, WeatherTable(path)))
+                print(f"✓ {source.capitalize()} weather table loaded ({path.name})")
+            except Exception as e:
+                print(f"⚠ Warning: Could not load {path.name}: {e}")
+    return tables
+
+# Tables loaded at startup; a promoted retrained model carries its own (ModelBundle.own_weather)
+weather_tables = load_weather_tables()
+
+def lookup_weather(date_obj, tables: Optional[list] = None):
+    """
+    Returns (weather dict, source) for a date from the observed table, then the forecast table.
+
+    Returns (None, None) when neither table covers the date. `tables` defaults to the
+    service's tables (pass `bundle.weather` for a registry model).
+    """
+    for source, table in (weather_tables if tables is None else tables):
+        weather = table.lookup(date_obj)
+        if weather is not None:
+            return weather, source
+    return None, None
+
+# Drift monitor: constant-memory streaming distributions of request features,
+# compared with the training reference written by mlmodel.py
+DRIFT_REFERENCE_PATH = ROOT_DIR / 'drift_reference.json'
+DRIFT_FORMAT_VERSION = 2  # must match mlmodel.DRIFT_FORMAT_VERSION
+MIN_DRIFT_SAMPLES = 30
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+class P2Quantile:
+    """
+    P-square streaming quantile estimate (Jain & Chlamtac, 1985).
+
+    Keeps five markers regardless of how many values are seen; each update is O(1).
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x: float):
+        q = self.heights
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return self.heights[round(self.p * (len(self.heights) - 1))]
+        return self.heights[2]
+
+class FeatureStream:
+    """Fixed-edge histogram, quantile sketches and range counters for one feature"""
+
+    def __init__(self, edges: list, quantiles: list, reference: dict):
+        self.edges = edges
+        self.reference = reference
+        self.counts = [0] * (len(edges) + 1)
+        self.sketches = [P2Quantile(p) for p in quantiles]
+        self.n = 0
+        self.out_of_range = 0
+
+    def update(self, x: float):
+        self.n += 1
+        self.counts[bisect.bisect_right(self.edges, x)] += 1
+        for sketch in self.sketches:
+            sketch.update(x)
+        if self.reference['count'] and not (self.reference['min'] <= x <= self.reference['max']):
+            self.out_of_range += 1
+
+    def report(self) -> dict:
+        psi = None
+        if self.n >= MIN_DRIFT_SAMPLES and self.reference['count']:
+            live = [count / self.n for count in self.counts]
+            psi = population_stability_index(self.reference['proportions'], live)
+        ref_q = self.reference['quantiles']
+        live_q = [sketch.value() for sketch in self.sketches]
+        median_shift = None
+        if ref_q and live_q[len(live_q) // 2] is not None:
+            # Median shift in units of the reference interquartile range
+            iqr = max(ref_q[-2] - ref_q[1], 1e-9)
+            median_shift = (live_q[len(live_q) // 2] - ref_q[len(ref_q) // 2]) / iqr
+        return {
+            "n": self.n,
+            "psi": psi,
+            "status": drift_status(psi),
+            "out_of_range_fraction": self.out_of_range / self.n if self.n else 0.0,
+            "median_shift_iqr": median_shift,
+            "live_quantiles": live_q,
+            "reference_quantiles": ref_q,
+            "reference_range": [self.reference['min'], self.reference['max']],
+        }
+
+def population_stability_index(expected: list, actual: list, eps: float = 1e-4) -> float:
+    """PSI between two binned distributions (< 0.1 stable, 0.1-0.25 moderate, > 0.25 significant)"""
+    return float(sum(
+        (a - e) * np.log(a / e)
+        for e, a in ((max(e, eps), max(a, eps)) for e, a in zip(expected, actual))
+    ))
+
+def drift_status(psi: Optional[float]) -> str:
+    if psi is None:
+        return "insufficient_data"
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+class DriftMonitor:
+    """
+    Streaming drift monitor over request features, overall and per sector.
+
+    Memory is fixed by the reference (features x scopes x bins); each recorded request
+    costs O(features) regardless of how many requests came before.
+    """
+
+    def __init__(self, reference: dict):
+        self.features = reference['features']
+        self.quantiles = reference['quantiles']
+        self.sector_reference = reference['sector_mix']
+        self.since = datetime.now().isoformat()
+        self.lock = threading.Lock()
+        self.sector_counts = {sector: 0 for sector in self.sector_reference}
+        self.streams = {
+            scope: {
+                col: FeatureStream(reference['edges'][col], self.quantiles, distributions[col])
+                for col in self.features
+            }
+            for scope, distributions in reference['reference'].items()
+        }
+
+    def update(self, sector: str, values: dict):
+        with self.lock:
+            if sector in self.sector_counts:
+                self.sector_counts[sector] += 1
+            for scope in ("all", sector):
+                streams = self.streams.get(scope)
+                if streams is None:
+                    continue
+                for col, stream in streams.items():
+                    value = values.get(col)
+                    if value is not None and not np.isnan(value):
+                        stream.update(float(value))
+
+    def report(self) -> dict:
+        with self.lock:
+            total = sum(self.sector_counts.values())
+            sector_psi = None
+            if total >= MIN_DRIFT_SAMPLES:
+                sector_psi = population_stability_index(
+                    [self.sector_reference[s] for s in self.sector_counts],
+                    [self.sector_counts[s] / total for s in self.sector_counts],
+                )
+            features = {
+                scope: {col: stream.report() for col, stream in streams.items()}
+                for scope, streams in self.streams.items()
+            }
+        scores = [sector_psi] + [f["psi"] for streams in features.values() for f in streams.values()]
+        scores = [score for score in scores if score is not None]
+        return {
+            "since": self.since,
+            "requests": total,
+            "status": drift_status(max(scores) if scores else None),
+            "sector_mix": {
+                "psi": sector_psi,
+                "status": drift_status(sector_psi),
+                "live": {s: (count / total if total else 0.0) for s, count in self.sector_counts.items()},
+                "reference": self.sector_reference,
+            },
+            "features": features,
+        }
+
+def load_drift_monitor(path: Path) -> Optional[DriftMonitor]:
+    with open(path) as f:
+        reference = json.load(f)
+    if reference.get('format_version') != DRIFT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported drift reference format {reference.get('format_version')}")
+    return DriftMonitor(reference)
 
 # Load model
 try:
-    loaded_model_pipeline = joblib.load(str(MODEL_PATH))
-    model = loaded_model_pipeline['model']
-    feature_columns = loaded_model_pipeline['feature_columns']
-    X_numeric_mean = loaded_model_pipeline['X_numeric_mean']
-    print("✓ Model loaded successfully")
+    active_bundle = ModelBundle(ROOT_DIR)
 except Exception as e:
     print(f"✗ Error loading model: {e}")
     raise
 
+track_sectors(active_bundle.sectors)
+if HISTORY_PATH.exists():
+    try:
+        load_history(HISTORY_PATH)
+        print(f"✓ Recent history loaded from {HISTORY_PATH.name}")
+    except Exception as e:
+        print(f"⚠ Warning: Could not load recent history: {e}")
+
+# Model registry: one service for several regions. Every subfolder of SHELTER_MODELS_DIR
+# holding mlmodel.py artifacts (`python mlmodel.py --data-dir ... --output-dir models/<key>`)
+# is a model served under the folder's name; an optional regions.json maps region names to
+# model keys. Models load on first use and stay in an LRU bounded by SHELTER_MODEL_MEMORY_MB.
+MODELS_DIR = Path(os.environ.get('SHELTER_MODELS_DIR', ROOT_DIR / 'models'))
+MODEL_MEMORY_BUDGET_BYTES = int(float(os.environ.get('SHELTER_MODEL_MEMORY_MB', '1024')) * 1024 * 1024)
+REGIONS_FILE = 'regions.json'
+REGISTRY_RESCAN_SECONDS = 5
+
+class ModelRegistry:
+    """
+    Lazily loaded, memory-budgeted models keyed by folder name (or region alias).
+
+    `get` loads a model on first use. Concurrent first requests for the same key wait on
+    that key's lock, so only one of them loads; other keys keep serving meanwhile. After a
+    load, least recently used models are evicted until the estimated total fits the budget
+    (the newest model always stays). Requests holding an evicted bundle finish on it.
+    """
+
+    def __init__(self, directory: Path, memory_budget_bytes: int):
+        self.directory = Path(directory)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.lock = threading.Lock()
+        self.load_locks = {}  # key -> lock held while that model loads
+        self.loaded = OrderedDict()  # key -> ModelBundle, least recently used first
+        self.available = {}  # key -> folder
+        self.aliases = {}  # region -> key
+        self.metrics = {}  # key -> load/hit/eviction counters
+        self.scanned_at = 0.0
+        self.scan()
+
+    def scan(self):
+        """Finds model folders and the region aliases"""
+        available = {}
+        if self.directory.is_dir():
+            for folder in sorted(self.directory.iterdir()):
+                has_compact = (folder / COMPACT_MODEL_PATH.name).exists() and (folder / COMPACT_MANIFEST_PATH.name).exists()
+                if folder.is_dir() and folder.name != DEFAULT_MODEL_KEY and (has_compact or (folder / MODEL_PATH.name).exists()):
+                    available[folder.name] = folder
+        aliases = {}
+        regions_path = self.directory / REGIONS_FILE
+        if regions_path.exists():
+            try:
+                with open(regions_path) as f:
+                    aliases = {str(region): str(key) for region, key in json.load(f).items()}
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"⚠ Warning: Could not read {regions_path.name}: {e}")
+        self.available, self.aliases = available, aliases
+        self.scanned_at = time.monotonic()
+
+    def resolve(self, name: str) -> str:
+        """Model key for a model key or region name; raises KeyError if neither is known"""
+        for attempt in range(2):
+            key = self.aliases.get(name, name)
+            if key in self.available:
+                return key
+            # New folders are picked up without a restart (rescans are rate-limited)
+            if attempt or time.monotonic() - self.scanned_at < REGISTRY_RESCAN_SECONDS:
+                break
+            self.scan()
+        raise KeyError(name)
+
+    def get(self, name: str) -> ModelBundle:
+        """The loaded model for a key or region, loading it (once) if needed"""
+        key = self.resolve(name)
+        with self.lock:
+            metrics = self.metrics.setdefault(key, {"loads": 0, "hits": 0, "evictions": 0,
+                                                    "last_load_ms": None, "total_load_ms": 0.0, "memory_bytes": None})
+            bundle = self.loaded.get(key)
+            if bundle is not None:
+                self.loaded.move_to_end(key)
+                metrics["hits"] += 1
+                return bundle
+            load_lock = self.load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self.lock:
+                bundle = self.loaded.get(key)
+                if bundle is not None:  # loaded by the request we waited for
+                    self.loaded.move_to_end(key)
+                    metrics["hits"] += 1
+                    return bundle
+            start = time.perf_counter()
+            bundle = ModelBundle(self.available[key], mode="global", key=key, isolated=True)
+            load_ms = (time.perf_counter() - start) * 1000
+            memory_bytes = bundle.memory_bytes()
+            with self.lock:
+                metrics.update(loads=metrics["loads"] + 1, last_load_ms=round(load_ms, 1),
+                               total_load_ms=round(metrics["total_load_ms"] + load_ms, 1), memory_bytes=memory_bytes)
+                self.loaded[key] = bundle
+                self.evict()
+            print(f"✓ Model '{key}' loaded in {load_ms:.0f} ms ({memory_bytes / 1024 / 1024:.1f} MB)")
+            return bundle
+
+    def loaded_bytes(self) -> int:
+        return sum(self.metrics[key]["memory_bytes"] for key in self.loaded)
+
+    def evict(self):
+        """Drops least recently used models until the budget is met (caller holds the lock)"""
+        while len(self.loaded) > 1 and self.loaded_bytes() > self.memory_budget_bytes:
+            key, _ = self.loaded.popitem(last=False)
+            self.metrics[key]["evictions"] += 1
+            print(f"Model '{key}' evicted (memory budget {self.memory_budget_bytes / 1024 / 1024:.0f} MB)")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loaded_bytes": self.loaded_bytes(),
+                "loaded": list(self.loaded),
+                "models": {
+                    key: {"loaded": key in self.loaded, **self.metrics.get(key, {"loads": 0})}
+                    for key in self.available
+                },
+                "regions": self.aliases,
+            }
+
+model_registry = ModelRegistry(MODELS_DIR, MODEL_MEMORY_BUDGET_BYTES)
+if model_registry.available:
+    print(f"✓ Model registry: {', '.join(model_registry.available)} (loaded on first use)")
+
 # Define request/response models
 class PredictionRequest(BaseModel):
     date: str  # Format: YYYY-MM-DD
     sector: str  # One of: Families, Men, Women, Youth, Mixed Adult
-    min_temp_celsius: float  # Minimum temperature in Celsius
+    min_temp_celsius: Optional[float] = None  # Minimum temperature in Celsius (optional for dates with known weather)
+    explain: bool = False  # Include per-feature contributions
+    tier: str = "full"  # "full" or "fast" (distilled, lower latency and slightly less accurate)
+    model: Optional[str] = None  # Model or region key from /api/models (default: the main model)
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -64,84 +856,533 @@ class PredictionResponse(BaseModel):
     sector: str
     min_temp_celsius: float
     predicted_shelter_demand: int
+    weather_source: str = "request"  # "request", "observed" or "forecast"
+    model_tier: str = "full"
+    model: Optional[str] = None  # Key of the model that answered
+    explanation: Optional[dict] = None  # Only with explain=true
     status: str = "success"
 
+class SweepRequest(BaseModel):
+    date: str  # Format: YYYY-MM-DD
+    sector: Optional[str] = None  # Omit for every sector
+    temp_min: float = -25
+    temp_max: float = 30
+    step: float = 1
+    tier: str = "full"  # "full" or "fast"
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "date": "2025-12-25",
+                "sector": "Families",
+                "temp_min": -25,
+                "temp_max": 30,
+                "step": 1
+            }
+        }
+    )
+
+class SweepResponse(BaseModel):
+    date: str
+    temperatures: list
+    curves: dict  # sector -> predicted demand per temperature
+    weather_source: str
+    model_tier: str = "full"
+    status: str = "success"
+
+MAX_SWEEP_POINTS = 1000
+MIN_SWEEP_STEP = 0.1  # Celsius
+
+class CapacitySimulationRequest(BaseModel):
+    start_date: str  # First day of the season, YYYY-MM-DD
+    days: int = 120
+    draws: int = 10000
+    sectors: Optional[list[str]] = None  # Omit for every sector
+    capacity: Optional[dict[str, float]] = None  # Beds per sector
+    total_capacity: Optional[float] = None  # Beds across the simulated sectors
+    jitter_days: int = 7  # Analog seasons are shifted by up to this many days
+    residual_sd: Optional[float] = None  # Daily model error sd (default: from the model's CV MAE)
+    seed: Optional[int] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "start_date": "2025-12-01",
+                "days": 120,
+                "draws": 10000,
+                "capacity": {"Men": 2600, "Families": 3200},
+                "total_capacity": 9500
+            }
+        }
+    )
+
+class HistoryObservation(BaseModel):
+    date: str  # Format: YYYY-MM-DD
+    sector: str
+    count: int  # Service users that night
+
+class HistoryIngestRequest(BaseModel):
+    observations: list[HistoryObservation]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "observations": [
+                    {"date": "2025-11-29", "sector": "Families", "count": 2710},
+                    {"date": "2025-11-30", "sector": "Families", "count": 2725}
+                ]
+            }
+        }
+    )
+
 class SectorInfo(BaseModel):
     sectors: list
     temperatures_range: dict
     sample_dates: list
+    model_tiers: dict  # tier -> trees and accuracy/latency metrics
+
+# Helper functions for prediction
+def build_feature_frame(date_str: str, sectors: list, temps: list, bundle: Optional[ModelBundle] = None) -> tuple:
+    """
+    Builds model input rows for one date, row i being (sectors[i], temps[i]).
+
+    A temperature of None uses the observed (or forecast) weather for the date; a given
+    temperature overrides the looked-up temperatures while precipitation and snow still
+    come from the lookup. Rolling occupancy comes from recent history, everything else
+    from the training means.
+
+    Returns:
+        tuple: (input DataFrame aligned with feature_columns, min temperature per row, weather source)
+    """
+    bundle = bundle or active_bundle
+    feature_columns = bundle.feature_columns
+    n_rows = len(sectors)
+    sectors = np.asarray(sectors)
+    date_obj = pd.to_datetime(date_str)
+
+    base = {}
+    for col in feature_columns:
+        if col.startswith('SECTOR_'):
+            base[col] = 0
+        elif col in bundle.X_numeric_mean.index:
+            base[col] = bundle.X_numeric_mean[col]
+        else:
+            base[col] = 0
+
+    # Weather features (observed/forecast lookup, training means otherwise)
+    weather, weather_source = lookup_weather(date_obj, bundle.weather)
+    if weather is not None:
+        for col, value in weather.items():
+            if col in base and not np.isnan(value):
+                base[col] = value
+
+    input_df = pd.DataFrame({col: np.full(n_rows, value, dtype=np.float64) for col, value in base.items()})
+
+    # Temperature features
+    requested = np.array([np.nan if t is None else t for t in temps], dtype=np.float64)
+    given = ~np.isnan(requested)
+    if not given.all():
+        if weather is None:
+            raise ValueError("min_temp_celsius is required for dates without observed or forecast weather")
+    else:
+        weather_source = "request"
+    min_temp = np.where(given, requested, input_df['Min Temp (°C)'])
+    mean_temp = requested + 2
+    for col, values in (
+        ('Min Temp (°C)', requested),
+        ('Max Temp (°C)', requested + 5),
+        ('Mean Temp (°C)', mean_temp),
+        ('Heat Deg Days (°C)', np.maximum(0, 18 - mean_temp)),
+        ('Cool Deg Days (°C)', np.maximum(0, mean_temp - 18)),
+    ):
+        input_df[col] = np.where(given, values, input_df[col])
+
+    # Date features
+    input_df['day_of_week'] = date_obj.dayofweek
+    input_df['day_of_month'] = date_obj.day
+    input_df['month'] = date_obj.month
+    input_df['year'] = date_obj.year
+    input_df['week_of_year'] = date_obj.isocalendar().week
+    input_df['day_of_year'] = date_obj.dayofyear
+
+    # Rolling occupancy from recent history (training means until history is ingested)
+    for sector in np.unique(sectors):
+        history = bundle.history.get(sector)
+        if history is not None and history.size:
+            rows = sectors == sector
+            for col, window in (('occupancy_7day_rolling_avg', 7), ('occupancy_30day_rolling_avg', 30)):
+                values = input_df[col].to_numpy(copy=True)
+                values[rows] = history.rolling_mean(window)
+                input_df[col] = values
+
+    # Economic & Environmental features
+    input_df['is_payday'] = int((date_obj.day == 1) | (date_obj.day == 15))
+    input_df['extreme_cold_alert'] = (min_temp < -15).astype(int)
+
+    # Set sector
+    for col in feature_columns:
+        if col.startswith('SECTOR_'):
+            input_df[col] = (sectors == col.replace('SECTOR_', '')).astype(int)
+
+    # Align with model features
+    return input_df[feature_columns], min_temp, weather_source
+
+def predict_frame(input_df: pd.DataFrame, sectors: list, tier: str = "full",
+                  bundle: Optional[ModelBundle] = None) -> np.ndarray:
+    """
+    Scores a feature frame in one call (sharded mode: one call per sector's model).
+
+    sklearn models run single rows with the 'single' native thread count and larger frames
+    with 'batch'. The compact ensemble is plain numpy with no native thread pool, so it
+    runs without the (per-call) threadpoolctl limit. The 'fast' tier always uses the
+    single distilled model.
+    """
+    bundle = bundle or active_bundle
+    sharded_pipeline = bundle.sharded_pipeline
+    mode = 'single' if len(input_df) == 1 else 'batch'
+    if tier == "fast" or sharded_pipeline is None:
+        model = bundle.fast_pipeline['model'] if tier == "fast" else bundle.model
+        if isinstance(model, CompactTreeEnsemble):
+            return model.predict(input_df)
+        with thread_config.limit_threads(mode, workers=SERVING_WORKERS):
+            return model.predict(input_df)
+
+    sectors = np.asarray(sectors)
+    predictions = np.empty(len(input_df))
+    with thread_config.limit_threads(mode, workers=SERVING_WORKERS):
+        for sector in np.unique(sectors):
+            rows = sectors == sector
+            shard_input = input_df.loc[rows, sharded_pipeline['feature_columns']]
+            predictions[rows] = sharded_pipeline['models'][sector].predict(shard_input)
+    return predictions
+
+# Feature groups reported with explanations
+EXPLANATION_GROUPS = {
+    'temperature': ['Max Temp (°C)', 'Min Temp (°C)', 'Mean Temp (°C)', 'Heat Deg Days (°C)',
+                    'Cool Deg Days (°C)', 'extreme_cold_alert'],
+    'precipitation': ['Total Precip (mm)', 'Snow on Grnd (cm)'],
+    'calendar': ['day_of_week', 'day_of_month', 'month', 'year', 'week_of_year', 'day_of_year', 'is_payday'],
+    'rolling_averages': ['occupancy_7day_rolling_avg', 'occupancy_30day_rolling_avg'],
+}
+
+def feature_group(col: str) -> str:
+    if col.startswith('SECTOR_'):
+        return 'sector'
+    for group, columns in EXPLANATION_GROUPS.items():
+        if col in columns:
+            return group
+    return 'system_context'  # shelter flow, intake calls and demographics
 
-# Helper function for prediction
-def get_live_prediction(date_str: str, sector: str, temp: float) -> dict:
+def explain_frame(input_df: pd.DataFrame, sectors: list, tier: str = "full",
+                  bundle: Optional[ModelBundle] = None) -> list:
+    """
+    Tree-path feature attributions for every row (vectorized per model).
+
+    Returns:
+        list: One dict per row with the model's 'baseline', the raw 'prediction'
+              (baseline + all contributions), contributions per feature 'group' and the
+              non-zero per-'features' contributions, largest first.
+    """
+    bundle = bundle or active_bundle
+    explainers = bundle.explainers
+    if not explainers:
+        raise ValueError("Feature attributions are not available for this model")
+    sectors = np.asarray(sectors)
+    if tier == "fast":
+        batches = [(explainers["fast"], np.ones(len(input_df), dtype=bool), bundle.feature_columns)]
+    elif bundle.sharded_pipeline is None:
+        batches = [(explainers[None], np.ones(len(input_df), dtype=bool), bundle.feature_columns)]
+    else:
+        batches = [
+            (explainers[sector], sectors == sector, bundle.sharded_pipeline['feature_columns'])
+            for sector in np.unique(sectors)
+        ]
+
+    explanations = [None] * len(input_df)
+    for explainer, rows, columns in batches:
+        contributions = explainer.explain(input_df.loc[rows, columns])
+        for i, row in zip(np.flatnonzero(rows), contributions):
+            groups = {}
+            for col, value in zip(columns, row):
+                groups[feature_group(col)] = groups.get(feature_group(col), 0.0) + float(value)
+            order = np.argsort(-np.abs(row))
+            explanations[i] = {
+                "baseline": explainer.bias,
+                "prediction": explainer.bias + float(row.sum()),
+                "groups": groups,
+                "features": {columns[j]: float(row[j]) for j in order if row[j] != 0},
+            }
+    return explanations
+
+def get_live_prediction(date_str: str, sector: str, temp: Optional[float] = None, monitor: bool = False,
+                        explain: bool = False, tier: str = "full", bundle: Optional[ModelBundle] = None) -> dict:
     """
     Provides a real-time shelter demand prediction based on input date, sector, and minimum temperature.
     
     Args:
         date_str: Date in 'YYYY-MM-DD' format
         sector: The shelter sector (e.g., 'Families', 'Men', 'Women', 'Youth', 'Mixed Adult')
-        temp: Minimum temperature in Celsius for the day
+        temp: Minimum temperature in Celsius for the day. When omitted, the observed (or
+              forecast) weather for the date is used; when given, it overrides the looked-up
+              temperatures while precipitation and snow still come from the lookup.
+        monitor: Record the input features in the drift monitor (live requests only,
+                 not warm-up or internal calls)
+        explain: Add per-feature contributions ('explanation')
+        tier: 'full' model or the distilled 'fast' tier
+        bundle: Models to use (default: the active bundle)
     
     Returns:
         dict: Prediction result with date, sector, temperature, and predicted demand
     """
+    bundle = bundle or active_bundle
     try:
-        input_data = {}
-        for col in feature_columns:
-            if col.startswith('SECTOR_'):
-                input_data[col] = False
-            elif col in X_numeric_mean.index:
-                input_data[col] = X_numeric_mean[col]
-            else:
-                input_data[col] = 0
-
-        input_df = pd.DataFrame([input_data])
-        date_obj = pd.to_datetime(date_str)
-
-        # Temperature features
-        input_df['Min Temp (°C)'] = temp
-        input_df['Max Temp (°C)'] = temp + 5
-        input_df['Mean Temp (°C)'] = temp + 2
-        input_df['Heat Deg Days (°C)'] = max(0, 18 - input_df['Mean Temp (°C)'].iloc[0])
-        input_df['Cool Deg Days (°C)'] = max(0, input_df['Mean Temp (°C)'].iloc[0] - 18)
-
-        # Date features
-        input_df['day_of_week'] = date_obj.dayofweek
-        input_df['day_of_month'] = date_obj.day
-        input_df['month'] = date_obj.month
-        input_df['year'] = date_obj.year
-        input_df['week_of_year'] = date_obj.isocalendar().week
-        input_df['day_of_year'] = date_obj.dayofyear
-
-        # Economic & Environmental features
-        input_df['is_payday'] = int((date_obj.day == 1) | (date_obj.day == 15))
-        input_df['extreme_cold_alert'] = int(temp < -15)
-
-        # Set sector
-        sector_col_name = f'SECTOR_{sector}'
-        if sector_col_name in input_df.columns:
-            input_df[sector_col_name] = True
-
-        # Align with model features
-        input_df = input_df[feature_columns]
-
-        # Convert boolean to int
-        for col in input_df.columns:
-            if input_df[col].dtype == 'bool':
-                input_df[col] = input_df[col].astype(int)
+        input_df, min_temp, weather_source = build_feature_frame(date_str, [sector], [temp], bundle)
+        drift_monitor = bundle.drift_monitor
+        if monitor and drift_monitor is not None:
+            row = input_df.iloc[0]
+            history = bundle.history.get(sector)
+            # Without ingested history the rolling averages are training means, not live data
+            skipped = () if history is not None and history.size else ROLLING_FEATURES
+            drift_monitor.update(sector, {col: row[col] for col in drift_monitor.features if col not in skipped})
 
-        # Make prediction
-        prediction = model.predict(input_df)[0]
+        # Make prediction (sharded mode routes to the sector's own model)
+        prediction = predict_frame(input_df, [sector], tier, bundle)[0]
 
-        return {
+        result = {
             "date": date_str,
             "sector": sector,
-            "min_temp_celsius": temp,
-            "predicted_shelter_demand": round(prediction)
+            "min_temp_celsius": float(min_temp[0]),
+            "predicted_shelter_demand": round(prediction),
+            "weather_source": weather_source,
+            "model_tier": tier,
+            "model": bundle.key
         }
+        if explain:
+            result["explanation"] = explain_frame(input_df, [sector], tier, bundle)[0]
+        return result
     
     except Exception as e:
         raise ValueError(f"Prediction error: {str(e)}")
 
+def get_temperature_sweep(date_str: str, sectors: list, temperatures: np.ndarray, tier: str = "full",
+                          bundle: Optional[ModelBundle] = None) -> dict:
+    """
+    Predicts demand across a range of minimum temperatures for one date.
+
+    All (sector, temperature) pairs are scored in a single vectorized predict.
+
+    Returns:
+        dict: Temperatures and one demand curve per sector
+    """
+    row_sectors = np.repeat(sectors, len(temperatures))
+    row_temps = np.tile(temperatures, len(sectors))
+    bundle = bundle or active_bundle
+    input_df, _, weather_source = build_feature_frame(date_str, row_sectors, row_temps, bundle)
+    predictions = np.round(predict_frame(input_df, row_sectors, tier, bundle)).astype(int).reshape(len(sectors), len(temperatures))
+    return {
+        "date": date_str,
+        "temperatures": temperatures.tolist(),
+        "curves": {sector: predictions[i].tolist() for i, sector in enumerate(sectors)},
+        "weather_source": weather_source,
+        "model_tier": tier
+    }
+
+# Monte Carlo capacity simulation over historical weather (sampling and summary in capacity_sim.py)
+MAX_SIMULATION_DRAWS = 100000
+MAX_SIMULATION_DAYS = 366
+SIMULATION_CHUNK_ROWS = 100000
+
+def score_analog_seasons(season_start, n_days: int, sectors: list, starts: np.ndarray,
+                         bundle: Optional[ModelBundle] = None) -> np.ndarray:
+    """
+    Predicted demand when the season replays the observed weather from each analog start.
+
+    Rows are ordered (start, day, sector) and built and scored in chunks of about
+    SIMULATION_CHUNK_ROWS rows. Calendar features follow the simulated dates; weather
+    comes from the analog days; everything else is filled as in build_feature_frame.
+
+    Returns:
+        np.ndarray: Demand of shape (len(starts), n_days, len(sectors)).
+    """
+    bundle = bundle or active_bundle
+    feature_columns = bundle.feature_columns
+    table = dict(bundle.weather).get("observed")
+    if table is None:
+        raise ValueError("The observed weather table is required for simulation")
+    col_index = {col: j for j, col in enumerate(feature_columns)}
+    n_sectors = len(sectors)
+    sectors = np.asarray(sectors)
+
+    base = np.array([
+        0.0 if col.startswith('SECTOR_') else float(bundle.X_numeric_mean.get(col, 0.0))
+        for col in feature_columns
+    ])
+    dates = pd.date_range(pd.Timestamp(season_start), periods=n_days)
+    calendar = {
+        'day_of_week': dates.dayofweek.to_numpy(),
+        'day_of_month': dates.day.to_numpy(),
+        'month': dates.month.to_numpy(),
+        'year': dates.year.to_numpy(),
+        'week_of_year': dates.isocalendar().week.to_numpy(dtype=np.int64),
+        'day_of_year': dates.dayofyear.to_numpy(),
+        'is_payday': np.isin(dates.day.to_numpy(), (1, 15)).astype(int),
+    }
+    # Per-sector rows: one-hot and rolling occupancy from recent history
+    sector_rows = np.tile(base, (n_sectors, 1))
+    for i, sector in enumerate(sectors):
+        if f'SECTOR_{sector}' in col_index:
+            sector_rows[i, col_index[f'SECTOR_{sector}']] = 1
+        history = bundle.history.get(sector)
+        if history is not None and history.size:
+            for col, window in (('occupancy_7day_rolling_avg', 7), ('occupancy_30day_rolling_avg', 30)):
+                sector_rows[i, col_index[col]] = history.rolling_mean(window)
+
+    day_offsets = np.arange(n_days)
+    starts_per_chunk = max(1, SIMULATION_CHUNK_ROWS // (n_days * n_sectors))
+    demand = np.empty((len(starts), n_days, n_sectors))
+    for first in range(0, len(starts), starts_per_chunk):
+        chunk = starts[first:first + starts_per_chunk]
+        X = np.broadcast_to(sector_rows, (len(chunk), n_days, n_sectors, len(base))).copy()
+
+        weather = table.values[(chunk[:, None] + day_offsets[None, :]) - table.start_ordinal]
+        for j, col in enumerate(table.columns):
+            if col in col_index:
+                values = weather[:, :, j][:, :, None]
+                current = X[:, :, :, col_index[col]]
+                X[:, :, :, col_index[col]] = np.where(np.isnan(values), current, values)
+        for col, values in calendar.items():
+            if col in col_index:
+                X[:, :, :, col_index[col]] = values[None, :, None]
+        if 'extreme_cold_alert' in col_index:
+            X[:, :, :, col_index['extreme_cold_alert']] = X[:, :, :, col_index['Min Temp (°C)']] < -15
+
+        rows = X.reshape(-1, len(base))
+        row_sectors = np.tile(sectors, len(chunk) * n_days)
+        predictions = predict_frame(pd.DataFrame(rows, columns=feature_columns), row_sectors, bundle=bundle)
+        demand[first:first + len(chunk)] = predictions.reshape(len(chunk), n_days, n_sectors)
+    return demand
+
+def run_capacity_simulation(season_start, n_days: int, draws: int, sectors: Optional[list] = None,
+                            capacity: Optional[dict] = None, total_capacity: Optional[float] = None,
+                            jitter_days: int = 7, residual_sd: Optional[float] = None,
+                            seed: Optional[int] = None, bundle: Optional[ModelBundle] = None) -> dict:
+    """
+    Monte Carlo demand distribution for a season (see capacity_sim.simulate_capacity).
+
+    residual_sd defaults to the model's cross-validated MAE (the holdout MAE for a model from
+    mlmodel.py --update, which records no CV metrics) converted to a normal standard deviation
+    (MAE * sqrt(pi / 2)), or 0 when the model carries no metrics.
+    """
+    bundle = bundle or active_bundle
+    table = dict(bundle.weather).get("observed")
+    if table is None:
+        raise ValueError("The observed weather table is required for simulation")
+    if sectors is None:
+        sectors = bundle.sectors
+    if residual_sd is None:
+        mae = bundle.metrics.get('cv_mae')
+        if mae is None:
+            mae = bundle.metrics.get('holdout_mae')
+        residual_sd = float(mae) * np.sqrt(np.pi / 2) if mae is not None else 0.0
+
+    starts = capacity_sim.analog_starts(season_start, n_days, table.start_ordinal, len(table.values), jitter_days)
+    return capacity_sim.simulate_capacity(
+        lambda analog: score_analog_seasons(season_start, n_days, sectors, analog, bundle),
+        starts, season_start, n_days, sectors, draws=draws, capacity=capacity,
+        total_capacity=total_capacity, residual_sd=residual_sd, seed=seed,
+    )
+
+# Admission control: bounded concurrency with a bounded wait queue
+MAX_CONCURRENCY = int(os.environ.get('SHELTER_MAX_CONCURRENCY', '4'))
+MAX_QUEUE = int(os.environ.get('SHELTER_MAX_QUEUE', '32'))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('SHELTER_QUEUE_TIMEOUT', '5'))
+RETRY_AFTER_SECONDS = int(os.environ.get('SHELTER_RETRY_AFTER', '1'))
+
+# Never queued: health/readiness probes and metrics must answer even under overload
+ADMISSION_EXEMPT_PATHS = {"/api/health", "/api/ready", "/api/metrics"}
+
+class AdmissionController:
+    """
+    Limits in-flight API work to `max_concurrency` requests with at most `max_queue` waiting.
+
+    Requests beyond the queue bound (or waiting longer than `queue_timeout`) are rejected
+    straight away so a burst cannot push latency up for everyone.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def acquire(self) -> bool:
+        """Waits for a slot; returns False if the request should be rejected."""
+        if self.semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False
+            self.waiting += 1
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                return False
+            finally:
+                self.waiting -= 1
+            wait = time.perf_counter() - start
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        else:
+            await self.semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_ms": 1000 * self.total_wait_seconds / self.admitted if self.admitted else 0.0,
+            "max_wait_ms": 1000 * self.max_wait_seconds,
+        }
+
+admission = AdmissionController(MAX_CONCURRENCY, MAX_QUEUE, QUEUE_TIMEOUT_SECONDS)
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Queue /api/* requests behind the concurrency limit; reject with 503 when the queue is full"""
+    path = request.url.path
+    if not path.startswith("/api/") or path in ADMISSION_EXEMPT_PATHS:
+        return await call_next(request)
+
+    if not await admission.acquire():
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry shortly"},
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission.release()
+
 # Routes
 @app.get("/", tags=["Frontend"])
 async def get_index():
@@ -151,61 +1392,947 @@ async def get_index():
 @app.get("/api/info", tags=["Info"], response_model=SectorInfo)
 async def get_model_info():
     """Get information about available sectors and model parameters"""
-    sectors = [col.replace('SECTOR_', '') for col in feature_columns if col.startswith('SECTOR_')]
+    bundle = active_bundle
     return SectorInfo(
-        sectors=sectors,
+        sectors=bundle.sectors,
         temperatures_range={"min": -25, "max": 30, "recommended_step": 1},
         sample_dates=[
             "2025-01-15",
             "2025-06-15",
             "2025-12-25"
-        ]
+        ],
+        model_tiers=bundle.tier_info()
     )
 
-@app.post("/api/predict", tags=["Prediction"], response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+# Prediction audit log: records are queued in memory by the request handlers and a
+# background task writes them in batches to rotating gzip-compressed JSONL files
+AUDIT_ENABLED = os.environ.get('SHELTER_AUDIT', '1') != '0'
+AUDIT_DIR = Path(os.environ.get('SHELTER_AUDIT_DIR', ROOT_DIR / 'audit'))
+AUDIT_MAX_QUEUE = int(os.environ.get('SHELTER_AUDIT_MAX_QUEUE', '10000'))
+AUDIT_POLICY = os.environ.get('SHELTER_AUDIT_POLICY', 'drop')  # 'drop' or 'block' when the queue is full
+AUDIT_BATCH_SIZE = int(os.environ.get('SHELTER_AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('SHELTER_AUDIT_FLUSH_INTERVAL', '1'))
+AUDIT_ROTATE_BYTES = int(float(os.environ.get('SHELTER_AUDIT_ROTATE_MB', '16')) * 1024 * 1024)
+AUDIT_MAX_FILES = int(os.environ.get('SHELTER_AUDIT_MAX_FILES', '100'))
+
+class AuditLogger:
+    """
+    Non-blocking, batched audit log.
+
+    `log()` only puts the record on a bounded asyncio queue. When the queue is full the
+    record is dropped (and counted) under the 'drop' policy, or the caller waits for
+    space under 'block'. A background task wakes up every `flush_interval` seconds (or
+    as soon as `batch_size` records are waiting) and appends the batch as one gzip
+    member to the current `audit-*.jsonl.gz` file from a worker thread. Files rotate at
+    `rotate_bytes` and only the newest `max_files` are kept. Read them with
+    `gzip.open(path, 'rt')`, `zcat` or `pandas.read_json(path, lines=True)`.
+    """
+
+    def __init__(self, directory: Path, max_queue: int, policy: str, batch_size: int,
+                 flush_interval: float, rotate_bytes: int, max_files: int):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown audit policy '{policy}'. Must be 'drop' or 'block'")
+        self.directory = directory
+        self.max_queue = max_queue
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.max_files = max_files
+        self.queue = None
+        self.records_waiting = None
+        self.batch_ready = None
+        self.task = None
+        self.write_lock = threading.Lock()
+        self.current_path = None
+        self.file_seq = 0
+        self.logged = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.records_waiting = asyncio.Event()
+        self.batch_ready = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def log(self, record: dict):
+        if self.queue is None:
+            return
+        if self.policy == "block":
+            await self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return
+        self.logged += 1
+        self.records_waiting.set()
+        if self.queue.qsize() >= self.batch_size:
+            self.batch_ready.set()
+
+    def _take_batch(self) -> list:
+        batch = []
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            # Records stay queued while waiting, so a shutdown mid-wait loses nothing
+            await self.records_waiting.wait()
+            try:
+                await asyncio.wait_for(self.batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.batch_ready.clear()
+            batch = self._take_batch()
+            if self.queue.empty():
+                self.records_waiting.clear()
+            await run_in_threadpool(self._write_batch, batch)
+
+    def _write_batch(self, batch: list):
+        data = gzip.compress("".join(json.dumps(record) + "\n" for record in batch).encode())
+        with self.write_lock:
+            try:
+                if self.current_path is None or self.current_path.stat().st_size >= self.rotate_bytes:
+                    self._rotate()
+                with open(self.current_path, "ab") as f:
+                    f.write(data)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.write_errors += 1
+                print(f"⚠ Warning: Could not write audit batch: {e}")
+
+    def _rotate(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.file_seq += 1
+        self.current_path = self.directory / f"audit-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{self.file_seq:04d}.jsonl.gz"
+        self.current_path.touch()
+        stored = sorted(self.directory.glob("audit-*.jsonl.gz"), key=lambda path: path.stat().st_mtime)
+        for old in stored[:-self.max_files]:
+            old.unlink(missing_ok=True)
+
+    async def close(self):
+        """Stops the background task and writes everything still queued"""
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        while not self.queue.empty():
+            self._write_batch(self._take_batch())
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.queue is not None,
+            "policy": self.policy,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue": self.max_queue,
+            "logged": self.logged,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "current_file": self.current_path.name if self.current_path else None,
+        }
+
+audit_logger = AuditLogger(AUDIT_DIR, AUDIT_MAX_QUEUE, AUDIT_POLICY, AUDIT_BATCH_SIZE,
+                           AUDIT_FLUSH_INTERVAL, AUDIT_ROTATE_BYTES, AUDIT_MAX_FILES)
+
+@app.on_event("startup")
+async def start_audit_log():
+    if AUDIT_ENABLED:
+        await audit_logger.start()
+
+@app.on_event("shutdown")
+async def flush_audit_log():
+    """Write all queued audit records before the process exits"""
+    await audit_logger.close()
+
+async def audit_prediction(endpoint: str, inputs: dict, output: dict, latency_ms: float, bundle: ModelBundle):
+    await audit_logger.log({
+        "timestamp": datetime.now().isoformat(),
+        "endpoint": endpoint,
+        "inputs": inputs,
+        "output": output,
+        "model": bundle.key,
+        "model_hash": bundle.hash,
+        "model_format": bundle.format,
+        "model_mode": bundle.mode,
+        "latency_ms": round(latency_ms, 3),
+    })
+
+# On-demand request profiling: with SHELTER_PROFILING=1, a request carrying `X-Profile: 1`
+# runs its prediction under cProfile and the .prof file is stored for download.
+# When disabled this is a single flag check per request.
+PROFILING_ENABLED = os.environ.get('SHELTER_PROFILING', '0') == '1'
+PROFILE_DIR = Path(os.environ.get('SHELTER_PROFILE_DIR', ROOT_DIR / 'profiles'))
+MAX_STORED_PROFILES = 50
+PROFILE_ID_PATTERN = re.compile(r"^predict-[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+# cProfile allows one active profiler at a time, so profiled calls are serialized
+profile_lock = threading.Lock()
+
+def wants_profile(request: Request) -> bool:
+    return PROFILING_ENABLED and request.headers.get("x-profile") == "1"
+
+def profile_call(fn, *args):
+    """
+    Runs fn(*args) under cProfile and saves the stats in pstats format.
+
+    Returns:
+        tuple: (fn's result, profile id usable with GET /api/profiles/{id})
+    """
+    profiler = cProfile.Profile()
+    with profile_lock:
+        profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.disable()
+
+    profile_id = f"predict-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(PROFILE_DIR / f"{profile_id}.prof"))
+
+    # Keep only the most recent profiles
+    stored = sorted(PROFILE_DIR.glob("predict-*.prof"), key=lambda path: path.stat().st_mtime)
+    for old in stored[:-MAX_STORED_PROFILES]:
+        old.unlink(missing_ok=True)
+    return result, profile_id
+
+async def run_prediction(request: Request, headers, bundle: ModelBundle, date: str, sector: str,
+                         min_temp_celsius: Optional[float], explain: bool = False, tier: str = "full") -> dict:
+    """Runs get_live_prediction in a worker thread (profiled if the request asks for it) and audits it"""
+    start = time.perf_counter()
+    args = (date, sector, min_temp_celsius, True, explain, tier, bundle)
+    # Run the model off the event loop so health checks stay responsive under load
+    if wants_profile(request):
+        result, profile_id = await run_in_threadpool(profile_call, get_live_prediction, *args)
+        headers["X-Profile-Id"] = profile_id
+    else:
+        result = await run_in_threadpool(get_live_prediction, *args)
+    await audit_prediction(
+        f"{request.method} {request.url.path}",
+        {"date": date, "sector": sector, "min_temp_celsius": min_temp_celsius, "explain": explain, "tier": tier},
+        {key: result[key] for key in ("predicted_shelter_demand", "min_temp_celsius", "weather_source")},
+        (time.perf_counter() - start) * 1000,
+        bundle,
+    )
+    return result
+
+def validate_prediction_input(date: str, sector: str, min_temp_celsius: Optional[float], bundle: ModelBundle):
+    """Raises HTTPException(400) for an invalid date, sector or temperature"""
+    # Validate date format
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    # Validate sector
+    valid_sectors = bundle.sectors
+    if sector not in valid_sectors:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid sector. Must be one of: {', '.join(valid_sectors)}"
+        )
+
+    # Validate temperature (optional when the date has observed or forecast weather)
+    if min_temp_celsius is None:
+        if lookup_weather(pd.Timestamp(date), bundle.weather)[0] is None:
+            raise HTTPException(
+                status_code=400,
+                detail="min_temp_celsius is required for dates without observed or forecast weather"
+            )
+    elif not math.isfinite(min_temp_celsius):
+        raise HTTPException(status_code=400, detail="min_temp_celsius must be a finite number")
+    elif min_temp_celsius < -50 or min_temp_celsius > 50:
+        raise HTTPException(status_code=400, detail="Temperature must be between -50 and 50 Celsius")
+
+async def resolve_bundle(model: Optional[str]) -> ModelBundle:
+    """The bundle serving a model or region key (None: the main model), loaded off the event loop"""
+    if model is None or model == DEFAULT_MODEL_KEY:
+        return active_bundle
+    try:
+        return await run_in_threadpool(model_registry.get, model)
+    except KeyError:
+        known = [DEFAULT_MODEL_KEY, *model_registry.available, *model_registry.aliases]
+        raise HTTPException(status_code=400, detail=f"Unknown model '{model}'. Must be one of: {', '.join(known)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model '{model}' could not be loaded: {e}")
+
+def validate_tier(tier: str, bundle: ModelBundle):
+    """Raises HTTPException(400) for an unknown or unavailable model tier"""
+    if tier not in MODEL_TIERS:
+        raise HTTPException(status_code=400, detail=f"Invalid tier. Must be one of: {', '.join(MODEL_TIERS)}")
+    if tier not in bundle.available_tiers():
+        raise HTTPException(status_code=400, detail=f"Model tier '{tier}' is not available (train with --fast-tier)")
+
+@app.post("/api/predict", tags=["Prediction"], response_model=PredictionResponse, response_model_exclude_none=True)
+async def predict(request: PredictionRequest, http_request: Request, response: Response):
     """
     Make a shelter demand prediction.
     
     Parameters:
     - date: Date in YYYY-MM-DD format
     - sector: One of Families, Men, Women, Youth, Mixed Adult
-    - min_temp_celsius: Minimum temperature in Celsius
+    - min_temp_celsius: Minimum temperature in Celsius (optional for dates with observed or forecast weather)
+    - explain: Also return per-feature contributions (tree-path decomposition)
+    - tier: "full" (default) or "fast", a distilled model with lower latency and slightly higher error
+    - model: Model or region key from /api/models (default: the main model)
     """
+    bundle = await resolve_bundle(request.model)
     try:
-        # Validate date format
-        try:
-            datetime.strptime(request.date, "%Y-%m-%d")
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # Validate sector
-        valid_sectors = [col.replace('SECTOR_', '') for col in feature_columns if col.startswith('SECTOR_')]
-        if request.sector not in valid_sectors:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid sector. Must be one of: {', '.join(valid_sectors)}"
-            )
-        
-        # Validate temperature
-        if request.min_temp_celsius < -50 or request.min_temp_celsius > 50:
-            raise HTTPException(status_code=400, detail="Temperature must be between -50 and 50 Celsius")
-        
+        validate_prediction_input(request.date, request.sector, request.min_temp_celsius, bundle)
+        validate_tier(request.tier, bundle)
+        if request.explain and not bundle.explainers:
+            raise HTTPException(status_code=400, detail="Explanations are not available for this model")
+
         # Make prediction
-        result = get_live_prediction(request.date, request.sector, request.min_temp_celsius)
+        result = await run_prediction(http_request, response.headers, bundle, request.date, request.sector,
+                                      request.min_temp_celsius, request.explain, request.tier)
         return PredictionResponse(**result)
     
     except HTTPException:
         raise
+    except ValueError as e:  # get_live_prediction's message already starts with "Prediction error"
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+# HTTP caching for GET /api/predict
+CACHE_MAX_AGE_SECONDS = int(os.environ.get('SHELTER_CACHE_MAX_AGE', '300'))
+
+def prediction_etag(bundle: ModelBundle, date: str, sector: str, min_temp_celsius: Optional[float],
+                    explain: bool = False, tier: str = "full") -> str:
+    """
+    Strong ETag for a prediction: hash of the canonical inputs and everything else the
+    output depends on (model mode and content, including the sharded models that answer
+    full-tier requests in sharded mode, weather tables, the sector's rolling occupancy).
+
+    Only content goes in, so the tag survives restarts and agrees across workers.
+    """
+    history = bundle.history.get(sector)
+    rolling = [history.rolling_mean(window) if history is not None else None for window in ROLLING_WINDOWS]
+    canonical = "|".join([
+        datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d"),
+        sector,
+        "" if min_temp_celsius is None else repr(float(min_temp_celsius)),
+        "explain" if explain else "",
+        tier,
+        bundle.key,
+        bundle.mode,
+        bundle.hash if tier == "full" else bundle.fast_pipeline['manifest']['content_sha256'],
+        (bundle.sharded_hash or "") if tier == "full" else "",
+        *(table.content_hash for _, table in bundle.weather),
+        *("" if mean is None else repr(float(mean)) for mean in rolling),
+    ])
+    return '"' + hashlib.sha256(canonical.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+@app.get("/api/predict", tags=["Prediction"], response_model=PredictionResponse, response_model_exclude_none=True)
+async def predict_cacheable(request: Request, date: str, sector: str, min_temp_celsius: Optional[float] = None,
+                            explain: bool = False, tier: str = "full", model: Optional[str] = None):
+    """
+    Cacheable equivalent of POST /api/predict.
+
+    Responses carry a strong ETag and Cache-Control; a matching If-None-Match gets 304.
+    """
+    bundle = await resolve_bundle(model)
+    validate_prediction_input(date, sector, min_temp_celsius, bundle)
+    validate_tier(tier, bundle)
+    if explain and not bundle.explainers:
+        raise HTTPException(status_code=400, detail="Explanations are not available for this model")
+
+    etag = prediction_etag(bundle, date, sector, min_temp_celsius, explain, tier)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE_SECONDS}"}
+    if etag_matches(request.headers.get("if-none-match"), etag) and not wants_profile(request):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        result = await run_prediction(request, headers, bundle, date, sector, min_temp_celsius, explain, tier)
+    except ValueError as e:  # get_live_prediction's message already starts with "Prediction error"
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    return JSONResponse(content=PredictionResponse(**result).model_dump(exclude_none=True), headers=headers)
+
+@app.get("/api/profiles/{profile_id}", tags=["Profiling"])
+async def get_profile(profile_id: str):
+    """Download a stored request profile (.prof, pstats format)"""
+    path = PROFILE_DIR / f"{profile_id}.prof"
+    if not PROFILING_ENABLED or not PROFILE_ID_PATTERN.match(profile_id) or not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(str(path), media_type="application/octet-stream", filename=path.name)
+
+@app.post("/api/predict/sweep", tags=["Prediction"], response_model=SweepResponse)
+async def predict_sweep(request: SweepRequest):
+    """
+    Predict the demand curve over a temperature range for one date.
+
+    Parameters:
+    - date: Date in YYYY-MM-DD format
+    - sector: One of Families, Men, Women, Youth, Mixed Adult (omit for all sectors)
+    - temp_min / temp_max / step: Minimum-temperature range in Celsius (inclusive, step at least 0.1)
+    - tier: "full" (default) or "fast" (distilled model, lower latency)
+    """
+    bundle = active_bundle
+    try:
+        datetime.strptime(request.date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    valid_sectors = bundle.sectors
+    if request.sector is not None and request.sector not in valid_sectors:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sector. Must be one of: {', '.join(valid_sectors)}"
+        )
+    sectors = [request.sector] if request.sector is not None else valid_sectors
+
+    if not (-50 <= request.temp_min <= request.temp_max <= 50):
+        raise HTTPException(status_code=400, detail="Temperature range must be within -50 and 50 Celsius")
+    if not (request.step >= MIN_SWEEP_STEP):  # also rejects NaN
+        raise HTTPException(status_code=400, detail=f"Step must be at least {MIN_SWEEP_STEP} Celsius")
+    validate_tier(request.tier, bundle)
+    # Size the sweep before allocating it (the small tolerance keeps temp_max when it is on the grid)
+    n_temperatures = math.floor((request.temp_max - request.temp_min) / request.step + 1e-9) + 1
+    if n_temperatures * len(sectors) > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=400, detail=f"Sweep is limited to {MAX_SWEEP_POINTS} predictions")
+    temperatures = np.round(request.temp_min + request.step * np.arange(n_temperatures), 6)
+
+    try:
+        start = time.perf_counter()
+        result = await run_in_threadpool(get_temperature_sweep, request.date, sectors, temperatures,
+                                         request.tier, bundle)
+        await audit_prediction(
+            "POST /api/predict/sweep",
+            request.model_dump(),
+            {"curves": result["curves"], "weather_source": result["weather_source"]},
+            (time.perf_counter() - start) * 1000,
+            bundle,
+        )
+        return SweepResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+@app.post("/api/simulate/capacity", tags=["Prediction"])
+async def simulate_capacity(request: CapacitySimulationRequest):
+    """
+    Monte Carlo demand distribution for a season over historical weather.
+
+    Each draw replays the season with the observed weather of an analog season (same
+    calendar window in another year, shifted by up to jitter_days) plus model error.
+    Returns daily demand percentiles per sector and in total, the probability of
+    exceeding the given capacities and season peak percentiles.
+    """
+    bundle = active_bundle
+    try:
+        season_start = datetime.strptime(request.start_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    valid_sectors = bundle.sectors
+    for sector in (request.sectors or []) + list((request.capacity or {}).keys()):
+        if sector not in valid_sectors:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sector. Must be one of: {', '.join(valid_sectors)}"
+            )
+    if not 1 <= request.days <= MAX_SIMULATION_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_SIMULATION_DAYS}")
+    if not 1 <= request.draws <= MAX_SIMULATION_DRAWS:
+        raise HTTPException(status_code=400, detail=f"draws must be between 1 and {MAX_SIMULATION_DRAWS}")
+    n_sectors = len(request.sectors) if request.sectors else len(valid_sectors)
+    if request.draws * request.days * n_sectors > capacity_sim.MAX_CELLS:
+        raise HTTPException(status_code=400, detail=(
+            f"draws x days x sectors must be at most {capacity_sim.MAX_CELLS:,} "
+            f"(got {request.draws * request.days * n_sectors:,}); use fewer draws, days or sectors"))
+    if not 0 <= request.jitter_days <= 30 or (request.residual_sd is not None and request.residual_sd < 0):
+        raise HTTPException(status_code=400, detail="jitter_days must be 0-30 and residual_sd non-negative")
+
+    try:
+        start = time.perf_counter()
+        result = await run_in_threadpool(
+            run_capacity_simulation, season_start, request.days, request.draws,
+            request.sectors, request.capacity, request.total_capacity,
+            request.jitter_days, request.residual_sd, request.seed, bundle,
+        )
+        await audit_prediction(
+            "POST /api/simulate/capacity", request.model_dump(), {"season": result["season"]},
+            (time.perf_counter() - start) * 1000, bundle,
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+
+@app.post("/api/history", tags=["History"])
+async def ingest_history(request: HistoryIngestRequest):
+    """
+    Record recent daily occupancy counts per sector.
+
+    Observations must not be older than a sector's latest recorded date; re-sending the latest
+    date replaces it. The batch is applied (and saved) only if every observation is valid.
+    """
+    valid_sectors = active_bundle.sectors
+    # Validate the whole batch before applying any of it
+    observations = []
+    for obs in request.observations:
+        try:
+            date = datetime.strptime(obs.date, "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        if obs.sector not in valid_sectors:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sector. Must be one of: {', '.join(valid_sectors)}"
+            )
+        observations.append((date, obs.sector, obs.count))
+    observations.sort(key=lambda o: o[0])
+    first_dates = {}
+    for date, sector, _ in observations:
+        first_dates.setdefault(sector, date)
+    for sector, date in first_dates.items():
+        last_date = sector_history[sector].last_date
+        if last_date is not None and date < last_date:
+            raise HTTPException(status_code=400,
+                                detail=f"Date {date} is older than the latest recorded date {last_date} for {sector}")
+
+    for date, sector, count in observations:
+        sector_history[sector].append(date, count)
+    try:
+        save_history(HISTORY_PATH)
+    except Exception as e:
+        print(f"⚠ Warning: Could not save recent history: {e}")
+    return await get_history()
+
+@app.get("/api/history", tags=["History"])
+async def get_history():
+    """Current rolling averages per sector from the recent history buffers"""
+    return {
+        sector: {
+            "days_recorded": history.size,
+            "last_date": history.last_date,
+            "occupancy_7day_rolling_avg": history.rolling_mean(7),
+            "occupancy_30day_rolling_avg": history.rolling_mean(30),
+        }
+        for sector, history in sector_history.items()
+    }
+
+@app.on_event("shutdown")
+def persist_history():
+    """Save the recent history buffers so they survive restarts"""
+    if not any(history.size for history in sector_history.values()):
+        return
+    try:
+        save_history(HISTORY_PATH)
+    except Exception as e:
+        print(f"⚠ Warning: Could not save recent history: {e}")
+
+# Startup warm-up: pay one-time costs (lazy imports, thread pools, first-call
+# allocations) before uvicorn starts accepting connections
+WARMUP_ENABLED = os.environ.get('SHELTER_WARMUP', '1') != '0'
+
+warmup_state = {"status": "pending", "predictions": 0, "duration_ms": None, "error": None}
+
+def run_warmup(bundle: Optional[ModelBundle] = None):
+    """Runs representative single and sweep predictions for every sector (on `bundle`, default: active)"""
+    bundle = bundle or active_bundle
+    sectors = bundle.sectors
+    date_str = datetime.now().strftime("%Y-%m-%d")
+    start = time.perf_counter()
+    predictions = 0
+    for sector in sectors:
+        for temp in (-10.0, 20.0):
+            PredictionResponse(**get_live_prediction(date_str, sector, temp, bundle=bundle)).model_dump()
+            predictions += 1
+    # Dates with observed weather exercise the lookup path
+    for source, table in bundle.weather:
+        last_date = datetime.fromordinal(table.start_ordinal + len(table.values) - 1).strftime("%Y-%m-%d")
+        for sector in sectors:
+            get_live_prediction(last_date, sector, bundle=bundle)
+            predictions += 1
+    sweep_temps = np.arange(-25.0, 31.0)
+    for tier in bundle.available_tiers():
+        get_temperature_sweep(date_str, sectors, sweep_temps, tier, bundle)
+        predictions += len(sectors) * len(sweep_temps)
+    if bundle.fast_pipeline is not None:
+        for sector in sectors:
+            get_live_prediction(date_str, sector, -10.0, tier="fast", bundle=bundle)
+            predictions += 1
+    return predictions, (time.perf_counter() - start) * 1000
+
+@app.on_event("startup")
+async def warm_up():
+    """Warm the prediction path before traffic is accepted"""
+    if active_bundle is None:
+        warmup_state.update(status="failed", error="Model not loaded")
+        return
+    if not WARMUP_ENABLED:
+        warmup_state["status"] = "skipped"
+        return
+    warmup_state["status"] = "running"
+    try:
+        predictions, duration_ms = await run_in_threadpool(run_warmup)
+        warmup_state.update(status="ready", predictions=predictions, duration_ms=round(duration_ms, 1))
+        print(f"✓ Warm-up complete: {predictions} predictions in {duration_ms:.0f} ms")
+    except Exception as e:
+        warmup_state.update(status="failed", error=str(e))
+        print(f"⚠ Warning: Warm-up failed: {e}")
+
+@app.get("/api/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 otherwise"""
+    ready = active_bundle is not None and warmup_state["status"] in ("ready", "skipped")
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "warmup": warmup_state, "timestamp": datetime.now().isoformat()},
+    )
+
+# Background retraining: an admin job runs `mlmodel.py` in a separate low-priority process
+# limited to a few cores, validates the candidate it writes to a staging folder, warms it
+# up and promotes it by replacing `active_bundle`. Disabled unless SHELTER_ADMIN_TOKEN is set.
+ADMIN_TOKEN = os.environ.get('SHELTER_ADMIN_TOKEN')
+RETRAIN_DIR = Path(os.environ.get('SHELTER_RETRAIN_DIR', ROOT_DIR / 'retrain'))
+RETRAIN_CORES = int(os.environ.get('SHELTER_RETRAIN_CORES', str(max(1, thread_config.available_cpus() // 2))))
+RETRAIN_NICE = int(os.environ.get('SHELTER_RETRAIN_NICE', '10'))
+RETRAIN_TIMEOUT_SECONDS = float(os.environ.get('SHELTER_RETRAIN_TIMEOUT', '3600'))
+RETRAIN_MAX_MAE_INCREASE = float(os.environ.get('SHELTER_RETRAIN_MAX_MAE_INCREASE', '0.05'))
+RETRAIN_MIN_R2 = float(os.environ.get('SHELTER_RETRAIN_MIN_R2', '0.9'))
+MAX_STORED_JOBS = 20
+LOG_TAIL_LINES = 20
+
+# Files copied from a job's staging folder into the project folder on promotion
+RETRAIN_ARTIFACTS = (MODEL_PATH, COMPACT_MODEL_PATH, COMPACT_MANIFEST_PATH, SHARDED_MODEL_PATH,
+                     FAST_MODEL_PATH, FAST_MANIFEST_PATH, WEATHER_TABLE_PATH, DRIFT_REFERENCE_PATH)
+
+class RetrainRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    fast_tier: Optional[bool] = None  # Default: distill a fast tier if one is served now
+    cores: Optional[int] = None  # Default: SHELTER_RETRAIN_CORES
+    max_mae_increase: Optional[float] = None  # Allowed relative CV MAE increase over the served model
+    min_r2: Optional[float] = None  # Minimum CV R²
+    promote: bool = True  # False: train and validate only
+
+class RetrainJob:
+    """
+    One retraining run: train in a child process, validate, then promote.
+
+    Status goes queued -> running -> validating -> promoting -> succeeded, or ends in
+    rejected (validation thresholds not met), failed or cancelled. Training stages are
+    read from the progress file mlmodel.py keeps up to date.
+    """
+
+    def __init__(self, job_id: str, options: RetrainRequest, current: ModelBundle):
+        self.id = job_id
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.error = None
+        self.validation = None
+        self.model_hash = None
+        self.process = None
+        self.cores = max(1, min(options.cores or RETRAIN_CORES, thread_config.available_cpus()))
+        self.fast_tier = options.fast_tier if options.fast_tier is not None else current.fast_pipeline is not None
+        self.max_mae_increase = options.max_mae_increase if options.max_mae_increase is not None else RETRAIN_MAX_MAE_INCREASE
+        self.min_r2 = options.min_r2 if options.min_r2 is not None else RETRAIN_MIN_R2
+        self.promote = options.promote
+        self.staging_dir = RETRAIN_DIR / job_id
+        self.progress_path = self.staging_dir / 'progress.json'
+        self.log_path = self.staging_dir / 'train.log'
+        self.serving_stages = []  # validate/promote timings, after the training stages
+
+    def command(self) -> list:
+        cmd = [sys.executable, str(ROOT_DIR / 'mlmodel.py'), '--output-dir', str(self.staging_dir),
+               '--progress-file', str(self.progress_path)]
+        if self.fast_tier:
+            cmd.append('--fast-tier')
+        if MODEL_MODE == 'sharded':
+            cmd += ['--sharded', '--jobs', str(self.cores)]
+        return cmd
+
+    def start_process(self):
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        env = dict(os.environ, SHELTER_THREADS_TRAINING=str(self.cores))
+        for name in thread_config.NATIVE_THREAD_ENV_VARS:
+            env[name] = str(self.cores)
+        with open(self.log_path, 'wb') as log:
+            self.process = subprocess.Popen(self.command(), cwd=str(ROOT_DIR), env=env, stdout=log,
+                                            stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        # Applied right after spawning, while the child is still importing (before its native
+        # thread pools exist): the threads it creates later inherit priority and affinity.
+        if hasattr(os, 'setpriority'):
+            os.setpriority(os.PRIO_PROCESS, self.process.pid, RETRAIN_NICE)
+        if hasattr(os, 'sched_setaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(self.process.pid, cpus[-self.cores:])
+
+    def validate(self, candidate: ModelBundle, current: ModelBundle) -> dict:
+        """Checks the candidate's CV metrics against the thresholds and its predictions for sanity"""
+        checks = {}
+        cv_r2 = candidate.metrics.get('cv_r2')
+        checks['cv_r2'] = {"value": cv_r2, "min": self.min_r2,
+                           "passed": cv_r2 is not None and cv_r2 >= self.min_r2}
+        cv_mae, current_mae = candidate.metrics.get('cv_mae'), current.metrics.get('cv_mae')
+        if current_mae is None:
+            # The served model has no recorded metrics (joblib artifact): only the R² floor applies
+            checks['cv_mae'] = {"value": cv_mae, "current": None, "passed": cv_mae is not None}
+        else:
+            limit = current_mae * (1 + self.max_mae_increase)
+            checks['cv_mae'] = {"value": cv_mae, "current": current_mae, "max": limit,
+                                "passed": cv_mae is not None and cv_mae <= limit}
+
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        temps = np.arange(-25.0, 31.0, 5.0)
+        row_sectors = np.repeat(candidate.sectors, len(temps))
+        input_df, _, _ = build_feature_frame(date_str, row_sectors, np.tile(temps, len(candidate.sectors)), candidate)
+        finite = all(np.isfinite(predict_frame(input_df, row_sectors, tier, candidate)).all()
+                     for tier in candidate.available_tiers())
+        checks['predictions_finite'] = {"passed": bool(finite)}
+        checks['sectors'] = {"value": candidate.sectors, "passed": set(current.sectors) <= set(candidate.sectors)}
+        return {"passed": all(check["passed"] for check in checks.values()), "checks": checks}
+
+    def timed(self, stage: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.serving_stages.append({"stage": stage, "seconds": round(time.perf_counter() - start, 3)})
+
+    def run(self):
+        global active_bundle
+        try:
+            # This thread's own work (loading, validating, warming the candidate) also yields to serving
+            if hasattr(os, 'setpriority') and sys.platform.startswith('linux'):
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), RETRAIN_NICE)
+            if self.status == "cancelled":
+                return
+            self.status = "running"
+            self.start_process()
+            try:
+                returncode = self.process.wait(timeout=RETRAIN_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+                raise RuntimeError(f"Training exceeded {RETRAIN_TIMEOUT_SECONDS:.0f}s and was stopped")
+            if self.status == "cancelled":
+                return
+            if returncode != 0:
+                raise RuntimeError(f"Training exited with code {returncode} (see log_tail)")
+
+            self.status = "validating"
+            current = active_bundle
+            with thread_config.limit_threads('single'):
+                candidate = self.timed("load_candidate", ModelBundle, self.staging_dir)
+                # The candidate carries its weather tables, so they are validated, warmed and swapped with it
+                candidate.own_weather = self.candidate_weather(current)
+                self.model_hash = candidate.hash
+                self.validation = self.timed("validate", self.validate, candidate, current)
+                if not self.validation["passed"]:
+                    self.status = "rejected"
+                    return
+                if not self.promote:
+                    self.status = "succeeded"
+                    return
+                # Warm the candidate before it takes traffic so the swap has no cold-start spike
+                self.timed("warm_up", run_warmup, candidate)
+
+            self.status = "promoting"
+            self.timed("promote", self.promote_artifacts)
+            track_sectors(candidate.sectors)
+            # The swap: one reference assignment (model and weather tables together). Requests that
+            # already read the old bundle finish on it.
+            active_bundle = candidate
+            self.status = "succeeded"
+            print(f"✓ Retrained model promoted ({candidate.hash[:12]})")
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            print(f"⚠ Warning: Retraining job {self.id} failed: {e}")
+        finally:
+            self.finished_at = datetime.now().isoformat()
+
+    def candidate_weather(self, current: ModelBundle) -> list:
+        """The served weather tables with the staged ones (the retrained observed table) swapped in"""
+        tables = dict(current.weather)
+        tables.update(load_weather_tables(self.staging_dir))
+        return [(source, tables[source]) for source in ("observed", "forecast") if source in tables]
+
+    def promote_artifacts(self):
+        """Copies the staged artifacts over the served ones (each file replaced atomically) for restarts"""
+        for artifact in RETRAIN_ARTIFACTS:
+            staged = self.staging_dir / artifact.name
+            if staged.exists():
+                tmp_path = artifact.with_name(artifact.name + '.tmp')
+                shutil.copyfile(staged, tmp_path)
+                os.replace(tmp_path, artifact)
+
+    def cancel(self):
+        self.status = "cancelled"
+        if self.process is not None and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+
+    def training_progress(self) -> dict:
+        try:
+            with open(self.progress_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"stage": None, "completed": []}
+
+    def log_tail(self) -> list:
+        try:
+            with open(self.log_path, errors='replace') as f:
+                return f.read().splitlines()[-LOG_TAIL_LINES:]
+        except OSError:
+            return []
+
+    def summary(self, detail: bool = False) -> dict:
+        progress = self.training_progress()
+        summary = {
+            "id": self.id,
+            "status": self.status,
+            "stage": (progress["stage"] or "training") if self.status == "running" else self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "cores": self.cores,
+            "nice": RETRAIN_NICE,
+            "fast_tier": self.fast_tier,
+            "model_hash": self.model_hash,
+            "error": self.error,
+        }
+        if detail:
+            summary.update(stages=progress["completed"] + self.serving_stages, validation=self.validation,
+                           log_tail=self.log_tail())
+        return summary
+
+retrain_jobs = {}  # job id -> RetrainJob, oldest first
+retrain_lock = threading.Lock()
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled (set SHELTER_ADMIN_TOKEN)")
+    if not secrets.compare_digest(request.headers.get('x-admin-token', ''), ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def get_retrain_job(job_id: str) -> RetrainJob:
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.post("/api/admin/retrain", tags=["Admin"], status_code=202)
+async def start_retrain(request: Request, options: Optional[RetrainRequest] = None):
+    """
+    Start a background retraining job (one at a time).
+
+    Training runs in a separate process at nice SHELTER_RETRAIN_NICE on at most `cores`
+    cores; poll /api/admin/jobs/{id} for progress. A candidate passing validation is
+    warmed up and swapped in without interrupting requests.
+    """
+    require_admin(request)
+    with retrain_lock:
+        if any(job.finished_at is None for job in retrain_jobs.values()):
+            raise HTTPException(status_code=409, detail="A retraining job is already running")
+        job_id = datetime.now().strftime("retrain-%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+        job = RetrainJob(job_id, options or RetrainRequest(), active_bundle)
+        retrain_jobs[job_id] = job
+        for old_id in list(retrain_jobs)[:-MAX_STORED_JOBS]:
+            shutil.rmtree(retrain_jobs.pop(old_id).staging_dir, ignore_errors=True)
+    threading.Thread(target=job.run, name=f"retrain-{job_id}", daemon=True).start()
+    return job.summary()
+
+@app.get("/api/admin/jobs", tags=["Admin"])
+async def list_retrain_jobs(request: Request):
+    """Retraining jobs, newest first"""
+    require_admin(request)
+    return {"jobs": [job.summary() for job in reversed(list(retrain_jobs.values()))]}
+
+@app.get("/api/admin/jobs/{job_id}", tags=["Admin"])
+async def get_retrain_job_status(job_id: str, request: Request):
+    """Status, per-stage timings, validation results and the end of the training log"""
+    require_admin(request)
+    return get_retrain_job(job_id).summary(detail=True)
+
+@app.post("/api/admin/jobs/{job_id}/cancel", tags=["Admin"])
+async def cancel_retrain_job(job_id: str, request: Request):
+    """Stop a job that is still training (a candidate already validating is left to finish)"""
+    require_admin(request)
+    job = get_retrain_job(job_id)
+    if job.status not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    job.cancel()
+    return job.summary()
+
+@app.on_event("shutdown")
+def stop_retraining():
+    """Don't leave a training process behind"""
+    for job in retrain_jobs.values():
+        if job.finished_at is None:
+            job.cancel()
+
+@app.get("/api/drift", tags=["Health"])
+async def get_drift():
+    """
+    Drift of live request features from the training distribution.
+
+    Per feature (overall and per sector): PSI over the reference histogram bins, the
+    fraction of values outside the training range, streaming quantiles and the median
+    shift in reference IQRs. PSI < 0.1 is stable, 0.1-0.25 moderate, > 0.25 significant.
+    """
+    drift_monitor = active_bundle.drift_monitor
+    if drift_monitor is None:
+        raise HTTPException(status_code=404, detail=f"No drift reference loaded ({DRIFT_REFERENCE_PATH.name})")
+    return drift_monitor.report()
+
+@app.get("/api/models", tags=["Info"])
+async def list_models():
+    """Models that /api/predict can route to (`model` field), with load state and load times"""
+    bundle = active_bundle
+    return {
+        "default": {"key": DEFAULT_MODEL_KEY, "model_hash": bundle.hash, "sectors": bundle.sectors,
+                    "memory_bytes": bundle.memory_bytes()},
+        **model_registry.stats(),
+    }
+
+@app.get("/api/metrics", tags=["Health"])
+async def get_metrics():
+    """Service metrics (admission control, audit log queue, model registry, native thread counts)"""
+    return {
+        "admission": admission.stats(),
+        "audit": audit_logger.stats(),
+        "model_registry": model_registry.stats(),
+        "native_threads": {
+            mode: thread_config.threads_for(mode, workers=SERVING_WORKERS) for mode in ("single", "batch")
+        },
+    }
+
 @app.get("/api/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: the process is up (see /api/ready for readiness)"""
+    bundle = active_bundle
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
+        "model_loaded": bundle is not None,
+        "model_format": bundle.format,
+        "model_mode": MODEL_MODE,
+        "model_tiers": bundle.available_tiers(),
+        "model_hash": bundle.hash,
+        "model_loaded_at": bundle.loaded_at,
         "timestamp": datetime.now().isoformat()
     }
 
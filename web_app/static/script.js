@@ -7,12 +7,24 @@ const resultsSection = document.getElementById('resultsSection');
 const errorSection = document.getElementById('errorSection');
 const loadingSpinner = document.getElementById('loadingSpinner');
 const apiStatusElement = document.getElementById('apiStatus');
+const sweepSection = document.getElementById('sweepSection');
+const sweepAllSectors = document.getElementById('sweepAllSectors');
+const sweepChart = document.getElementById('sweepChart');
+
+// Temperature curve settings
+const SWEEP_RANGE = { temp_min: -25, temp_max: 30, step: 1 };
+const SWEEP_COLORS = ['#2563eb', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6'];
+let lastPrediction = null;
+// Temperature curves use the distilled fast model tier when the server has one
+let fastTierAvailable = false;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     setTodayAsDefault();
     checkApiHealth();
     predictionForm.addEventListener('submit', handlePredictionSubmit);
+    document.getElementById('sweepButton').addEventListener('click', loadTemperatureCurve);
+    sweepAllSectors.addEventListener('change', loadTemperatureCurve);
 });
 
 /**
@@ -34,6 +46,7 @@ async function checkApiHealth() {
         const response = await fetch('/api/health');
         if (response.ok) {
             const data = await response.json();
+            fastTierAvailable = (data.model_tiers || []).includes('fast');
             updateApiStatus('🟢 Online', '#10b981');
         } else {
             updateApiStatus('🔴 Offline', '#ef4444');
@@ -102,6 +115,9 @@ async function handlePredictionSubmit(event) {
         const result = await response.json();
         displayResults(result);
 
+        lastPrediction = result;
+        loadTemperatureCurve();
+
     } catch (error) {
         showErrorMessage(error.message);
     } finally {
@@ -161,6 +177,130 @@ function displayResults(result) {
     resultsSection.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
 }
 
+/**
+ * Fetch the demand curve over the temperature range for the last prediction
+ */
+async function loadTemperatureCurve() {
+    if (!lastPrediction) {
+        return;
+    }
+
+    const body = { date: lastPrediction.date, ...SWEEP_RANGE };
+    if (!sweepAllSectors.checked) {
+        body.sector = lastPrediction.sector;
+    }
+    if (fastTierAvailable) {
+        body.tier = 'fast';
+    }
+
+    try {
+        const response = await fetch('/api/predict/sweep', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body)
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.detail || 'Temperature curve failed');
+        }
+
+        const sweep = await response.json();
+        renderTemperatureCurve(sweep, lastPrediction.min_temp_celsius, lastPrediction.sector);
+        sweepSection.style.display = 'block';
+    } catch (error) {
+        showErrorMessage(error.message);
+    }
+}
+
+/**
+ * Create an SVG element with attributes
+ */
+function svgElement(tag, attributes, text) {
+    const element = document.createElementNS('http://www.w3.org/2000/svg', tag);
+    for (const [name, value] of Object.entries(attributes)) {
+        element.setAttribute(name, value);
+    }
+    if (text !== undefined) {
+        element.textContent = text;
+    }
+    return element;
+}
+
+/**
+ * Demand on a sweep curve at a temperature (linear between sweep points)
+ */
+function curveValueAt(temps, demand, temp) {
+    for (let j = 1; j < temps.length; j++) {
+        if (temp <= temps[j]) {
+            const share = (temp - temps[j - 1]) / (temps[j] - temps[j - 1]);
+            return demand[j - 1] + share * (demand[j] - demand[j - 1]);
+        }
+    }
+    return demand[demand.length - 1];
+}
+
+/**
+ * Draw the demand curves as an SVG line chart
+ */
+function renderTemperatureCurve(sweep, markerTemp, markerSector) {
+    const width = 800, height = 320;
+    const margin = { top: 20, right: 20, bottom: 40, left: 60 };
+    const temps = sweep.temperatures;
+    const curves = Object.entries(sweep.curves);
+    const values = curves.flatMap(([, demand]) => demand);
+
+    const minTemp = temps[0], maxTemp = temps[temps.length - 1];
+    let minDemand = Math.min(...values), maxDemand = Math.max(...values);
+    const padding = Math.max(10, (maxDemand - minDemand) * 0.1);
+    minDemand -= padding;
+    maxDemand += padding;
+
+    const x = t => margin.left + (t - minTemp) / (maxTemp - minTemp || 1) * (width - margin.left - margin.right);
+    const y = d => height - margin.bottom - (d - minDemand) / (maxDemand - minDemand) * (height - margin.top - margin.bottom);
+
+    const svg = svgElement('svg', { viewBox: `0 0 ${width} ${height}`, role: 'img' });
+
+    // Grid lines and axis labels
+    for (let i = 0; i <= 4; i++) {
+        const demand = minDemand + (maxDemand - minDemand) * i / 4;
+        svg.appendChild(svgElement('line', { class: 'chart-grid', x1: margin.left, x2: width - margin.right, y1: y(demand), y2: y(demand) }));
+        svg.appendChild(svgElement('text', { class: 'chart-label', x: margin.left - 8, y: y(demand) + 4, 'text-anchor': 'end' }, formatNumber(Math.round(demand))));
+    }
+    for (let t = Math.ceil(minTemp / 5) * 5; t <= maxTemp; t += 5) {
+        svg.appendChild(svgElement('text', { class: 'chart-label', x: x(t), y: height - margin.bottom + 18, 'text-anchor': 'middle' }, `${t}°C`));
+    }
+    svg.appendChild(svgElement('line', { class: 'chart-axis', x1: margin.left, x2: width - margin.right, y1: height - margin.bottom, y2: height - margin.bottom }));
+    svg.appendChild(svgElement('line', { class: 'chart-axis', x1: margin.left, x2: margin.left, y1: margin.top, y2: height - margin.bottom }));
+
+    // Marker at the temperature of the current prediction
+    if (markerTemp >= minTemp && markerTemp <= maxTemp) {
+        svg.appendChild(svgElement('line', { class: 'chart-marker', x1: x(markerTemp), x2: x(markerTemp), y1: margin.top, y2: height - margin.bottom }));
+    }
+
+    // One line per sector, with a legend
+    curves.forEach(([sector, demand], i) => {
+        const color = SWEEP_COLORS[i % SWEEP_COLORS.length];
+        const points = demand.map((d, j) => `${x(temps[j])},${y(d)}`).join(' ');
+        svg.appendChild(svgElement('polyline', { points, fill: 'none', stroke: color, 'stroke-width': 2.5 }));
+        svg.appendChild(svgElement('text', { x: width - margin.right - 5, y: margin.top + 14 + i * 16, 'text-anchor': 'end', fill: color, 'font-size': 12, 'font-weight': 600 }, sector));
+    });
+
+    // The current prediction's point, read from the plotted curve so it lies on the line
+    // (the curve may come from the fast tier while the headline uses the full model)
+    if (markerTemp >= minTemp && markerTemp <= maxTemp && sweep.curves[markerSector]) {
+        const demand = curveValueAt(temps, sweep.curves[markerSector], markerTemp);
+        svg.appendChild(svgElement('circle', { class: 'chart-marker-point', cx: x(markerTemp), cy: y(demand), r: 5 }));
+    }
+    if (sweep.model_tier === 'fast') {
+        svg.appendChild(svgElement('text', { class: 'chart-label', x: margin.left + 8, y: margin.top + 12 }, 'Fast model tier (approximate)'));
+    }
+
+    sweepChart.replaceChildren(svg);
+}
+
 /**
  * Show error message
  */
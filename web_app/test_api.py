@@ -1,142 +1,714 @@
-import requests
-import json
-import time
+"""
+API test suite, run in-process with FastAPI's TestClient:
 
-BASE_URL = "http://localhost:8000"
+    python -m pytest web_app/test_api.py -v
 
-print("=" * 80)
-print("WEB APP API TEST SUITE")
-print("=" * 80)
+Needs a trained model in the project folder (python mlmodel.py --fast-tier). Recent
+history, the audit log, profiles and registry models go to a temporary folder, so the
+project's own files are never modified.
+"""
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
 
-# Test 1: Health Check
-print("\n[TEST 1] Health Check")
-print("-" * 80)
-try:
-    response = requests.get(f"{BASE_URL}/api/health", timeout=5)
-    if response.status_code == 200:
-        data = response.json()
-        print(f"✓ API is healthy")
-        print(f"  Status: {data['status']}")
-        print(f"  Model loaded: {data['model_loaded']}")
-    else:
-        print(f"✗ Unexpected status code: {response.status_code}")
-except Exception as e:
-    print(f"✗ Error: {e}")
-
-# Test 2: Get Model Info
-print("\n[TEST 2] Get Model Information")
-print("-" * 80)
-try:
-    response = requests.get(f"{BASE_URL}/api/info", timeout=5)
-    if response.status_code == 200:
-        data = response.json()
-        print(f"✓ Model info retrieved")
-        print(f"  Available sectors: {', '.join(data['sectors'])}")
-        print(f"  Temperature range: {data['temperatures_range']['min']}°C to {data['temperatures_range']['max']}°C")
-    else:
-        print(f"✗ Unexpected status code: {response.status_code}")
-except Exception as e:
-    print(f"✗ Error: {e}")
-
-# Test 3: Make a Prediction
-print("\n[TEST 3] Make a Prediction")
-print("-" * 80)
-test_cases = [
-    {"date": "2025-12-25", "sector": "Families", "min_temp_celsius": -10.0, "description": "Cold Christmas"},
-    {"date": "2025-06-15", "sector": "Men", "min_temp_celsius": 15.0, "description": "Warm summer day"},
-    {"date": "2025-01-01", "sector": "Youth", "min_temp_celsius": -20.0, "description": "Extreme cold"},
-]
-
-for test in test_cases:
-    try:
-        payload = {
-            "date": test["date"],
-            "sector": test["sector"],
-            "min_temp_celsius": test["min_temp_celsius"]
-        }
-        response = requests.post(
-            f"{BASE_URL}/api/predict",
-            json=payload,
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✓ {test['description']}")
-            print(f"  Input: {test['date']}, {test['sector']}, {test['min_temp_celsius']}°C")
-            print(f"  Predicted demand: {data['predicted_shelter_demand']} beds")
-        else:
-            error_data = response.json()
-            print(f"✗ {test['description']}")
-            print(f"  Error: {error_data.get('detail', 'Unknown error')}")
-    except Exception as e:
-        print(f"✗ Error: {e}")
-
-# Test 4: Invalid Input Handling
-print("\n[TEST 4] Invalid Input Handling")
-print("-" * 80)
-invalid_tests = [
-    {
-        "payload": {"date": "invalid", "sector": "Families", "min_temp_celsius": 0},
-        "description": "Invalid date format"
-    },
-    {
-        "payload": {"date": "2025-12-25", "sector": "InvalidSector", "min_temp_celsius": 0},
-        "description": "Invalid sector"
-    },
-    {
-        "payload": {"date": "2025-12-25", "sector": "Families", "min_temp_celsius": 100},
-        "description": "Temperature out of range"
-    },
-]
-
-for test in invalid_tests:
-    try:
-        response = requests.post(
-            f"{BASE_URL}/api/predict",
-            json=test["payload"],
-            timeout=5
-        )
-        
-        if response.status_code != 200:
-            print(f"✓ {test['description']}")
-            error_data = response.json()
-            print(f"  Error message: {error_data.get('detail', 'Unknown error')}")
-        else:
-            print(f"✗ {test['description']} - Should have failed but succeeded")
-    except Exception as e:
-        print(f"✗ Error: {e}")
-
-# Test 5: Frontend Page
-print("\n[TEST 5] Frontend Page")
-print("-" * 80)
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+STATE_DIR = Path(tempfile.mkdtemp(prefix="shelter-api-test-"))
+ADMIN_TOKEN = "test-admin-token"
+REGISTRY_KEY = "testville"
+
+os.environ.update({
+    "SHELTER_HISTORY_PATH": str(STATE_DIR / "recent_history.json"),
+    "SHELTER_AUDIT_DIR": str(STATE_DIR / "audit"),
+    "SHELTER_PROFILE_DIR": str(STATE_DIR / "profiles"),
+    "SHELTER_RETRAIN_DIR": str(STATE_DIR / "retrain"),
+    "SHELTER_MODELS_DIR": str(STATE_DIR / "models"),
+    "SHELTER_ADMIN_TOKEN": ADMIN_TOKEN,
+})
+
+# A registry model: a copy of the main model's artifacts under another key
+if (ROOT_DIR / "shelter_demand_model.npz").exists():
+    registry_model_dir = STATE_DIR / "models" / REGISTRY_KEY
+    registry_model_dir.mkdir(parents=True)
+    for name in ("shelter_demand_model.npz", "shelter_demand_model.json", "weather_table.npz"):
+        if (ROOT_DIR / name).exists():
+            shutil.copy(ROOT_DIR / name, registry_model_dir / name)
+
+sys.path.insert(0, str(ROOT_DIR))
 try:
-    response = requests.get(f"{BASE_URL}/", timeout=5)
-    if response.status_code == 200:
-        if "<html" in response.text.lower() and "shelter demand" in response.text.lower():
-            print(f"✓ Frontend page loads successfully")
-            print(f"  Content length: {len(response.text)} bytes")
-        else:
-            print(f"✗ Frontend page missing expected content")
-    else:
-        print(f"✗ Unexpected status code: {response.status_code}")
-except Exception as e:
-    print(f"✗ Error: {e}")
-
-print("\n" + "=" * 80)
-print("TEST SUITE COMPLETE")
-print("=" * 80)
-print("""
-✅ All tests completed!
-
-The web application is ready to use:
-- Frontend: http://localhost:8000
-- API Docs: http://localhost:8000/docs
-- Health: http://localhost:8000/api/health
-
-Test results show the API is:
-✓ Responding to requests
-✓ Making accurate predictions
-✓ Validating inputs correctly
-✓ Serving the frontend interface
-""")
+    from web_app import main
+except Exception as e:  # no loadable model in this checkout
+    pytest.skip(f"Web app could not load a model ({e}); train one with: python mlmodel.py",
+                allow_module_level=True)
+
+from fastapi.testclient import TestClient
+
+PREDICTION = {"date": "2025-12-25", "sector": "Men", "min_temp_celsius": -10.0}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+# --- Basics ---
+
+def test_health(client):
+    response = client.get("/api/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["model_loaded"] is True
+
+
+def test_model_info(client):
+    data = client.get("/api/info").json()
+    assert set(data["sectors"]) == set(main.active_bundle.sectors)
+    assert data["temperatures_range"]["min"] < data["temperatures_range"]["max"]
+
+
+@pytest.mark.parametrize("date, sector, temp", [
+    ("2025-12-25", "Families", -10.0),
+    ("2025-06-15", "Men", 15.0),
+    ("2025-01-01", "Youth", -20.0),
+])
+def test_predict(client, date, sector, temp):
+    response = client.post("/api/predict", json={"date": date, "sector": sector, "min_temp_celsius": temp})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sector"] == sector
+    assert data["min_temp_celsius"] == temp
+    assert data["predicted_shelter_demand"] >= 0
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"date": "invalid", "sector": "Families", "min_temp_celsius": 0}, "Invalid date format"),
+    ({"date": "2025-12-25", "sector": "InvalidSector", "min_temp_celsius": 0}, "Invalid sector"),
+    ({"date": "2025-12-25", "sector": "Families", "min_temp_celsius": 100}, "Temperature must be between"),
+])
+def test_invalid_input(client, payload, message):
+    response = client.post("/api/predict", json=payload)
+    assert response.status_code == 400
+    assert message in response.json()["detail"]
+
+
+def test_frontend(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "<html" in response.text.lower()
+    assert "shelter demand" in response.text.lower()
+
+
+# --- Compact model artifact (user-026) ---
+
+def fit_small_model(seed=0):
+    """Small HistGradientBoostingRegressor on data with missing values"""
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(600, 6))
+    X[rng.uniform(size=X.shape) < 0.05] = np.nan
+    y = np.nan_to_num(X[:, 0]) * 3 + np.nan_to_num(X[:, 1]) ** 2 + rng.normal(0, 0.1, 600)
+    columns = [f"f{i}" for i in range(X.shape[1])]
+    model = HistGradientBoostingRegressor(max_iter=30, random_state=0).fit(pd.DataFrame(X, columns=columns), y)
+    return model, pd.DataFrame(X, columns=columns)
+
+
+def test_compact_artifact_matches_sklearn(tmp_path):
+    from mlmodel import export_compact_artifact
+
+    model, X = fit_small_model()
+    export_compact_artifact(model, list(X.columns), X.mean(), tmp_path / "m.npz", tmp_path / "m.json")
+    compact = main.load_compact_artifact(tmp_path / "m.npz", tmp_path / "m.json")
+
+    rng = np.random.default_rng(1)
+    for n_rows in (1, 7, main.CompactTreeEnsemble.CHUNK_ROWS + 5):
+        X_test = pd.DataFrame(rng.normal(size=(n_rows, X.shape[1])), columns=X.columns)
+        X_test.iloc[::3, 2] = np.nan
+        np.testing.assert_allclose(compact["model"].predict(X_test), model.predict(X_test), atol=1e-9)
+
+
+def test_compact_artifact_rejects_modified_arrays(tmp_path):
+    from mlmodel import export_compact_artifact
+
+    model, X = fit_small_model()
+    export_compact_artifact(model, list(X.columns), X.mean(), tmp_path / "m.npz", tmp_path / "m.json")
+    raw = bytearray((tmp_path / "m.npz").read_bytes())
+    raw[-100] ^= 0xFF
+    (tmp_path / "m.npz").write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="hash mismatch"):
+        main.load_compact_artifact(tmp_path / "m.npz", tmp_path / "m.json")
+
+
+# --- Per-sector sharded models (user-027) ---
+
+def test_sharded_mode_routes_rows_to_their_sector_model():
+    from types import SimpleNamespace
+    from sklearn.dummy import DummyRegressor
+
+    _, X = fit_small_model()
+    columns = list(X.columns[:3])
+    models = {sector: DummyRegressor(strategy="constant", constant=value).fit(X[columns], np.zeros(len(X)))
+              for sector, value in (("Men", 100.0), ("Families", 200.0), ("Youth", 300.0))}
+    bundle = SimpleNamespace(sharded_pipeline={"models": models, "feature_columns": columns},
+                             fast_pipeline=None, model=None)
+
+    sectors = ["Youth", "Men", "Families", "Men"]
+    predictions = main.predict_frame(X.iloc[:4], sectors, bundle=bundle)
+    np.testing.assert_array_equal(predictions, [300.0, 100.0, 200.0, 100.0])
+
+
+# --- Recent history ingest (user-030) ---
+
+@pytest.fixture
+def fresh_history():
+    """Empty history buffers for one test; the shared ones are put back afterwards"""
+    saved = dict(main.sector_history)
+    main.sector_history.clear()
+    main.track_sectors(main.active_bundle.sectors)
+    yield main.sector_history
+    main.sector_history.clear()
+    main.sector_history.update(saved)
+
+
+def test_history_stores_normalized_dates(client, fresh_history):
+    response = client.post("/api/history", json={"observations": [
+        {"date": "2025-1-5", "sector": "Men", "count": 100},
+        {"date": "2025-01-10", "sector": "Men", "count": 200},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["Men"]["last_date"] == "2025-01-10"
+    assert [day["date"] for day in fresh_history["Men"].to_list()] == ["2025-01-05", "2025-01-10"]
+    assert response.json()["Men"]["occupancy_7day_rolling_avg"] == 150
+
+
+def test_history_rejects_batch_with_an_invalid_observation(client, fresh_history):
+    client.post("/api/history", json={"observations": [{"date": "2025-01-10", "sector": "Men", "count": 200}]})
+    response = client.post("/api/history", json={"observations": [
+        {"date": "2025-01-11", "sector": "Families", "count": 300},
+        {"date": "2025-01-12", "sector": "Men", "count": 400},
+        {"date": "2025-01-09", "sector": "Men", "count": 500},  # older than the recorded 2025-01-10
+    ]})
+    assert response.status_code == 400
+    assert "older than the latest recorded date" in response.json()["detail"]
+    # Nothing from the rejected batch was applied
+    assert fresh_history["Families"].size == 0
+    assert fresh_history["Men"].to_list() == [{"date": "2025-01-10", "count": 200}]
+
+    response = client.post("/api/history", json={"observations": [
+        {"date": "2025-01-11", "sector": "Families", "count": 300},
+        {"date": "2025-01-12", "sector": "Nowhere", "count": 400},
+    ]})
+    assert response.status_code == 400
+    assert fresh_history["Families"].size == 0
+
+
+# --- Warm-up and readiness (user-035) ---
+
+def test_ready_after_warmup(client):
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ready"] is True
+    assert data["warmup"]["status"] == "ready"
+    assert data["warmup"]["predictions"] > 0
+
+
+@pytest.mark.parametrize("status", ["pending", "running", "failed"])
+def test_not_ready_until_warmed_up(client, monkeypatch, status):
+    monkeypatch.setitem(main.warmup_state, "status", status)
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+    # Liveness does not depend on warm-up
+    assert client.get("/api/health").status_code == 200
+
+
+# --- Request profiling (user-036) ---
+
+def test_profiled_request_stores_a_downloadable_profile(client, monkeypatch, tmp_path):
+    import pstats
+
+    monkeypatch.setattr(main, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(main, "PROFILE_DIR", tmp_path)
+    plain = client.post("/api/predict", json=PREDICTION)
+    assert "X-Profile-Id" not in plain.headers
+
+    response = client.post("/api/predict", json=PREDICTION, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.json() == plain.json()
+    profile_id = response.headers["X-Profile-Id"]
+
+    download = client.get(f"/api/profiles/{profile_id}")
+    assert download.status_code == 200
+    path = tmp_path / "downloaded.prof"
+    path.write_bytes(download.content)
+    functions = [name for _, _, name in pstats.Stats(str(path)).stats]
+    assert "get_live_prediction" in functions
+
+    # Only well-formed ids are served, and nothing at all when profiling is off
+    assert client.get("/api/profiles/..%2Fsecrets").status_code == 404
+    monkeypatch.setattr(main, "PROFILING_ENABLED", False)
+    assert client.get(f"/api/profiles/{profile_id}").status_code == 404
+    assert "X-Profile-Id" not in client.post("/api/predict", json=PREDICTION, headers={"X-Profile": "1"}).headers
+
+
+# --- Native thread limits (user-037) ---
+
+def test_thread_limits_apply_only_to_sklearn_models(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+    from mlmodel import export_compact_artifact
+
+    modes = []
+    limit_threads = main.thread_config.limit_threads
+    monkeypatch.setattr(main.thread_config, "limit_threads",
+                        lambda mode, workers=1: modes.append(mode) or limit_threads(mode, workers))
+
+    sklearn_model, X = fit_small_model()
+    sklearn_bundle = SimpleNamespace(model=sklearn_model, sharded_pipeline=None, fast_pipeline=None)
+    main.predict_frame(X.iloc[:1], ["Men"], bundle=sklearn_bundle)
+    main.predict_frame(X.iloc[:50], ["Men"] * 50, bundle=sklearn_bundle)
+    assert modes == ["single", "batch"]
+
+    modes.clear()
+    export_compact_artifact(sklearn_model, list(X.columns), X.mean(), tmp_path / "m.npz", tmp_path / "m.json")
+    compact = main.load_compact_artifact(tmp_path / "m.npz", tmp_path / "m.json")["model"]
+    compact_bundle = SimpleNamespace(model=compact, sharded_pipeline=None, fast_pipeline=None)
+    main.predict_frame(X.iloc[:50], ["Men"] * 50, bundle=compact_bundle)
+    assert modes == []
+
+
+def test_thread_counts_per_mode(monkeypatch):
+    monkeypatch.delenv("SHELTER_THREADS_BATCH", raising=False)
+    monkeypatch.delenv("SHELTER_THREADS_SINGLE", raising=False)
+    assert main.thread_config.threads_for("single", workers=4) == 1
+    assert main.thread_config.threads_for("batch") == main.thread_config.available_cpus()
+    monkeypatch.setenv("SHELTER_THREADS_BATCH", "3")
+    assert main.thread_config.threads_for("batch", workers=8) == 3
+    with pytest.raises(ValueError):
+        main.thread_config.threads_for("gpu")
+
+
+# --- Drift monitor (user-038) ---
+
+@pytest.fixture
+def fresh_drift_monitor(monkeypatch):
+    path = main.active_bundle.directory / main.DRIFT_REFERENCE_PATH.name
+    if not path.exists():
+        pytest.skip("No drift reference (written by python mlmodel.py)")
+    monitor = main.load_drift_monitor(path)
+    monkeypatch.setattr(main.active_bundle, "drift_monitor", monitor)
+    return monitor
+
+
+def test_drift_is_stable_for_training_period_traffic(client, fresh_history, fresh_drift_monitor):
+    training = main.active_bundle.pipeline.get('manifest', {}).get('training_data')
+    if not training:
+        pytest.skip("The loaded model records no training date range")
+    # Every week of the training period in every sector, with that day's observed weather
+    for date in pd.date_range(training["start_date"], training["end_date"], freq="7D").strftime("%Y-%m-%d"):
+        if main.lookup_weather(pd.Timestamp(date), main.active_bundle.weather)[0] is None:
+            continue
+        for sector in main.active_bundle.sectors:
+            main.get_live_prediction(date, sector, monitor=True)
+
+    report = client.get("/api/drift").json()
+    assert report["status"] == "stable", report
+    assert "month" not in report["features"]["all"] and "year" not in report["features"]["all"]
+    # No history ingested: the rolling averages are training means and are not recorded
+    assert report["features"]["all"]["occupancy_7day_rolling_avg"]["n"] == 0
+
+
+# --- Weather lookup (user-031) ---
+
+def write_weather_tables(directory):
+    """Observed table for 2030-01-01..10 (the 5th unrecorded), forecast for 2030-01-11..15"""
+    from mlmodel import export_weather_table
+
+    def days(first, n, min_temps):
+        frame = pd.DataFrame({"Date/Time": pd.date_range(first, periods=n).strftime("%Y-%m-%d")})
+        frame["Min Temp (°C)"] = min_temps
+        frame["Max Temp (°C)"] = frame["Min Temp (°C)"] + 8
+        frame["Total Precip (mm)"] = 1.0
+        return frame
+
+    observed = [-float(i) for i in range(1, 11)]
+    observed[4] = np.nan
+    export_weather_table(days("2030-01-01", 10, observed), directory / "weather_table.npz")
+    export_weather_table(days("2030-01-11", 5, [-30.0] * 5), directory / "weather_forecast.npz")
+    return main.load_weather_tables(directory)
+
+
+def test_weather_lookup_prefers_observed_then_forecast(tmp_path):
+    tables = write_weather_tables(tmp_path)
+    assert [source for source, _ in tables] == ["observed", "forecast"]
+
+    weather, source = main.lookup_weather(pd.Timestamp("2030-01-03"), tables)
+    assert source == "observed" and weather["Min Temp (°C)"] == -3.0
+    # A gap is filled from the previous recorded day, as in training
+    weather, source = main.lookup_weather(pd.Timestamp("2030-01-05"), tables)
+    assert source == "observed" and weather["Min Temp (°C)"] == -4.0
+    weather, source = main.lookup_weather(pd.Timestamp("2030-01-12"), tables)
+    assert source == "forecast" and weather["Min Temp (°C)"] == -30.0
+    assert main.lookup_weather(pd.Timestamp("2030-02-01"), tables) == (None, None)
+    assert main.lookup_weather(pd.Timestamp("2029-12-31"), tables) == (None, None)
+
+
+def test_prediction_without_temperature_uses_looked_up_weather(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "weather_tables", write_weather_tables(tmp_path))
+    response = client.post("/api/predict", json={"date": "2030-01-12", "sector": "Men"})
+    assert response.status_code == 200
+    assert response.json()["weather_source"] == "forecast"
+    assert response.json()["min_temp_celsius"] == -30.0
+
+    response = client.post("/api/predict", json={"date": "2030-03-01", "sector": "Men"})
+    assert response.status_code == 400
+    assert "min_temp_celsius is required" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("temp", ["nan", "inf", "-inf"])
+@pytest.mark.parametrize("date", ["2030-01-12", "2030-03-01"])
+def test_non_finite_temperature_rejected(client, tmp_path, monkeypatch, temp, date):
+    # With and without looked-up weather for the date
+    monkeypatch.setattr(main, "weather_tables", write_weather_tables(tmp_path))
+    response = client.get("/api/predict", params={"date": date, "sector": "Men", "min_temp_celsius": temp})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "min_temp_celsius must be a finite number"
+
+
+def test_prediction_error_is_reported_once(client, monkeypatch):
+    def fail(*args):
+        raise ValueError("no features")
+
+    monkeypatch.setattr(main, "build_feature_frame", fail)
+    for response in (client.post("/api/predict", json=PREDICTION),
+                     client.get("/api/predict", params={**PREDICTION, "min_temp_celsius": -10.5})):
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Prediction error: no features"
+
+
+# --- Admission control (user-032) ---
+
+def test_admission_rejects_when_queue_is_full(client, monkeypatch):
+    # No free slot and no room to wait: every queued API request is turned away
+    controller = main.AdmissionController(max_concurrency=0, max_queue=0, queue_timeout=0.1)
+    monkeypatch.setattr(main, "admission", controller)
+
+    response = client.post("/api/predict", json=PREDICTION)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(main.RETRY_AFTER_SECONDS)
+    assert controller.stats()["rejected_queue_full"] == 1
+    # Probes and metrics bypass the queue
+    assert client.get("/api/health").status_code == 200
+    assert client.get("/api/metrics").status_code == 200
+
+
+def test_admission_times_out_queued_requests(client, monkeypatch):
+    controller = main.AdmissionController(max_concurrency=0, max_queue=1, queue_timeout=0.05)
+    monkeypatch.setattr(main, "admission", controller)
+
+    assert client.post("/api/predict", json=PREDICTION).status_code == 503
+    assert controller.stats()["rejected_timeout"] == 1
+    assert controller.stats()["queue_depth"] == 0
+
+
+# --- Temperature sweep (user-033) ---
+
+def test_sweep_returns_one_curve_per_sector(client):
+    response = client.post("/api/predict/sweep", json={"date": "2025-12-25", "temp_min": -25, "temp_max": 30, "step": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["temperatures"]) == 56
+    assert set(data["curves"]) == set(main.active_bundle.sectors)
+    assert all(len(curve) == 56 for curve in data["curves"].values())
+
+
+def test_sweep_matches_single_predictions(client):
+    sweep = client.post("/api/predict/sweep", json={"date": "2025-12-25", "sector": "Men",
+                                                     "temp_min": -10, "temp_max": -10, "step": 1}).json()
+    single = client.post("/api/predict", json=PREDICTION).json()
+    assert sweep["curves"]["Men"] == [single["predicted_shelter_demand"]]
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"step": 1e-5}, "Step must be at least"),
+    ({"step": 1e-12}, "Step must be at least"),
+    ({"step": 0}, "Step must be at least"),
+    ({"step": 0.1}, "Sweep is limited to"),  # 551 points x every sector
+    ({"temp_min": 10, "temp_max": -10}, "Temperature range"),
+])
+def test_sweep_rejects_oversized_requests(client, overrides, message):
+    payload = {"date": "2025-12-25", "temp_min": -25, "temp_max": 30, "step": 1, **overrides}
+    response = client.post("/api/predict/sweep", json=payload)
+    assert response.status_code == 400
+    assert message in response.json()["detail"]
+
+
+def test_sweep_includes_both_ends_of_the_range(client):
+    sweep = client.post("/api/predict/sweep", json={"date": "2025-12-25", "sector": "Men",
+                                                     "temp_min": -1, "temp_max": 0.2, "step": 0.3}).json()
+    assert sweep["temperatures"] == [-1.0, -0.7, -0.4, -0.1, 0.2]
+
+
+# --- Cacheable GET (user-034) ---
+
+def test_get_prediction_etag_and_304(client):
+    params = {"date": "2025-12-25", "sector": "Families", "min_temp_celsius": -10}
+    response = client.get("/api/predict", params=params)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "max-age" in response.headers["Cache-Control"]
+
+    # Equivalent parameters produce the same tag
+    response = client.get("/api/predict", params={**params, "min_temp_celsius": "-10.0"},
+                          headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_ingest_changes_prediction_and_etag_across_restarts(client, fresh_history):
+    params = {"date": "2025-12-25", "sector": "Men", "min_temp_celsius": -10}
+    before = client.get("/api/predict", params=params)
+
+    observations = [{"date": f"2025-12-{day:02d}", "sector": "Men", "count": 20000} for day in range(1, 15)]
+    assert client.post("/api/history", json={"observations": observations}).status_code == 200
+    after = client.get("/api/predict", params=params, headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.json()["predicted_shelter_demand"] != before.json()["predicted_shelter_demand"]
+
+    # A restarted worker rebuilds the buffers from the history file and must agree
+    main.sector_history.clear()
+    main.track_sectors(main.active_bundle.sectors)
+    main.load_history(main.HISTORY_PATH)
+    restarted = client.get("/api/predict", params=params, headers={"If-None-Match": before.headers["ETag"]})
+    assert restarted.status_code == 200
+    assert restarted.headers["ETag"] == after.headers["ETag"]
+
+    # Re-sending the latest day unchanged leaves the content, and so the tag, as it was
+    assert client.post("/api/history", json={"observations": observations[-1:]}).status_code == 200
+    assert client.get("/api/predict", params=params,
+                      headers={"If-None-Match": after.headers["ETag"]}).status_code == 304
+
+
+# --- Audit log (user-039) ---
+
+def read_audit_records(directory):
+    import gzip
+    import json
+
+    records = []
+    for path in sorted(directory.glob("audit-*.jsonl.gz")):
+        with gzip.open(path, "rt") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def test_prediction_is_audited(client):
+    import time
+
+    payload = {**PREDICTION, "min_temp_celsius": -13.25}
+    prediction = client.post("/api/predict", json=payload).json()
+
+    # Records are written by the background task within the flush interval
+    deadline = time.monotonic() + main.AUDIT_FLUSH_INTERVAL + 5
+    matching = []
+    while not matching and time.monotonic() < deadline:
+        time.sleep(0.1)
+        matching = [record for record in read_audit_records(main.AUDIT_DIR)
+                    if record["inputs"].get("min_temp_celsius") == -13.25]
+    assert len(matching) == 1
+    record = matching[0]
+    assert record["endpoint"] == "POST /api/predict"
+    assert record["inputs"]["sector"] == "Men"
+    assert record["output"]["predicted_shelter_demand"] == prediction["predicted_shelter_demand"]
+    assert record["model_hash"] == main.active_bundle.hash
+
+
+def test_audit_log_drops_when_full_and_flushes_on_close(tmp_path):
+    import asyncio
+
+    async def scenario():
+        logger = main.AuditLogger(tmp_path, max_queue=2, policy="drop", batch_size=500,
+                                  flush_interval=60, rotate_bytes=1024 * 1024, max_files=10)
+        await logger.start()
+        for i in range(5):
+            await logger.log({"i": i})
+        await logger.close()
+        return logger
+
+    logger = asyncio.run(scenario())
+    assert (logger.logged, logger.dropped, logger.written) == (2, 3, 2)
+    assert [record["i"] for record in read_audit_records(tmp_path)] == [0, 1]
+
+
+def test_etag_depends_on_model_mode_and_sharded_models(monkeypatch):
+    bundle = main.active_bundle
+    args = (PREDICTION["date"], PREDICTION["sector"], PREDICTION["min_temp_celsius"])
+    global_tag = main.prediction_etag(bundle, *args)
+
+    monkeypatch.setattr(bundle, "mode", "sharded")
+    monkeypatch.setattr(bundle, "sharded_hash", "a" * 64)
+    sharded_tag = main.prediction_etag(bundle, *args)
+    assert sharded_tag != global_tag
+    monkeypatch.setattr(bundle, "sharded_hash", "b" * 64)
+    assert main.prediction_etag(bundle, *args) != sharded_tag
+
+
+# --- Explanations (user-040) ---
+
+def test_explanation_adds_up_to_prediction(client):
+    response = client.post("/api/predict", json={**PREDICTION, "explain": True})
+    assert response.status_code == 200
+    explanation = response.json()["explanation"]
+    total = explanation["baseline"] + sum(explanation["features"].values())
+    assert total == pytest.approx(explanation["prediction"], abs=1e-6)
+
+
+# --- Capacity simulation (user-041) ---
+
+SIMULATION = {"start_date": "2024-01-01", "days": 30, "draws": 500, "seed": 1,
+              "capacity": {"Men": 1000}, "total_capacity": 5000}
+
+
+def test_simulation_summary(client):
+    response = client.post("/api/simulate/capacity", json=SIMULATION)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["daily"]["dates"]) == 30
+    assert data["analog_years"] <= data["analog_seasons"] <= data["analog_years"] * 15
+    men = data["daily"]["Men"]
+    assert all(low <= mid <= high for low, mid, high in zip(men["p5"], men["p50"], men["p95"]))
+    assert 0 <= data["season"]["Men"]["p_any_day_over"] <= 1
+
+
+@pytest.mark.parametrize("overrides", [
+    {"draws": main.MAX_SIMULATION_DRAWS + 1},
+    {"days": main.MAX_SIMULATION_DAYS + 1},
+    {"draws": 100000, "days": 366},  # each within its own limit, too large together
+    {"draws": 0},
+])
+def test_simulation_limits(client, overrides):
+    response = client.post("/api/simulate/capacity", json={**SIMULATION, **overrides})
+    assert response.status_code == 400
+
+
+def test_simulation_cell_limit_without_the_api():
+    from datetime import date
+    import capacity_sim
+
+    def flat_demand(starts):
+        return np.full((len(starts), 10, 2), 100.0)
+
+    result = capacity_sim.simulate_capacity(flat_demand, np.arange(730000, 730015), date(2024, 1, 1),
+                                            10, ["A", "B"], draws=200, residual_sd=5.0, seed=0)
+    assert result["analog_seasons"] == 15 and result["analog_years"] == 1
+    assert result["season"]["total"]["peak_p50"] > 200
+    with pytest.raises(ValueError, match="draws x days x sectors"):
+        capacity_sim.simulate_capacity(flat_demand, np.arange(730000, 730015), date(2024, 1, 1),
+                                       10, ["A", "B"], draws=capacity_sim.MAX_CELLS // 20 + 1)
+
+
+# --- Fast tier (user-043) ---
+
+def test_fast_tier(client):
+    if "fast" not in client.get("/api/health").json()["model_tiers"]:
+        pytest.skip("No fast tier loaded (train with: python mlmodel.py --fast-tier)")
+    response = client.post("/api/predict", json={**PREDICTION, "tier": "fast"})
+    assert response.status_code == 200
+    assert response.json()["model_tier"] == "fast"
+
+    # The sweep the frontend plots reports its tier, and matches fast single predictions
+    sweep = client.post("/api/predict/sweep", json={"date": PREDICTION["date"], "sector": "Men", "tier": "fast",
+                                                     "temp_min": -10, "temp_max": -10, "step": 1}).json()
+    assert sweep["model_tier"] == "fast"
+    assert sweep["curves"]["Men"] == [response.json()["predicted_shelter_demand"]]
+
+
+def test_unknown_tier_rejected(client):
+    response = client.post("/api/predict", json={**PREDICTION, "tier": "tiny"})
+    assert response.status_code == 400
+
+
+# --- Admin retraining API (user-044) ---
+
+def test_admin_api_requires_token(client):
+    assert client.get("/api/admin/jobs").status_code == 401
+    assert client.get("/api/admin/jobs", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.post("/api/admin/retrain", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+
+def test_admin_lists_jobs(client):
+    response = client.get("/api/admin/jobs", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200
+    assert isinstance(response.json()["jobs"], list)
+    assert client.get("/api/admin/jobs/no-such-job", headers={"X-Admin-Token": ADMIN_TOKEN}).status_code == 404
+
+
+def test_promotion_swaps_model_and_weather_together(client, tmp_path, monkeypatch):
+    import threading
+    from types import SimpleNamespace
+
+    job = main.RetrainJob("test-weather-swap", main.RetrainRequest(min_r2=-1e9, max_mae_increase=1e9),
+                          main.active_bundle)
+    served = main.active_bundle
+    served_tables = main.weather_tables
+    staged_observed = write_weather_tables(tmp_path)[0][1]
+
+    def fake_training():
+        # The served model's artifacts with a new observed weather table, as a training run leaves them
+        job.staging_dir.mkdir(parents=True, exist_ok=True)
+        for artifact in main.RETRAIN_ARTIFACTS:
+            if artifact.exists() and artifact != main.WEATHER_TABLE_PATH:
+                shutil.copy(artifact, job.staging_dir / artifact.name)
+        shutil.copy(tmp_path / main.WEATHER_TABLE_PATH.name, job.staging_dir / main.WEATHER_TABLE_PATH.name)
+        job.process = SimpleNamespace(wait=lambda timeout: 0)
+
+    monkeypatch.setattr(main, "active_bundle", served)  # put back after the test
+    monkeypatch.setattr(job, "start_process", fake_training)
+    monkeypatch.setattr(job, "promote_artifacts", lambda: None)  # keep the project's files
+    # In its own thread, as the service runs jobs (run() lowers its thread's priority)
+    thread = threading.Thread(target=job.run)
+    thread.start()
+    thread.join()
+    assert job.status == "succeeded", job.error
+
+    promoted = main.active_bundle
+    assert promoted is not served
+    observed = dict(promoted.weather)["observed"]
+    assert observed.content_hash == staged_observed.content_hash
+    # The old bundle and the shared startup tables are untouched: nothing paired old and new
+    assert served.weather is served_tables and main.weather_tables is served_tables
+    assert dict(promoted.weather).get("forecast") is dict(served_tables).get("forecast")
+
+
+# --- Model registry (user-045) ---
+
+def test_registry_routes_by_model_key(client):
+    if REGISTRY_KEY not in client.get("/api/models").json()["models"]:
+        pytest.skip("No compact artifact to build a registry model from")
+    default = client.post("/api/predict", json=PREDICTION).json()
+    routed = client.post("/api/predict", json={**PREDICTION, "model": REGISTRY_KEY}).json()
+    assert routed["model"] == REGISTRY_KEY
+    assert default["model"] == main.DEFAULT_MODEL_KEY
+    # Same artifacts, so the same answer
+    assert routed["predicted_shelter_demand"] == default["predicted_shelter_demand"]
+
+    stats = client.get("/api/models").json()["models"][REGISTRY_KEY]
+    assert stats["loaded"] is True
+    assert stats["loads"] == 1
+    assert stats["last_load_ms"] > 0
+
+
+def test_unknown_model_rejected(client):
+    response = client.post("/api/predict", json={**PREDICTION, "model": "no-such-model"})
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))